@@ -1,44 +1,143 @@
 import sys
 import os
+import importlib
+from collections import OrderedDict
 import numpy as np
-import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
                              QPushButton, QLabel, QLineEdit, QFileDialog, QComboBox,
-                             QTabWidget, QGroupBox, QStatusBar, QInputDialog, QDialog, QTableView)
+                             QTabWidget, QGroupBox, QStatusBar, QInputDialog, QDialog, QTableView,
+                             QProgressBar, QHeaderView, QCheckBox, QDockWidget, QTableWidget,
+                             QTableWidgetItem, QTabBar, QSpinBox, QDoubleSpinBox)
 from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import Qt, pyqtSignal, QAbstractTableModel
-import pyqtgraph as pg
-from scipy.signal import hilbert, find_peaks
-from scipy.fft import fft, fftfreq
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractTableModel, QTimer, QRectF
+from interf_engine import SUPPORTED_EXTENSIONS, Recording, load_recording, time_axis
+from interf_outofcore import channel_envelope_and_phase, needs_out_of_core
+from interf_graph import processing_graph, DEFAULT_SAMPLING_RATE
+from interf_analytic import AnalyticStore
+from interf_stream import StreamPipeline, SyntheticSource, FileReplaySource
+from interf_spectrogram import spectrogram
+from interf_opd import export_opd
+from interf_filters import FILTER_TYPES, parse_filter_params
+from interf_spectrum import WINDOWS, spectrum_service, peak_frequency
+from interf_cache import RecordingCache
+from interf_lod import plot_lod, clear_lod, PeakOverlay
+from interf_jobs import JobManager
+from interf_trace import tracer, span
+from interf_startup import WARMUP_ENABLED, warm_up
+from interf_tabs import TabManager
+from interf_precision import PRECISIONS, DEFAULT_PRECISION, real_dtype
+from interf_export import (data_formats, export_arrays, demodulation_arrays, spec_from_plot, render_figures,
+                           shutdown_render_pool)
+
+# ----- Огибающая и фаза для вкладок анализа -----
+# load(progress) → (огибающая, фаза): из AnalyticStore или пересчётом исходного сигнала.
+# Без источника (поток) пересчитать нечего — вкладка держит готовый результат.
+def demodulation_loader(signal, source=None, store=None, result=None):
+    if source is None:
+        return lambda progress=None: result
+    def load(progress=None):
+        cached = store.get(*source) if store is not None else None
+        if cached is not None:
+            return cached
+        envelope, phase = channel_envelope_and_phase(signal, progress=progress)
+        if store is not None:
+            store.put(source[0], source[1], envelope, phase, source[2])
+        return envelope, phase
+    return load
+
+# ----- Экспорт в фоне: с JobManager ожидание идёт в рабочем потоке, без него — сразу -----
+def run_export(jobs, kind, fn, on_result, on_error):
+    if jobs is None:
+        try:
+            result = fn()
+        except Exception as e:
+            on_error(str(e))
+            return
+        on_result(result)
+        return
+    jobs.submit(kind, lambda job: fn(), on_result=on_result, on_error=on_error)
+
+def wait_for_files(jobs, kind, futures, on_result, on_error):
+    # futures — задачи отрисовки interf_export; результат — список записанных файлов
+    run_export(jobs, kind, lambda: [future.result() for future in futures], on_result, on_error)
+
+# ----- RecordingTableModel для отображения больших таблиц -----
+# Ячейки читаются прямо из массивов-каналов Recording (в том числе из np.memmap).
+# Строки форматируются блоками по BLOCK_ROWS вокруг видимой области и хранятся
+# в LRU-кэше, так что перерисовка не обращается к массивам поштучно.
+# Отображается диапазон отсчётов [start, stop) — фильтрация без копирования данных.
+# QHeaderView инициализирует заголовок за время, линейное по числу строк, поэтому
+# представление показывает окно не более MAX_VIEW_ROWS строк, которое RawDataWidget
+# сдвигает при прокрутке к его краю.
+class RecordingTableModel(QAbstractTableModel):
+    BLOCK_ROWS = 512
+    MAX_BLOCKS = 64
+    MAX_VIEW_ROWS = 4_000_000
 
-# ----- PandasModel для отображения больших таблиц -----
-class PandasModel(QAbstractTableModel):
     def __init__(self, data, parent=None):
         super().__init__(parent)
         self._data = data
+        self._blocks = OrderedDict()
+        self._start = 0
+        self._stop = min(len(data), self.MAX_VIEW_ROWS)
 
     def rowCount(self, parent=None):
-        return self._data.shape[0]
+        return self._stop - self._start
 
     def columnCount(self, parent=None):
-        return self._data.shape[1]
+        return self._data.n_channels
 
     def data(self, index, role=Qt.DisplayRole):
         if index.isValid() and role == Qt.DisplayRole:
-            return str(self._data.iloc[index.row(), index.column()])
+            row = self._start + index.row()
+            block_id, offset = divmod(row, self.BLOCK_ROWS)
+            return self._block(block_id)[index.column()][offset]
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
-                return str(self._data.columns[section])
+                return self._data.columns[section]
             else:
-                return str(section)
+                return str(self._start + section)
         return None
 
+    def _block(self, block_id):
+        block = self._blocks.get(block_id)
+        if block is not None:
+            self._blocks.move_to_end(block_id)
+            return block
+        lo = block_id * self.BLOCK_ROWS
+        hi = min(lo + self.BLOCK_ROWS, len(self._data))
+        block = [list(map(str, ch[lo:hi].tolist())) for ch in self._data.channels]
+        self._blocks[block_id] = block
+        if len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return block
+
+    def sample_range(self):
+        return self._start, self._stop
+
+    def set_sample_range(self, start, stop):
+        start = max(0, min(int(start), len(self._data)))
+        stop = max(start, min(int(stop), len(self._data), start + self.MAX_VIEW_ROWS))
+        self.beginResetModel()
+        self._start, self._stop = start, stop
+        self.endResetModel()
+
+    def total_samples(self):
+        return len(self._data)
+
+    def row_of_sample(self, sample):
+        # Номер строки представления для отсчёта или -1, если он вне диапазона
+        return sample - self._start if self._start <= sample < self._stop else -1
+
     def update(self, data):
         self.beginResetModel()
         self._data = data
+        self._blocks.clear()
+        self._start = 0
+        self._stop = min(len(data), self.MAX_VIEW_ROWS)
         self.endResetModel()
 
 # ----- Кликабельный QLabel -----
@@ -91,7 +190,7 @@ class FileDropButton(QPushButton):
             urls = event.mimeData().urls()
             if urls:
                 file_path = urls[0].toLocalFile()
-                if file_path.lower().endswith(('.txt', '.csv', '.xlsx')):
+                if file_path.lower().endswith(SUPPORTED_EXTENSIONS):
                     event.acceptProposedAction()
                     self.setText("Перетащите файл сюда")
                     return
@@ -102,7 +201,7 @@ class FileDropButton(QPushButton):
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
             file_path = event.mimeData().urls()[0].toLocalFile()
-            if file_path.lower().endswith(('.txt', '.csv', '.xlsx')):
+            if file_path.lower().endswith(SUPPORTED_EXTENSIONS):
                 self.setText(self.default_text)
                 self.fileDropped.emit(file_path)
                 event.acceptProposedAction()
@@ -117,14 +216,95 @@ class RawDataWidget(QWidget):
         self.init_ui()
     def init_ui(self):
         layout = QVBoxLayout(self)
+        # Переход к отсчёту и фильтр по диапазону отсчётов
+        nav_layout = QHBoxLayout()
+        self.goto_input = QLineEdit()
+        self.goto_input.setPlaceholderText("Sample index")
+        self.btn_goto = QPushButton("Go To")
+        self.btn_goto.clicked.connect(self.go_to_sample)
+        self.goto_input.returnPressed.connect(self.go_to_sample)
+        self.range_from = QLineEdit()
+        self.range_from.setPlaceholderText("From")
+        self.range_to = QLineEdit()
+        self.range_to.setPlaceholderText("To")
+        self.btn_range = QPushButton("Apply Range")
+        self.btn_range.clicked.connect(self.apply_range)
+        self.btn_reset_range = QPushButton("Show All")
+        self.btn_reset_range.clicked.connect(self.reset_range)
+        nav_layout.addWidget(self.goto_input)
+        nav_layout.addWidget(self.btn_goto)
+        nav_layout.addWidget(self.range_from)
+        nav_layout.addWidget(self.range_to)
+        nav_layout.addWidget(self.btn_range)
+        nav_layout.addWidget(self.btn_reset_range)
+        layout.addLayout(nav_layout)
         self.table = QTableView()
-        self.model = PandasModel(self.data)
+        # Фиксированная высота строк: представлению не нужно измерять миллионы строк
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(20)
+        self.model = RecordingTableModel(self.data)
         self.table.setModel(self.model)
         self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        # Границы, заданные фильтром; окно модели сдвигается только внутри них
+        self.range_limits = (0, len(self.data))
         layout.addWidget(self.table)
     def update_data(self, data):
         self.data = data
+        self.range_limits = (0, len(data))
         self.model.update(data)
+    def show_window(self, first_sample, top_sample):
+        # Сдвигает окно модели так, чтобы оно начиналось около first_sample, и
+        # прокручивает таблицу к top_sample
+        lo, hi = self.range_limits
+        size = min(self.model.MAX_VIEW_ROWS, hi - lo)
+        start = max(lo, min(first_sample, hi - size))
+        self.model.set_sample_range(start, start + size)
+        row = self.model.row_of_sample(top_sample)
+        if row >= 0:
+            self.table.scrollTo(self.model.index(row, 0), QTableView.PositionAtTop)
+        return row
+    def on_scroll(self, value):
+        bar = self.table.verticalScrollBar()
+        start, stop = self.model.sample_range()
+        lo, hi = self.range_limits
+        top = start + self.table.rowAt(0)
+        half = self.model.MAX_VIEW_ROWS // 2
+        if value >= bar.maximum() and stop < hi:
+            self.show_window(top - half, top)
+        elif value <= bar.minimum() and start > lo:
+            self.show_window(top - half, top)
+    def go_to_sample(self):
+        try:
+            sample = int(self.goto_input.text())
+        except ValueError:
+            return
+        if len(self.data) == 0:
+            return
+        sample = max(0, min(sample, len(self.data) - 1))
+        if not self.range_limits[0] <= sample < self.range_limits[1]:
+            self.range_limits = (0, len(self.data))
+        row = self.model.row_of_sample(sample)
+        if row < 0:
+            # Отсчёт вне текущего окна — сдвигаем окно так, чтобы он оказался в середине
+            row = self.show_window(sample - self.model.MAX_VIEW_ROWS // 2, sample)
+        else:
+            self.table.scrollTo(self.model.index(row, 0), QTableView.PositionAtTop)
+        self.table.selectRow(row)
+    def apply_range(self):
+        try:
+            start = int(self.range_from.text() or 0)
+            stop = int(self.range_to.text() or len(self.data))
+        except ValueError:
+            return
+        start = max(0, min(start, len(self.data)))
+        self.range_limits = (start, max(start, min(stop, len(self.data))))
+        self.show_window(start, start)
+    def reset_range(self):
+        self.range_from.clear()
+        self.range_to.clear()
+        self.range_limits = (0, len(self.data))
+        self.show_window(0, 0)
 
 # ----- Виджет для отображения оригинального сигнала в новом окне -----
 class OriginalSignalWidget(QWidget):
@@ -134,11 +314,12 @@ class OriginalSignalWidget(QWidget):
         self.sampling_rate = sampling_rate
         self.init_ui()
     def init_ui(self):
+        import pyqtgraph as pg
         layout = QVBoxLayout(self)
         self.plot = pg.PlotWidget(title="Original Signal")
         self.plot.setBackground('k')
-        t = np.arange(len(self.signal)) / self.sampling_rate
-        self.plot.plot(t, self.signal, pen=pg.mkPen('#00FF00', width=2))
+        # Ось времени задаётся шагом, без массива того же размера, что и сигнал
+        self.curve = plot_lod(self.plot, self.signal, dx=1.0 / self.sampling_rate, pen=pg.mkPen('#00FF00', width=2))
         self.plot.setLabel('left', 'Amplitude')
         self.plot.setLabel('bottom', 'Time (s)')
         self.plot.showGrid(x=True, y=True)
@@ -146,43 +327,61 @@ class OriginalSignalWidget(QWidget):
 
 # ----- Виджет для отображения спектра (без первой гармоники) -----
 class SpectrumWidget(QWidget):
-    def __init__(self, demodulated_signal, sampling_rate, zero_padding=0, parent=None):
+    def __init__(self, demodulated_signal, sampling_rate, zero_padding=0, parent=None, spectrum=None, band=None,
+                 window='Rectangular'):
         super().__init__(parent)
         self.demodulated_signal = demodulated_signal
         self.sampling_rate = sampling_rate
         self.zero_padding = zero_padding
+        # (от, до, число частот) в Гц — спектр в полосе (zoom FFT) с окном window, иначе вся полоса
+        self.band = band
+        self.window_name = window
+        # (частоты, амплитуды), если спектр уже посчитан (например, в фоне менеджером вкладок)
+        self.spectrum = spectrum
         self.init_ui()
     def init_ui(self):
+        import pyqtgraph as pg
         layout = QVBoxLayout(self)
         self.plot = pg.PlotWidget(title="Spectrum of Demodulated Signal")
         self.plot.setBackground('k')
         self.plot.setLabel('left', 'Amplitude')
         self.plot.setLabel('bottom', 'Frequency (Hz)')
         self.plot.showGrid(x=True, y=True)
-        padded_signal = np.pad(self.demodulated_signal, (0, self.zero_padding), 'constant')
-        N = len(padded_signal)
-        T = 1.0 / self.sampling_rate
-        yf = fft(padded_signal)
-        xf = fftfreq(N, T)[:N // 2]
-        amplitude = 2.0 / N * np.abs(yf[:N // 2])
-        # Исключаем первую гармонику (первый элемент)
-        xf = xf[1:]
-        amplitude = amplitude[1:]
-        self.plot.plot(xf, amplitude, pen=pg.mkPen('#00FFFF', width=2))
+        if self.spectrum is None:
+            self.spectrum = self.compute_spectrum(self.demodulated_signal, self.sampling_rate, self.zero_padding,
+                                                  self.band, self.window_name)
+        xf, amplitude = self.spectrum
+        if self.band is None:
+            # Исключаем первую гармонику (первый элемент)
+            xf = xf[1:]
+            amplitude = amplitude[1:]
+        self.curve = plot_lod(self.plot, amplitude, xf, pen=pg.mkPen('#00FFFF', width=2))
         layout.addWidget(self.plot)
+        peak = peak_frequency(xf, amplitude)
+        if peak is not None:
+            layout.addWidget(QLabel(f"Peak: {peak[0]:.8g} Hz, amplitude {peak[1]:.4g}"))
+    @staticmethod
+    def compute_spectrum(demodulated_signal, sampling_rate, zero_padding=0, band=None, window='Rectangular'):
+        if band is None:
+            return spectrum_service.spectrum(demodulated_signal, sampling_rate, zero_padding)
+        return spectrum_service.band(demodulated_signal, sampling_rate, *band, window=window)
 
 # ----- Виджет для отображения фазы -----
 class PhaseWidget(QWidget):
-    def __init__(self, time, phase, parent=None):
+    def __init__(self, time, phase, parent=None, sampling_rate=None):
         super().__init__(parent)
+        # time=None — ось задаётся частотой дискретизации, без отдельного массива
         self.time = time
         self.phase = phase
+        self.sampling_rate = sampling_rate
         self.init_ui()
     def init_ui(self):
+        import pyqtgraph as pg
         layout = QVBoxLayout(self)
         self.plot = pg.PlotWidget(title="Phase vs Time")
         self.plot.setBackground('k')
-        self.plot.plot(self.time, self.phase, pen=pg.mkPen('#00FFFF', width=2))
+        dx = 1.0 / self.sampling_rate if self.time is None else None
+        self.curve = plot_lod(self.plot, self.phase, self.time, pen=pg.mkPen('#00FFFF', width=2), dx=dx)
         self.plot.setLabel('left', 'Phase (radians)')
         self.plot.setLabel('bottom', 'Time (s)')
         self.plot.showGrid(x=True, y=True)
@@ -190,12 +389,40 @@ class PhaseWidget(QWidget):
 
 # ----- Виджет демодуляции с кликабельными заголовками и возможностью обновления данных -----
 class DemodulationWidget(QWidget):
-    def __init__(self, signal, sampling_rate=1000.0, parent=None):
+    streamStateChanged = pyqtSignal(bool)
+    def __init__(self, signal, sampling_rate=DEFAULT_SAMPLING_RATE, parent=None, jobs=None, store=None,
+                 pipeline=None):
         super().__init__(parent)
         self.signal = signal
         self.sampling_rate = sampling_rate
+        # Если передан JobManager, преобразование Гильберта и FFT выполняются в фоне
+        self.jobs = jobs
+        # AnalyticStore: уже посчитанные огибающая и фаза берутся из него
+        self.store = store
+        # Граф обработки (interf_graph): пересчитываются только этапы после изменённого параметра.
+        # Без общего графа виджет строит свой для переданного сигнала
+        if pipeline is None:
+            pipeline = processing_graph(store, sampling_rate)
+            if len(signal):
+                pipeline.set(recording=Recording.from_array(["Signal"], np.asarray(signal)[:, None]))
+        self.pipeline = pipeline
+        # Потоковый режим: конвейер interf_stream и таймер перерисовки
+        self.stream = None
+        self.stream_timer = QTimer(self)
+        self.stream_timer.timeout.connect(self.refresh_stream)
+        # Найденные пики (interf_fringes.FringeResult) и сигнал, к которому они относятся
+        self.peak_signal = None
+        self.peak_result = None
+        self.peak_overlay = None
+        # (частоты, амплитуды) последнего показанного спектра — для экспорта данных
+        self.spectrum = None
+        # (запись, канал, настройки) показанного сигнала; None для потока
+        self.source = None
+        # Ось времени фазы; None — задаётся частотой дискретизации (результаты графа)
+        self.time = None
         self.init_ui()
     def init_ui(self):
+        import pyqtgraph as pg
         layout = QVBoxLayout(self)
         # Блок управления нулями
         zero_pad_layout = QHBoxLayout()
@@ -206,20 +433,54 @@ class DemodulationWidget(QWidget):
         self.btn_update = QPushButton("Update Spectrum")
         self.btn_update.setStyleSheet("background-color: #00B4FF; font-weight: bold; padding: 5px;")
         self.btn_update.clicked.connect(self.update_spectrum)
+        # Настройки спектра пересчитывают только FFT: огибающая берётся из графа
+        self.zero_input.editingFinished.connect(self.update_spectrum)
+        self.window_selector = QComboBox()
+        self.window_selector.addItems(list(WINDOWS))
+        self.window_selector.currentTextChanged.connect(self.update_spectrum)
+        self.fast_len_check = QCheckBox("Fast FFT length")
+        self.fast_len_check.setStyleSheet("color: #FFFFFF;")
+        self.fast_len_check.setToolTip("Round the padded length up to the next fast FFT size")
+        self.fast_len_check.toggled.connect(self.update_spectrum)
         zero_pad_layout.addWidget(zero_label)
         zero_pad_layout.addWidget(self.zero_input, 1)
+        zero_pad_layout.addWidget(self.window_selector)
+        zero_pad_layout.addWidget(self.fast_len_check)
         zero_pad_layout.addWidget(self.btn_update, 1)
         layout.addLayout(zero_pad_layout)
-        # Если сигнал пустой, задаём пустые массивы
-        if self.signal.size == 0:
-            self.demodulated_signal = np.array([])
-            self.instantaneous_phase = np.array([])
-            self.time = np.array([])
-        else:
-            analytic_signal = hilbert(self.signal)
-            self.demodulated_signal = np.abs(analytic_signal)
-            self.instantaneous_phase = np.unwrap(np.angle(analytic_signal))
-            self.time = np.arange(len(self.signal)) / self.sampling_rate
+        # Спектр в полосе частот (zoom FFT) вместо дополнения нулями всей записи
+        band_layout = QHBoxLayout()
+        self.band_check = QCheckBox("Zoom band (Hz):")
+        self.band_check.setStyleSheet("color: #FFFFFF;")
+        self.band_check.setToolTip("High-resolution spectrum of a frequency band (chirp-Z transform); "
+                                   "empty limits take the visible range of the spectrum plot")
+        self.band_check.toggled.connect(self.update_spectrum)
+        self.band_from = QLineEdit()
+        self.band_to = QLineEdit()
+        for edit, hint in ((self.band_from, "from"), (self.band_to, "to")):
+            edit.setPlaceholderText(hint)
+            edit.setStyleSheet("background-color: #353535; color: #FFFFFF; padding: 3px;")
+            edit.editingFinished.connect(self.update_spectrum)
+        bins_label = QLabel("Bins:")
+        bins_label.setStyleSheet("color: #FFFFFF;")
+        self.band_bins = QSpinBox()
+        self.band_bins.setRange(2, 1000000)
+        self.band_bins.setValue(4096)
+        self.band_bins.setKeyboardTracking(False)
+        self.band_bins.valueChanged.connect(self.update_spectrum)
+        self.peak_label = QLabel("")
+        self.peak_label.setStyleSheet("color: #FFFFFF;")
+        band_layout.addWidget(self.band_check)
+        band_layout.addWidget(self.band_from, 1)
+        band_layout.addWidget(self.band_to, 1)
+        band_layout.addWidget(bins_label)
+        band_layout.addWidget(self.band_bins)
+        band_layout.addWidget(self.peak_label, 2)
+        layout.addLayout(band_layout)
+        # Результаты появляются после refresh (в фоне, если передан JobManager)
+        self.demodulated_signal, self.instantaneous_phase = np.array([]), np.array([])
+        # Кривые с уровнем детализации (interf_lod) для каждого графика
+        self.curves_original, self.curves_spectrum, self.curves_phase = [], [], []
 
         # --- Блок "Original Signal" с кликабельным заголовком ---
         self.label_original = ClickableLabel("Original Signal")
@@ -227,8 +488,6 @@ class DemodulationWidget(QWidget):
         layout.addWidget(self.label_original)
         self.plot_original = pg.PlotWidget()
         self.plot_original.setBackground('k')
-        if self.signal.size:
-            self.plot_original.plot(self.signal, pen=pg.mkPen('#00FF00', width=2))
         self.plot_original.setLabel('left', 'Amplitude')
         self.plot_original.setLabel('bottom', 'Sample Index')
         self.plot_original.showGrid(x=True, y=True)
@@ -251,7 +510,6 @@ class DemodulationWidget(QWidget):
         layout.addWidget(self.label_phase)
         self.plot_phase = pg.PlotWidget()
         self.plot_phase.setBackground('k')
-        self.plot_phase.plot(self.time, self.instantaneous_phase, pen=pg.mkPen('#00FFFF', width=2))
         self.plot_phase.setLabel('left', 'Phase (radians)')
         self.plot_phase.setLabel('bottom', 'Time (s)')
         self.plot_phase.showGrid(x=True, y=True)
@@ -263,30 +521,86 @@ class DemodulationWidget(QWidget):
         self.btn_zoom = QPushButton("Zoom")
         self.btn_pan = QPushButton("Pan")
         self.btn_export_plots = QPushButton("Export All Plots")
+        self.btn_export_data = QPushButton("Export Data")
         demod_tb_layout.addWidget(self.btn_zoom)
         demod_tb_layout.addWidget(self.btn_pan)
         demod_tb_layout.addWidget(self.btn_export_plots)
+        demod_tb_layout.addWidget(self.btn_export_data)
         layout.addWidget(self.demod_toolbar)
         self.btn_zoom.clicked.connect(lambda: self.plot_spectrum.getViewBox().setMouseMode(3))
         self.btn_pan.clicked.connect(lambda: self.plot_spectrum.getViewBox().setMouseMode(1))
         self.btn_export_plots.clicked.connect(self.export_all_plots)
-        self.update_spectrum()
-    def update_spectrum(self):
+        self.btn_export_data.clicked.connect(self.export_data)
+        self.refresh()
+    def zero_padding(self):
         try:
-            n_zeros = int(self.zero_input.text())
+            return max(0, int(self.zero_input.text()))
         except ValueError:
-            n_zeros = 0
-        if self.demodulated_signal.size == 0:
-            self.plot_spectrum.clear()
-            return
-        padded_signal = np.pad(self.demodulated_signal, (0, n_zeros), 'constant')
-        N = len(padded_signal)
-        T = 1.0 / self.sampling_rate
-        yf = fft(padded_signal)
-        xf = fftfreq(N, T)[:N // 2]
-        amplitude = 2.0 / N * np.abs(yf[:N // 2])
-        self.plot_spectrum.clear()
-        self.plot_spectrum.plot(xf, amplitude, pen=pg.mkPen('#00FFFF', width=2))
+            return 0
+    def spectrum_settings(self):
+        # (число нулей, окно, округление длины FFT) — часть ключа кэша спектров
+        return self.zero_padding(), self.window_selector.currentText(), self.fast_len_check.isChecked()
+    def band_settings(self):
+        # None — спектр всей полосы; иначе (от, до, число частот) в Гц. Пустая граница берётся
+        # из видимого участка графика спектра
+        if not self.band_check.isChecked():
+            return None
+        nyquist = self.pipeline.value("sampling_rate") / 2.0 if self.source is not None else self.sampling_rate / 2.0
+        view_lo, view_hi = self.plot_spectrum.getViewBox().viewRange()[0]
+        try:
+            lo = float(self.band_from.text()) if self.band_from.text().strip() else max(0.0, view_lo)
+            hi = float(self.band_to.text()) if self.band_to.text().strip() else min(nyquist, view_hi)
+        except ValueError:
+            raise ValueError("Band limits must be numbers")
+        if not 0.0 <= lo < hi <= nyquist:
+            raise ValueError(f"Band must lie within 0..{nyquist:g} Hz")
+        self.band_from.setText(f"{lo:g}")
+        self.band_to.setText(f"{hi:g}")
+        return lo, hi, self.band_bins.value()
+    def spectrum_node(self):
+        return "spectrum" if self.pipeline.value("band") is None else "band_spectrum"
+    def update_spectrum(self):
+        with span("update_spectrum"):
+            settings = self.spectrum_settings()
+            try:
+                band = self.band_settings()
+            except ValueError as e:
+                self.processing_error(e)
+                return
+            self.pipeline.set(spectrum_settings=settings, band=band)
+            if self.demodulated_signal.size == 0:
+                clear_lod(self.plot_spectrum, self.curves_spectrum)
+                return
+            if self.source is None:
+                # Результат потока не входит в граф обработки
+                demodulated_signal, sampling_rate = self.demodulated_signal, self.sampling_rate
+                if band is None:
+                    compute = lambda: spectrum_service.spectrum(demodulated_signal, sampling_rate, *settings)
+                else:
+                    compute = lambda: spectrum_service.band(demodulated_signal, sampling_rate, *band,
+                                                            window=settings[1])
+            else:
+                pipeline, node = self.pipeline, self.spectrum_node()
+                compute = lambda: pipeline.evaluate([node])[node]
+            if self.jobs is None:
+                self.show_spectrum(*compute())
+                return
+            self.jobs.submit("spectrum", lambda job: compute(), on_result=lambda spectrum: self.show_spectrum(*spectrum),
+                             on_error=self.processing_error)
+    def show_spectrum(self, xf, amplitude):
+        import pyqtgraph as pg
+        with span("plot.spectrum", category="plot"):
+            self.spectrum = (xf, amplitude)
+            # Частота модуляции: максимум спектра с уточнением между отсчётами (без нулевой частоты)
+            peak = peak_frequency(xf, amplitude, skip_dc=self.pipeline.value("band") is None)
+            self.peak_label.setText(f"Peak: {peak[0]:.8g} Hz, amplitude {peak[1]:.4g}" if peak else "")
+            curve = self.curves_spectrum[0] if len(self.curves_spectrum) == 1 else None
+            if curve is not None and curve.pyramid.y is amplitude and len(xf) > 1:
+                # Те же амплитуды при другой частоте дискретизации: меняется только шаг оси
+                curve.set_axis(xf[0], xf[1] - xf[0])
+                return
+            clear_lod(self.plot_spectrum, self.curves_spectrum)
+            self.curves_spectrum.append(plot_lod(self.plot_spectrum, amplitude, xf, pen=pg.mkPen('#00FFFF', width=2)))
     def export_all_plots(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder to Save Plots")
         if not folder:
@@ -294,57 +608,223 @@ class DemodulationWidget(QWidget):
         base_name, ok = QInputDialog.getText(self, "File Base Name", "Enter base name for plots:")
         if not ok or not base_name:
             return
-        import pyqtgraph.exporters as exporters
+        extension, ok = QInputDialog.getItem(self, "Plot Format", "Format:", ["png", "svg"], 0, False)
+        if not ok:
+            return
         plots = {
             "original": self.plot_original,
             "spectrum": self.plot_spectrum,
             "phase": self.plot_phase
         }
-        for key, plot in plots.items():
-            exporter = exporters.ImageExporter(plot.plotItem)
-            exporter.parameters()['width'] = 1920
-            file_name = os.path.join(folder, f"{base_name}_{key}.png")
-            exporter.export(file_name)
+        # Графики рисуются в процессах interf_export; GUI только снимает текущие данные кривых
+        jobs = [(spec_from_plot(plot), os.path.join(folder, f"{base_name}_{key}.{extension}"))
+                for key, plot in plots.items()]
+        parent = self.window()
+        def on_result(paths):
+            if parent is not None and hasattr(parent, 'statusBar'):
+                parent.statusBar().showMessage(f"Plots exported successfully ({len(paths)} files)")
+        wait_for_files(self.jobs, "export_plots", render_figures(jobs), on_result, self.export_error)
+    def export_data(self):
+        # Огибающая, фаза и спектр текущего сигнала в сжатый контейнер (NPZ/HDF5/Parquet)
+        if self.signal is None or len(self.signal) == 0:
+            return
+        formats = data_formats()
+        file_name, selected = QFileDialog.getSaveFileName(
+            self, "Export Data", "", ";;".join(label for label, _ in formats)
+        )
+        if not file_name:
+            return
+        if not os.path.splitext(file_name)[1]:
+            file_name += dict(formats).get(selected, ".npz")
+        signal, envelope, phase, spectrum = (self.signal, self.demodulated_signal, self.instantaneous_phase,
+                                             self.spectrum or (None, None))
+        time, sampling_rate = self.time, self.sampling_rate
+        attrs = {"sampling_rate": sampling_rate, "n_zeros": self.zero_padding(),
+                 "window": self.window_selector.currentText()}
+        if self.pipeline.value("band") is not None:
+            attrs["band"] = list(self.pipeline.value("band"))
+        def export():
+            # Ось времени результатов графа строится только для экспорта
+            arrays = demodulation_arrays(signal, envelope, phase,
+                                         time if time is not None else time_axis(len(signal), sampling_rate),
+                                         *spectrum)
+            return export_arrays(file_name, arrays, attrs)
+        parent = self.window()
+        def on_result(paths):
+            if parent is not None and hasattr(parent, 'statusBar'):
+                parent.statusBar().showMessage(f"Data exported: {', '.join(paths)}")
+        run_export(self.jobs, "export_data", export, on_result, self.export_error)
+    def export_error(self, error):
+        parent = self.window()
+        if parent is not None and hasattr(parent, 'statusBar'):
+            parent.statusBar().showMessage(f"Export Error: {error}")
+    def processing_error(self, error):
         parent = self.window()
         if parent is not None and hasattr(parent, 'statusBar'):
-            parent.statusBar().showMessage("Plots exported successfully")
+            parent.statusBar().showMessage(f"Processing Error: {error}")
     def open_original_tab(self):
-        # При клике открывается новая вкладка с оригинальным сигналом (с выбором sampling frequency)
-        freq, ok = QInputDialog.getDouble(self, "Sampling Frequency",
-                                            "Enter sampling frequency (Hz):",
-                                            value=self.sampling_rate, min=0.1, max=100000.0)
-        if ok:
-            self.window().openOriginalSignalTab(self.signal, freq)
+        # При клике открывается новая вкладка с оригинальным сигналом (частота дискретизации — из графа)
+        self.window().openOriginalSignalTab(self.signal, self.sampling_rate, source=self.source)
     def open_spectrum_tab(self):
-        freq, ok = QInputDialog.getDouble(self, "Sampling Frequency",
-                                            "Enter sampling frequency (Hz):",
-                                            value=self.sampling_rate, min=0.1, max=100000.0)
-        if ok:
-            self.window().openSpectrumTab(self.demodulated_signal, freq)
+        self.window().openSpectrumTab(self.demodulated_signal, self.sampling_rate, source=self.source,
+                                      signal=self.signal, band=self.pipeline.value("band"),
+                                      window=self.window_selector.currentText())
     def open_phase_tab(self):
-        self.window().openPhaseTab(self.time, self.instantaneous_phase)
-    def update_signal(self, signal, sampling_rate):
-        # Метод для обновления данных в виджете Demodulation
-        self.signal = signal
+        self.window().openPhaseTab(self.time, self.instantaneous_phase, source=self.source, signal=self.signal,
+                                   sampling_rate=self.sampling_rate)
+    def refresh(self, on_done=None, on_error=None):
+        # Показ текущего состояния графа: пересчитываются только узлы после изменённых параметров.
+        # on_done(значения узлов) вызывается после обновления графиков, on_error(ошибка) — после
+        # сообщения об ошибке расчёта
+        with span("refresh"):
+            if self.stream is not None:
+                self.stop_stream()
+            names = ["filtered", "channel", "filter", "sampling_rate", "signal", "demodulation", self.spectrum_node()]
+            def show(values):
+                self.show_pipeline(values)
+                if on_done is not None:
+                    on_done(values)
+            def failed(error):
+                self.processing_error(error)
+                if on_error is not None:
+                    on_error(error)
+            if self.jobs is None:
+                try:
+                    values = self.pipeline.evaluate(names)
+                except Exception as e:
+                    failed(e)
+                    return
+                show(values)
+                return
+            # Спектр, посчитанный для прежнего сигнала, больше не нужен
+            self.jobs.cancel("spectrum")
+            pipeline = self.pipeline
+            self.jobs.submit("demod", lambda job: pipeline.evaluate(names, job.progress), on_result=show,
+                             on_error=failed)
+    def show_pipeline(self, values):
+        recording = values["filtered"]
+        self.source = (recording, values["channel"], values["filter"]) if recording is not None else None
+        self.set_results(values["signal"], values["sampling_rate"], *values["demodulation"])
+        if self.demodulated_signal.size:
+            self.show_spectrum(*values["band_spectrum" if "band_spectrum" in values else "spectrum"])
+        else:
+            clear_lod(self.plot_spectrum, self.curves_spectrum)
+            self.peak_label.setText("")
+    def set_sampling_rate(self, sampling_rate):
+        # Оси фазы и спектра масштабируются; огибающая, фаза и амплитуды спектра остаются из графа
+        self.pipeline.set(sampling_rate=sampling_rate)
+        if self.source is None:
+            return
         self.sampling_rate = sampling_rate
-        analytic_signal = hilbert(self.signal)
-        self.demodulated_signal = np.abs(analytic_signal)
-        self.instantaneous_phase = np.unwrap(np.angle(analytic_signal))
-        self.time = np.arange(len(self.signal)) / self.sampling_rate
+        for curve in self.curves_phase:
+            curve.set_axis(0.0, 1.0 / sampling_rate)
+        self.update_spectrum()
+    def set_results(self, signal, sampling_rate, demodulated_signal, instantaneous_phase, time=None):
+        # time=None — ось фазы задаётся шагом 1 / частота дискретизации, без отдельного массива
+        import pyqtgraph as pg
+        with span("plot.demodulation", category="plot"):
+            self.signal = signal
+            self.sampling_rate = sampling_rate
+            self.demodulated_signal = demodulated_signal
+            self.instantaneous_phase = instantaneous_phase
+            self.time = time
+            self.detach_peaks()
+            clear_lod(self.plot_original, self.curves_original)
+            if self.signal.size:
+                self.curves_original.append(plot_lod(self.plot_original, self.signal, pen=pg.mkPen('#00FF00', width=2)))
+            # Отметки пиков сохраняются, только если они найдены для этого же сигнала
+            if self.peak_signal is signal:
+                self.attach_peaks()
+            else:
+                self.hide_peaks()
+            clear_lod(self.plot_phase, self.curves_phase)
+            dx = 1.0 / sampling_rate if time is None else None
+            self.curves_phase.append(plot_lod(self.plot_phase, self.instantaneous_phase, time,
+                                              pen=pg.mkPen('#00FFFF', width=2), dx=dx))
+    # ----- Отметки пиков на графике исходного сигнала -----
+    def show_peaks(self, signal, result):
+        self.hide_peaks()
+        self.peak_signal = signal
+        self.peak_result = result
+        # Если демодуляция этого сигнала ещё идёт, отметки появятся в set_results
+        if signal is self.signal and self.stream is None:
+            self.attach_peaks()
+    def attach_peaks(self):
+        self.detach_peaks()
+        self.peak_overlay = PeakOverlay(self.plot_original, self.peak_result.peaks, self.peak_result.heights)
+    def detach_peaks(self):
+        if self.peak_overlay is not None:
+            self.peak_overlay.detach()
+            self.peak_overlay = None
+    def hide_peaks(self):
+        self.detach_peaks()
+        self.peak_signal = None
+        self.peak_result = None
+    # ----- Потоковый режим -----
+    STREAM_FPS = 30
+    STREAM_WINDOW_SECONDS = 5.0
+    def start_stream(self, pipeline):
+        # Графики обновляются с фиксированной частотой кадров последними результатами конвейера
+        import pyqtgraph as pg
+        if self.stream is not None:
+            self.stop_stream()
+        if self.jobs is not None:
+            self.jobs.cancel("demod")
+            self.jobs.cancel("spectrum")
+        self.stream = pipeline
+        self.sampling_rate = pipeline.sampling_rate
+        self.source = None
+        self.hide_peaks()
+        clear_lod(self.plot_original, self.curves_original)
+        clear_lod(self.plot_phase, self.curves_phase)
+        clear_lod(self.plot_spectrum, self.curves_spectrum)
+        self.stream_curve_original = self.plot_original.plot(pen=pg.mkPen('#00FF00', width=1))
+        self.stream_curve_phase = self.plot_phase.plot(pen=pg.mkPen('#00FFFF', width=1))
+        self.plot_original.setLabel('bottom', 'Time (s)')
+        pipeline.start()
+        self.stream_timer.start(int(1000 / self.STREAM_FPS))
+        self.streamStateChanged.emit(True)
+    def refresh_stream(self):
+        n = int(self.STREAM_WINDOW_SECONDS * self.stream.sampling_rate)
+        t, raw, _, phase = self.stream.view(n)
+        self.stream_curve_original.setData(t, raw)
+        self.stream_curve_phase.setData(t, phase)
+        stats = self.stream.stats()
+        parent = self.window()
+        if parent is not None and hasattr(parent, 'statusBar'):
+            parent.statusBar().showMessage(
+                f"Streaming: {stats['throughput']:.0f} samples/s, "
+                f"latency {stats['latency_mean_ms']:.2f} ms (max {stats['latency_max_ms']:.2f} ms), "
+                f"dropped {stats['dropped']}"
+            )
+    def stop_stream(self):
+        if self.stream is None:
+            return
+        self.stream_timer.stop()
+        self.stream.stop()
+        n = int(self.STREAM_WINDOW_SECONDS * self.stream.sampling_rate)
+        t, raw, envelope, phase = self.stream.view(n)
+        self.stream = None
         self.plot_original.clear()
-        self.plot_original.plot(self.signal, pen=pg.mkPen('#00FF00', width=2))
         self.plot_phase.clear()
-        self.plot_phase.plot(self.time, self.instantaneous_phase, pen=pg.mkPen('#00FFFF', width=2))
+        self.plot_original.setLabel('bottom', 'Sample Index')
+        # Последнее окно потока остаётся в виджете как обычный результат демодуляции
+        self.set_results(raw, self.sampling_rate, envelope, phase, t)
         self.update_spectrum()
+        self.streamStateChanged.emit(False)
+    def is_streaming(self):
+        return self.stream is not None
 
 # ----- Виджет для FFT анализа (без изменений) -----
 class FFTAnalysisWidget(QWidget):
-    def __init__(self, signal, sample_rate, parent=None):
+    def __init__(self, signal, sample_rate, parent=None, spectrum=None):
         super().__init__(parent)
         self.signal = signal
         self.sample_rate = sample_rate
+        self.spectrum = spectrum
         self.init_ui()
     def init_ui(self):
+        import pyqtgraph as pg
         layout = QVBoxLayout(self)
         self.fft_plot = pg.PlotWidget(title="FFT Analysis")
         self.fft_plot.setBackground('k')
@@ -366,11 +846,11 @@ class FFTAnalysisWidget(QWidget):
         self.btn_export_plot.clicked.connect(self.export_plot)
         self.perform_fft()
     def perform_fft(self):
-        N = len(self.signal)
-        T = 1.0 / self.sample_rate
-        yf = fft(self.signal)
-        xf = fftfreq(N, T)[:N // 2]
-        self.fft_plot.plot(xf, 2.0 / N * np.abs(yf[:N // 2]), pen=pg.mkPen('#00FFFF', width=2), name='FFT')
+        import pyqtgraph as pg
+        if self.spectrum is None:
+            self.spectrum = spectrum_service.spectrum(self.signal, self.sample_rate)
+        xf, amplitude = self.spectrum
+        self.curve = plot_lod(self.fft_plot, amplitude, xf, pen=pg.mkPen('#00FFFF', width=2))
     def export_plot(self):
         dialog = ExportTypeDialog(self)
         if dialog.exec_() == QDialog.Accepted:
@@ -401,6 +881,238 @@ class FFTAnalysisWidget(QWidget):
         exporter = exporters.SVGExporter(self.fft_plot.plotItem)
         exporter.export(file_name)
 
+# ----- Виджет спектрограммы (STFT) и СПМ по Уэлчу -----
+# Изображение разбито на плитки по TILE_COLUMNS столбцов; при изменении области
+# просмотра данные загружаются и показываются только в видимых плитках.
+class SpectrogramWidget(QWidget):
+    TILE_COLUMNS = 256
+    def __init__(self, signal, sampling_rate, jobs=None, parent=None):
+        super().__init__(parent)
+        self.signal = signal
+        self.sampling_rate = sampling_rate
+        self.jobs = jobs
+        self.tiles = []
+        self.levels = None
+        self.init_ui()
+    def init_ui(self):
+        import pyqtgraph as pg
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.segment_input = QLineEdit("4096")
+        self.overlap_input = QLineEdit("50")
+        self.window_selector = QComboBox()
+        self.window_selector.addItems(list(WINDOWS))
+        self.window_selector.setCurrentText("Hann")
+        self.btn_compute = QPushButton("Compute")
+        self.btn_compute.clicked.connect(self.compute)
+        controls.addWidget(QLabel("Segment length:"))
+        controls.addWidget(self.segment_input)
+        controls.addWidget(QLabel("Overlap (%):"))
+        controls.addWidget(self.overlap_input)
+        controls.addWidget(self.window_selector)
+        controls.addWidget(self.btn_compute)
+        layout.addLayout(controls)
+        self.image_plot = pg.PlotWidget(title="Spectrogram")
+        self.image_plot.setBackground('k')
+        self.image_plot.setLabel('left', 'Frequency (Hz)')
+        self.image_plot.setLabel('bottom', 'Time (s)')
+        self.image_plot.getViewBox().sigRangeChanged.connect(self.update_tiles)
+        layout.addWidget(self.image_plot, 2)
+        self.psd_plot = pg.PlotWidget(title="Welch PSD")
+        self.psd_plot.setBackground('k')
+        self.psd_plot.setLabel('left', 'PSD (units²/Hz)')
+        self.psd_plot.setLabel('bottom', 'Frequency (Hz)')
+        self.psd_plot.setLogMode(y=True)
+        self.psd_plot.showGrid(x=True, y=True)
+        layout.addWidget(self.psd_plot, 1)
+        self.compute()
+    def compute(self):
+        try:
+            nperseg = int(self.segment_input.text())
+            overlap = float(self.overlap_input.text()) / 100.0
+        except ValueError:
+            return
+        overlap = min(max(overlap, 0.0), 0.95)
+        window = WINDOWS[self.window_selector.currentText()]
+        signal, sampling_rate = self.signal, self.sampling_rate
+        def run(progress=None):
+            return spectrogram(signal, sampling_rate, nperseg=nperseg, overlap=overlap, window=window,
+                               progress=progress)
+        if self.jobs is None:
+            try:
+                result = run()
+            except ValueError as e:
+                self.compute_error(e)
+                return
+            self.show_result(result)
+        else:
+            self.jobs.submit("spectrogram", lambda job: run(job.progress), on_result=self.show_result,
+                             on_error=self.compute_error)
+    def compute_error(self, error):
+        # Например, сегмент длиннее сигнала или демодуляция ещё не выполнялась
+        parent = self.window()
+        if parent is not None and hasattr(parent, 'statusBar'):
+            parent.statusBar().showMessage(f"Spectrogram Error: {error}")
+    def show_result(self, result):
+        import pyqtgraph as pg
+        for item, _, _, _ in self.tiles:
+            self.image_plot.removeItem(item)
+        self.tiles = []
+        self.db = 10.0 * np.log10(result.power + np.finfo(float).tiny)
+        self.levels = tuple(np.percentile(self.db, [1.0, 99.5]))
+        lut = pg.colormap.get('viridis').getLookupTable()
+        n_columns = self.db.shape[1]
+        dt = result.times[1] - result.times[0] if n_columns > 1 else 2 * result.times[0]
+        df = result.freqs[1] - result.freqs[0]
+        for c0 in range(0, n_columns, self.TILE_COLUMNS):
+            c1 = min(c0 + self.TILE_COLUMNS, n_columns)
+            item = pg.ImageItem()
+            item.setLookupTable(lut)
+            item.setVisible(False)
+            self.image_plot.addItem(item)
+            rect = QRectF(result.times[c0] - dt / 2, -df / 2, (c1 - c0) * dt, len(result.freqs) * df)
+            self.tiles.append([item, c0, c1, rect])
+        self.psd_plot.clear()
+        self.psd_plot.plot(result.freqs[1:], result.psd[1:], pen=pg.mkPen('#00FFFF', width=2))
+        self.image_plot.setXRange(result.times[0] - dt / 2, result.times[-1] + dt / 2)
+        self.image_plot.setYRange(0, result.freqs[-1])
+        self.update_tiles()
+    def update_tiles(self, *args):
+        if not self.tiles:
+            return
+        x0, x1 = self.image_plot.getViewBox().viewRange()[0]
+        for tile in self.tiles:
+            item, c0, c1, rect = tile
+            visible = bool(rect.right() >= x0 and rect.left() <= x1)
+            if visible and item.image is None:
+                item.setImage(self.db[:, c0:c1].T, levels=self.levels, autoLevels=False)
+                item.setRect(rect)
+            item.setVisible(visible)
+
+# ----- Панель последних операций (интервалы interf_trace) -----
+class TracePanel(QWidget):
+    ROWS = 50
+    REFRESH_MS = 250
+    COLUMNS = ["Operation", "Thread", "Duration (ms)", "Peak Δ (MB)", "Peak RSS (MB)"]
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+        self._shown = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+    def showEvent(self, event):
+        self.timer.start(self.REFRESH_MS)
+        self.refresh()
+        super().showEvent(event)
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+    def refresh(self):
+        events = tracer.recent(self.ROWS)
+        # Таблица перестраивается, только если появились новые интервалы
+        marker = (len(events), events[-1]["ts"] if events else None)
+        if marker == self._shown:
+            return
+        self._shown = marker
+        self.table.setRowCount(len(events))
+        for row, event in enumerate(reversed(events)):
+            args = event["args"]
+            cells = [event["name"], tracer.thread_name(event["tid"]), f"{event['dur'] / 1000:.2f}",
+                     f"{args['peak_delta_mb']:.1f}" if "peak_delta_mb" in args else "",
+                     f"{args['peak_rss_mb']:.0f}" if "peak_rss_mb" in args else ""]
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+# ----- Счёт интерференционных полос: частота полос и накопленное число -----
+class FringeWidget(QWidget):
+    def __init__(self, result, parent=None):
+        super().__init__(parent)
+        self.result = result
+        self.init_ui()
+    def init_ui(self):
+        import pyqtgraph as pg
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Fringes: {self.result.count}    "
+                                f"Mean rate: {self.result.mean_rate:.6g} Hz"))
+        self.plot_rate = pg.PlotWidget(title="Fringe Rate")
+        self.plot_rate.setBackground('k')
+        self.plot_rate.setLabel('left', 'Rate', units='Hz')
+        self.plot_rate.setLabel('bottom', 'Time (s)')
+        self.plot_rate.showGrid(x=True, y=True)
+        layout.addWidget(self.plot_rate)
+        times, rate = self.result.rate()
+        self.curve_rate = plot_lod(self.plot_rate, rate, times, pen=pg.mkPen('#FFB000', width=2))
+        self.plot_count = pg.PlotWidget(title="Fringe Count")
+        self.plot_count.setBackground('k')
+        self.plot_count.setLabel('left', 'Fringes')
+        self.plot_count.setLabel('bottom', 'Time (s)')
+        self.plot_count.showGrid(x=True, y=True)
+        layout.addWidget(self.plot_count)
+        self.curve_count = plot_lod(self.plot_count, self.result.cumulative(times), times,
+                                    pen=pg.mkPen('#FF00FF', width=2))
+
+# Цвета каналов на графиках OPD
+CHANNEL_COLORS = ['#00FF00', '#00FFFF', '#FF00FF', '#FFFF00', '#FF8000', '#0080FF', '#FF0000', '#FFFFFF']
+
+class OPDWidget(QWidget):
+    def __init__(self, result, jobs=None, parent=None):
+        super().__init__(parent)
+        self.result = result
+        self.jobs = jobs
+        self.init_ui()
+    def init_ui(self):
+        import pyqtgraph as pg
+        layout = QVBoxLayout(self)
+        self.plot_opd = pg.PlotWidget(title="Optical Path Difference")
+        self.plot_opd.setBackground('k')
+        self.plot_opd.setLabel('left', 'OPD', units='m')
+        self.plot_opd.setLabel('bottom', 'Time (s)')
+        self.plot_opd.showGrid(x=True, y=True)
+        self.plot_opd.addLegend()
+        layout.addWidget(self.plot_opd)
+        self.plot_diff = pg.PlotWidget(title="Differential OPD")
+        self.plot_diff.setBackground('k')
+        self.plot_diff.setLabel('left', 'ΔOPD', units='m')
+        self.plot_diff.setLabel('bottom', 'Time (s)')
+        self.plot_diff.showGrid(x=True, y=True)
+        self.plot_diff.addLegend()
+        layout.addWidget(self.plot_diff)
+        self.curves = []
+        for j, name in enumerate(self.result.columns):
+            curve = plot_lod(self.plot_opd, self.result.opd[:, j], self.result.time,
+                             pen=pg.mkPen(CHANNEL_COLORS[j % len(CHANNEL_COLORS)], width=1))
+            self.plot_opd.plotItem.legend.addItem(curve.item, name)
+            self.curves.append(curve)
+        for j, label in enumerate(self.result.pair_labels()):
+            curve = plot_lod(self.plot_diff, self.result.differential_opd[:, j], self.result.time,
+                             pen=pg.mkPen(CHANNEL_COLORS[j % len(CHANNEL_COLORS)], width=1))
+            self.plot_diff.plotItem.legend.addItem(curve.item, label)
+            self.curves.append(curve)
+        self.btn_export = QPushButton("Export OPD")
+        self.btn_export.clicked.connect(self.export_results)
+        layout.addWidget(self.btn_export)
+    def export_results(self):
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export OPD", "",
+            "NumPy Archive (*.npz);;CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_name:
+            return
+        result = self.result
+        parent = self.window()
+        def show_message(message):
+            if parent is not None and hasattr(parent, 'statusBar'):
+                parent.statusBar().showMessage(message)
+        run_export(self.jobs, "export_opd", lambda: export_opd(file_name, result),
+                   lambda _: show_message(f"OPD exported to {file_name}"),
+                   lambda error: show_message(f"Export Error: {error}"))
+
 # ----- Главное окно приложения -----
 class AdvancedInterferometerApp(QMainWindow):
     def __init__(self):
@@ -434,12 +1146,73 @@ class AdvancedInterferometerApp(QMainWindow):
         self.peaks_visible = False
         self.data = None
         self.current_channel = 0
-        self.processed_data = None
-        self.demod_widget = DemodulationWidget(np.array([]), 1000.0)
-        self.tab_widget.addTab(self.demod_widget, "Demodulation")
+        # Точность всей обработки (interf_precision): float64 или float32
+        self.precision = DEFAULT_PRECISION if DEFAULT_PRECISION in PRECISIONS else 'float64'
+        # Дисковый кэш разобранных записей (каталог и лимит задаются INTERF_CACHE_DIR / INTERF_CACHE_MAX_MB)
+        try:
+            self.cache = RecordingCache()
+        except OSError:
+            self.cache = None
+        # Фоновые задачи: загрузка файлов и демодуляция
+        self.jobs = JobManager(parent=self)
+        self.jobs.progress.connect(self.on_job_progress)
+        self.jobs.idle.connect(self.on_jobs_idle)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(250)
+        self.progress_bar.hide()
+        self.btn_cancel_job = QPushButton("Cancel")
+        self.btn_cancel_job.clicked.connect(self.cancel_jobs)
+        self.btn_cancel_job.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.btn_cancel_job)
+        # Огибающие и фазы всех каналов загруженной записи
+        self.analytic_store = AnalyticStore()
+        # Граф обработки: запись → фильтр → канал → огибающая/фаза → спектр/OPD (interf_graph)
+        self.pipeline = processing_graph(self.analytic_store)
+        # Вкладка Demodulation с графиками строится при первой загрузке данных или запуске потока
+        # (demodulation()), до этого на её месте подсказка — окно появляется быстрее
+        self.demod_widget = None
+        self.demod_tab = QWidget()
+        QVBoxLayout(self.demod_tab).setContentsMargins(0, 0, 0, 0)
+        self.demod_hint = QLabel("Load a data file or start a live stream")
+        self.demod_hint.setAlignment(Qt.AlignCenter)
+        self.demod_tab.layout().addWidget(self.demod_hint)
+        self.tab_widget.addTab(self.demod_tab, "Demodulation")
+        self._warmed_up = not WARMUP_ENABLED
+        # Вкладки анализа закрываются; у Demodulation кнопки закрытия нет
+        self.tab_widget.setTabsClosable(True)
+        self.tab_widget.tabBar().setTabButton(0, QTabBar.RightSide, None)
+        self.tab_widget.tabCloseRequested.connect(self.close_tab)
+        # Вкладки анализа без дубликатов и с бюджетом памяти (INTERF_TABS_MAX_MB)
+        self.tabs = TabManager(self.tab_widget, jobs=self.jobs, pinned=self.pinned_data, parent=self)
         self.init_data_controls()
         self.init_processing_controls()
         self.init_analysis_tools()
+        self.init_diagnostics_controls()
+    def demodulation(self):
+        if self.demod_widget is None:
+            with span("build_demodulation", "ui"):
+                self.demod_widget = DemodulationWidget(np.array([]), self.sampling_rate(), jobs=self.jobs,
+                                                       store=self.analytic_store, pipeline=self.pipeline)
+                self.demod_widget.streamStateChanged.connect(self.on_stream_state)
+                self.demod_hint.hide()
+                self.demod_tab.layout().addWidget(self.demod_widget)
+        return self.demod_widget
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._warmed_up:
+            # Прогрев после первой отрисовки окна: импорт scipy/pandas в фоне (interf_startup)
+            self._warmed_up = True
+            QTimer.singleShot(0, self.warm_up)
+    def warm_up(self):
+        self.jobs.submit("warmup", lambda job: warm_up(), on_result=self.warm_up_finished,
+                         on_error=self.warm_up_error)
+    def warm_up_finished(self, modules):
+        # pyqtgraph импортируется в GUI-потоке, когда фоновый импорт закончен
+        importlib.import_module("pyqtgraph")
+    def warm_up_error(self, error):
+        # Сломанная установка scipy/numba/pyqtgraph видна сразу, а не при первом расчёте
+        self.statusBar().showMessage(f"Warm-up Error: {error}")
     def init_data_controls(self):
         group = QGroupBox("Data Management")
         layout = QVBoxLayout(group)
@@ -452,6 +1225,22 @@ class AdvancedInterferometerApp(QMainWindow):
         layout.addWidget(self.btn_load_data)
         layout.addWidget(QLabel("Select Channel:"))
         layout.addWidget(self.channel_selector)
+        self.precision_selector = QComboBox()
+        self.precision_selector.addItems(list(PRECISIONS))
+        self.precision_selector.setCurrentText(self.precision)
+        self.precision_selector.setToolTip("float32 halves the memory of parsing, demodulation, spectra and OPD")
+        self.precision_selector.currentTextChanged.connect(self.set_precision)
+        layout.addWidget(QLabel("Precision:"))
+        layout.addWidget(self.precision_selector)
+        # Частота дискретизации для осей времени и частоты: её смена не пересчитывает демодуляцию
+        self.rate_input = QDoubleSpinBox()
+        self.rate_input.setRange(0.001, 1e9)
+        self.rate_input.setDecimals(3)
+        self.rate_input.setValue(self.pipeline.value("sampling_rate"))
+        self.rate_input.setKeyboardTracking(False)
+        self.rate_input.valueChanged.connect(self.set_sampling_rate)
+        layout.addWidget(QLabel("Sampling Rate (Hz):"))
+        layout.addWidget(self.rate_input)
         self.data_info = QLabel("No data loaded")
         self.data_info.setAlignment(Qt.AlignCenter)
         self.data_info.setStyleSheet("color: #AAAAAA;")
@@ -464,16 +1253,20 @@ class AdvancedInterferometerApp(QMainWindow):
         group = QGroupBox("Signal Processing")
         layout = QVBoxLayout(group)
         self.filter_type = QComboBox()
-        self.filter_type.addItems(['Moving Average', 'Gaussian', 'Savitzky-Golay'])
+        self.filter_type.addItems(FILTER_TYPES)
         self.filter_param = QLineEdit('5')
         self.filter_param.setPlaceholderText('Window size')
+        self.filter_type.currentTextChanged.connect(self.update_filter_hint)
         self.btn_process = QPushButton("Apply Filter")
         self.btn_process.clicked.connect(self.apply_filter)
+        self.btn_reset_filter = QPushButton("Reset Filter")
+        self.btn_reset_filter.clicked.connect(self.reset_filter)
         layout.addWidget(QLabel("Filter Type:"))
         layout.addWidget(self.filter_type)
         layout.addWidget(QLabel("Filter Parameters:"))
         layout.addWidget(self.filter_param)
         layout.addWidget(self.btn_process)
+        layout.addWidget(self.btn_reset_filter)
         self.left_layout.addWidget(group)
     def init_analysis_tools(self):
         group = QGroupBox("Analysis Tools")
@@ -484,99 +1277,277 @@ class AdvancedInterferometerApp(QMainWindow):
         self.btn_peaks.clicked.connect(self.find_peaks)
         self.btn_demod = QPushButton("Demodulation")
         self.btn_demod.clicked.connect(self.open_demodulation_widget)
+        self.btn_opd = QPushButton("OPD (All Channels)")
+        self.btn_opd.clicked.connect(self.opd_analysis)
+        self.btn_spectrogram = QPushButton("Spectrogram")
+        self.btn_spectrogram.clicked.connect(self.spectrogram_analysis)
+        self.btn_stream = QPushButton("Start Live Stream")
+        self.btn_stream.clicked.connect(self.toggle_stream)
+        self.btn_export = QPushButton("Export Plot")
+        self.btn_export.clicked.connect(self.export_plot)
+        self.btn_export_data = QPushButton("Export Data")
+        self.btn_export_data.clicked.connect(self.export_data)
         layout.addWidget(self.btn_fft)
         layout.addWidget(self.btn_peaks)
         layout.addWidget(self.btn_demod)
+        layout.addWidget(self.btn_spectrogram)
+        layout.addWidget(self.btn_opd)
+        layout.addWidget(self.btn_stream)
+        layout.addWidget(self.btn_export)
+        layout.addWidget(self.btn_export_data)
         self.left_layout.addWidget(group)
     def open_file(self, file_path):
-        try:
+        # Разбор файла идёт в рабочем потоке; задачи для прежнего файла отменяются
+        with span("open_file"):
             self.statusBar().showMessage("Loading data...")
-            QApplication.processEvents()
-            if file_path.lower().endswith('.csv'):
-                self.data = pd.read_csv(file_path)
-            elif file_path.lower().endswith('.xlsx'):
-                self.data = pd.read_excel(file_path)
-            elif file_path.lower().endswith('.txt'):
-                try:
-                    self.data = pd.read_csv(file_path, delim_whitespace=True, header=None)
-                except Exception:
-                    arr = np.loadtxt(file_path)
-                    self.data = pd.DataFrame(arr)
-            else:
-                self.data = pd.read_csv(file_path)
-            if self.data.empty:
-                raise ValueError("File is empty")
-            if not np.issubdtype(self.data.iloc[:, 0].dtype, np.number):
-                raise ValueError("Non-numeric data detected")
-            self.update_interface()
-            self.statusBar().showMessage(f"Loaded: {os.path.basename(file_path)}")
-        except Exception as e:
-            self.statusBar().showMessage(f"Error: {str(e)}")
-            self.data = None
-            self.processed_data = None
-            self.update_interface()
+            self.jobs.cancel()
+            dtype = real_dtype(self.precision)
+            self.jobs.submit(
+                "load",
+                lambda job: load_recording(file_path, cache=self.cache, progress=job.progress, dtype=dtype),
+                on_result=lambda data: self.on_file_loaded(file_path, data),
+                on_error=self.on_load_error
+            )
+    def set_precision(self, precision):
+        # Смена точности перечитывает файл: каналы разбираются сразу в нужный тип
+        self.precision = precision
+        if self.data is not None and self.data.source:
+            self.open_file(self.data.source)
+    def on_file_loaded(self, file_path, data):
+        # Вкладки прежней записи (и её отфильтрованных вариантов) держат её в памяти
+        self.tabs.close_where(lambda sources: any(isinstance(s, Recording) and s is not data for s in sources))
+        self.data = data
+        self.pipeline.set(recording=data, filter=(), channel=0)
+        if data.sampling_rate is not None:
+            # Частота дискретизации из файла (описание двоичной записи) — до пересчёта графа
+            self.pipeline.set(sampling_rate=float(data.sampling_rate))
+            self.rate_input.blockSignals(True)
+            self.rate_input.setValue(data.sampling_rate)
+            self.rate_input.blockSignals(False)
+        self.update_interface()
+        self.statusBar().showMessage(f"Loaded: {os.path.basename(file_path)}")
+    def on_load_error(self, error):
+        self.statusBar().showMessage(f"Error: {error}")
+        self.data = None
+        self.pipeline.set(recording=None, filter=())
+        self.update_interface()
+    def on_job_progress(self, job_id, percent, message):
+        self.progress_bar.setFormat(f"{message} %p%" if message else "%p%")
+        self.progress_bar.setValue(percent)
+        self.progress_bar.show()
+        self.btn_cancel_job.show()
+    def on_jobs_idle(self):
+        self.progress_bar.hide()
+        self.btn_cancel_job.hide()
+    def cancel_jobs(self):
+        if self.jobs.is_busy():
+            self.jobs.cancel()
+            self.statusBar().showMessage("Operation cancelled")
     def load_data(self):
         file_name, _ = QFileDialog.getOpenFileName(
             self, "Open Data File", "",
-            "Text Files (*.txt);;CSV Files (*.csv);;Excel Files (*.xlsx);;All Files (*)"
+            "Text Files (*.txt);;CSV Files (*.csv);;Excel Files (*.xlsx);;Binary Files (*.bin *.dat);;All Files (*)"
         )
         if file_name:
             self.open_file(file_name)
     def load_data_dropped(self, file_path):
         self.open_file(file_path)
     def update_interface(self):
-        self.channel_selector.clear()
-        self.channel_selector.addItems(self.data.columns.astype(str))
-        self.data_info.setText(
-            f"Channels: {len(self.data.columns)}\n"
-            f"Samples: {len(self.data)}\n"
-            f"Type: {self.data.iloc[:, 0].dtype}"
+        # Сигналы селектора блокируются, чтобы не запускать лишние демодуляции
+        with span("update_interface"):
+            self.channel_selector.blockSignals(True)
+            self.channel_selector.clear()
+            if self.data is None:
+                self.channel_selector.blockSignals(False)
+                self.data_info.setText("No data loaded")
+                return
+            self.channel_selector.addItems(self.data.columns)
+            self.channel_selector.blockSignals(False)
+            self.current_channel = 0
+            self.data_info.setText(
+                f"Channels: {self.data.n_channels}\n"
+                f"Samples: {len(self.data)}\n"
+                f"Type: {self.data.dtype}"
+            )
+            self.reset_peaks()
+            self.demodulation().refresh()
+            self.precompute_channels()
+    def set_sampling_rate(self, sampling_rate):
+        # Пересчитываются только оси времени и частоты; пики остаются теми же отсчётами
+        if self.demod_widget is None:
+            self.pipeline.set(sampling_rate=float(sampling_rate))
+        else:
+            self.demod_widget.set_sampling_rate(sampling_rate)
+        self.statusBar().showMessage(f"Sampling rate: {sampling_rate:g} Hz")
+    def sampling_rate(self):
+        return self.pipeline.value("sampling_rate")
+    def active_data(self):
+        # Отфильтрованные каналы из графа обработки; пока фильтр считается — исходная запись
+        return self.channel_source()[0]
+    def channel_source(self):
+        # (запись, канал, настройки фильтра) — ключ в AnalyticStore
+        filtered = self.pipeline.cached("filtered")
+        if filtered is None:
+            return self.data, self.current_channel, ()
+        return filtered, self.current_channel, self.pipeline.value("filter")
+    def precompute_channels(self):
+        # Фоновый расчёт огибающей и фазы всех каналов: переключение каналов становится поиском
+        recording, _, settings = self.channel_source()
+        if recording is None or recording.n_channels < 2:
+            return
+        if needs_out_of_core(recording.channel(0)):
+            # Длинные каналы демодулируются по блокам при выборе, пакетный расчёт в памяти не нужен
+            return
+        self.jobs.submit(
+            "precompute",
+            lambda job: self.analytic_store.precompute(recording, settings, progress=job.progress)
         )
-        # Обновляем данные во вкладке Demodulation с sampling frequency 1000 Hz
-        signal = self.data.iloc[:, self.current_channel].values
-        self.demod_widget.update_signal(signal, 1000.0)
     def update_channel(self, index):
         self.current_channel = index
+        self.pipeline.set(channel=max(0, index))
         if self.data is not None:
-            signal = self.data.iloc[:, self.current_channel].values
-            self.demod_widget.update_signal(signal, 1000.0)
+            self.reset_peaks()
+            self.demodulation().refresh()
+    def update_filter_hint(self, filter_type):
+        hints = {'Gaussian': 'Window size[, sigma]', 'Savitzky-Golay': 'Window size[, polyorder]'}
+        self.filter_param.setPlaceholderText(hints.get(filter_type, 'Window size'))
     def apply_filter(self):
-        try:
-            window = int(self.filter_param.text())
-            raw = self.data.iloc[:, self.current_channel].values
-            if self.filter_type.currentText() == 'Moving Average':
-                kernel = np.ones(window) / window
-                self.processed_data = np.convolve(raw, kernel, mode='same')
-            self.statusBar().showMessage("Filter applied successfully")
-        except Exception as e:
-            self.statusBar().showMessage(f"Filter Error: {str(e)}")
+        # Фильтр применяется ко всем каналам одним вызовом (узел filtered графа); огибающая,
+        # фаза и спектр пересчитываются после него, запись заново не читается
+        with span("apply_filter"):
+            if self.data is None:
+                self.statusBar().showMessage("No data loaded")
+                return
+            filter_type = self.filter_type.currentText()
+            try:
+                params = parse_filter_params(filter_type, self.filter_param.text())
+            except ValueError as e:
+                self.statusBar().showMessage(f"Filter Error: {str(e)}")
+                return
+            previous = self.pipeline.value("filter")
+            settings = (filter_type,) + tuple(sorted(params.items()))
+            if not self.pipeline.set(filter=settings):
+                return
+            self.reset_peaks()
+            self.statusBar().showMessage("Applying filter...")
+            def on_error(error):
+                # Неудачный фильтр не остаётся в графе: на экране по-прежнему результаты прежнего
+                if self.pipeline.value("filter") == settings:
+                    self.pipeline.set(filter=previous)
+            self.demodulation().refresh(on_done=lambda values: self.on_filter_applied("Filter applied successfully"),
+                                        on_error=on_error)
+    def reset_filter(self):
+        if not self.pipeline.set(filter=()):
+            return
+        self.reset_peaks()
+        self.demodulation().refresh(on_done=lambda values: self.on_filter_applied("Filter removed"))
+    def on_filter_applied(self, message):
+        self.precompute_channels()
+        self.statusBar().showMessage(message)
     def fft_analysis(self):
         if self.data is not None:
-            sample_rate, ok = QInputDialog.getDouble(
-                self, "Sampling Rate",
-                "Enter sampling frequency (Hz):",
-                value=1000.0, min=0.1, max=100000.0
-            )
-            if ok:
-                for i in range(self.tab_widget.count()):
-                    if self.tab_widget.tabText(i) == "FFT Analysis":
-                        self.tab_widget.setCurrentIndex(i)
-                        return
-                signal = self.data.iloc[:, self.current_channel].values
-                fft_widget = FFTAnalysisWidget(signal, sample_rate)
-                self.tab_widget.addTab(fft_widget, "FFT Analysis")
-                self.tab_widget.setCurrentWidget(fft_widget)
-    def find_peaks(self):
+            # Спектр считается в фоне; для того же канала и частоты открывается прежняя вкладка
+            signal, sample_rate = self.active_data().channel(self.current_channel), self.sampling_rate()
+            self.tabs.open("FFT Analysis", self.analysis_key("fft", signal, self.channel_source(), sample_rate),
+                           load=lambda progress: spectrum_service.spectrum(signal, sample_rate),
+                           build=lambda spectrum: FFTAnalysisWidget(signal, sample_rate, spectrum=spectrum))
+    def opd_analysis(self):
+        # Фаза → OPD для всех каналов одним пакетным вызовом, разности относительно текущего канала
         if self.data is None:
             return
-        try:
-            data = self.processed_data if self.processed_data is not None else self.data.iloc[:, self.current_channel].values
-            peaks, _ = find_peaks(data, prominence=1)
-            self.peaks_visible = True
-            self.btn_peaks.setText("Hide Peaks")
-            self.statusBar().showMessage(f"Found {len(peaks)} peaks")
-        except Exception as e:
-            self.statusBar().showMessage(f"Peak Finding Error: {str(e)}")
+        wavelength, ok = QInputDialog.getDouble(self, "Wavelength", "Enter wavelength (nm):",
+                                                value=632.8, min=1.0, max=100000.0, decimals=3)
+        if not ok:
+            return
+        index, ok = QInputDialog.getDouble(self, "Refractive Index", "Enter refractive index:",
+                                           value=1.0, min=0.01, max=10.0, decimals=6)
+        if not ok:
+            return
+        self.pipeline.set(opd_config=(wavelength * 1e-9, index, self.current_channel))
+        # Вкладка пересчитывается с теми параметрами, с которыми открыта, даже если текущие уже другие
+        pinned = self.pipeline.values("recording", "filter", "opd_config", "sampling_rate")
+        recording, _, settings = self.channel_source()
+        pipeline = self.pipeline
+        self.statusBar().showMessage("Computing OPD...")
+        self.tabs.open(
+            "OPD", ("opd", recording, settings, wavelength, index, self.current_channel, pinned["sampling_rate"]),
+            load=lambda progress: pipeline.evaluate(["opd"], progress, **pinned)["opd"],
+            build=self.show_opd
+        )
+    def show_opd(self, result):
+        self.statusBar().showMessage(f"OPD computed for {len(result.columns)} channels")
+        return OPDWidget(result, jobs=self.jobs)
+    def spectrogram_analysis(self):
+        if self.data is None:
+            return
+        sources = ["Current Channel", "Demodulated Signal"]
+        source_name, ok = QInputDialog.getItem(self, "Spectrogram", "Signal:", sources, 0, False)
+        if not ok:
+            return
+        sample_rate = self.sampling_rate()
+        demod = self.demodulation()
+        if source_name == "Demodulated Signal":
+            signal = demod.demodulated_signal
+            load = demodulation_loader(demod.signal, demod.source, self.analytic_store,
+                                       (demod.demodulated_signal, demod.instantaneous_phase))
+            key = self.analysis_key("spectrogram.envelope", signal, demod.source, sample_rate)
+            envelope_of = lambda progress: load(progress)[0]
+        else:
+            signal = self.active_data().channel(self.current_channel)
+            key = self.analysis_key("spectrogram", signal, self.channel_source(), sample_rate)
+            envelope_of = lambda progress: signal
+        self.tabs.open("Spectrogram", key, load=envelope_of,
+                       build=lambda x: SpectrogramWidget(x, sample_rate, jobs=self.jobs), data=signal)
+    def find_peaks(self):
+        # Кнопка переключает отметки пиков; найденные пики сохраняются до смены сигнала
+        with span("find_peaks"):
+            if self.data is None:
+                return
+            if self.peaks_visible:
+                self.demod_widget.hide_peaks()
+                self.peaks_visible = False
+                self.btn_peaks.setText("Show Peaks")
+                return
+            signal = self.active_data().channel(self.current_channel)
+            fringes = self.pipeline.cached("fringes")
+            if fringes is not None:
+                self.show_peaks(signal, fringes)
+                return
+            # Пики ищутся в номерах отсчётов; при другой частоте дискретизации пересчитывается только время
+            self.statusBar().showMessage("Finding peaks...")
+            pipeline = self.pipeline
+            self.jobs.submit(
+                "peaks",
+                lambda job: pipeline.evaluate(["signal", "fringes"], job.progress),
+                on_result=lambda values: self.on_peaks_found(values["signal"], values["fringes"]),
+                on_error=lambda error: self.statusBar().showMessage(f"Peak Finding Error: {error}")
+            )
+    def on_peaks_found(self, signal, result):
+        if signal is not self.active_data().channel(self.current_channel):
+            return
+        self.show_peaks(signal, result)
+        pinned = self.pipeline.values("recording", "filter", "channel", "sampling_rate")
+        pipeline = self.pipeline
+        self.tabs.open("Fringes", self.analysis_key("fringes", signal, self.channel_source(), result.sampling_rate),
+                       load=lambda progress: pipeline.evaluate(["fringes"], progress, **pinned)["fringes"],
+                       build=FringeWidget, data=result, activate=False)
+        self.statusBar().showMessage(f"Found {result.count} peaks, mean fringe rate {result.mean_rate:.6g} Hz")
+    def show_peaks(self, signal, result):
+        self.demodulation().show_peaks(signal, result)
+        self.peaks_visible = True
+        self.btn_peaks.setText("Hide Peaks")
+    def reset_peaks(self):
+        # Пики относятся к прежнему сигналу: убираем их и возвращаем кнопку в исходное состояние
+        self.jobs.cancel("peaks")
+        self.peaks_visible = False
+        self.btn_peaks.setText("Find Peaks")
+        if self.demod_widget is not None:
+            self.demod_widget.hide_peaks()
+    def export_data(self):
+        if self.demod_widget is None:
+            self.statusBar().showMessage("No data loaded")
+            return
+        self.demod_widget.export_data()
     def export_plot(self):
         dialog = ExportTypeDialog(self)
         if dialog.exec_() == QDialog.Accepted:
@@ -592,7 +1563,7 @@ class AdvancedInterferometerApp(QMainWindow):
         )
         if not file_name:
             return
-        self.statusBar().showMessage(f"График сохранён в {file_name}")
+        self.export_current_plots(file_name, ".png")
     def export_vector_plot(self):
         file_name, _ = QFileDialog.getSaveFileName(
             self, "Сохранить график как SVG", "",
@@ -600,7 +1571,31 @@ class AdvancedInterferometerApp(QMainWindow):
         )
         if not file_name:
             return
-        self.statusBar().showMessage(f"График сохранён в {file_name} (векторный формат)")
+        self.export_current_plots(file_name, ".svg")
+    def export_current_plots(self, file_name, extension):
+        # Все графики текущей вкладки; при нескольких графиках к имени добавляется номер
+        import pyqtgraph as pg
+        plots = self.tab_widget.currentWidget().findChildren(pg.PlotWidget)
+        if not plots:
+            self.statusBar().showMessage("Nothing to export on this tab")
+            return
+        stem, ext = os.path.splitext(file_name)
+        ext = ext or extension
+        paths = [f"{stem}{ext}"] if len(plots) == 1 else [f"{stem}_{i + 1}{ext}" for i in range(len(plots))]
+        jobs = []
+        for plot, path in zip(plots, paths):
+            if any(isinstance(item, pg.ImageItem) for item in plot.getPlotItem().items):
+                # Изображения (спектрограмма) не описываются рядами и сохраняются здесь же
+                import pyqtgraph.exporters as exporters
+                exporter = (exporters.SVGExporter(plot.plotItem) if ext.lower() == '.svg'
+                            else exporters.ImageExporter(plot.plotItem))
+                exporter.export(path)
+            else:
+                jobs.append((spec_from_plot(plot), path))
+        self.statusBar().showMessage("Exporting plots...")
+        wait_for_files(self.jobs, "export_plots", render_figures(jobs),
+                       lambda done: self.statusBar().showMessage(f"График сохранён: {', '.join(paths)}"),
+                       lambda error: self.statusBar().showMessage(f"Export Error: {error}"))
     def open_raw_data_tab(self):
         if self.data is None:
             self.statusBar().showMessage("No data loaded")
@@ -616,26 +1611,154 @@ class AdvancedInterferometerApp(QMainWindow):
         self.tab_widget.addTab(raw_widget, "Raw Data")
         self.tab_widget.setCurrentWidget(raw_widget)
     # ----- Методы для открытия вкладок по клику в Demodulation -----
-    def openOriginalSignalTab(self, signal, sampling_rate):
-        widget = OriginalSignalWidget(signal, sampling_rate)
-        self.tab_widget.addTab(widget, "Original Signal")
-        self.tab_widget.setCurrentWidget(widget)
-    def openSpectrumTab(self, demodulated_signal, sampling_rate):
-        widget = SpectrumWidget(demodulated_signal, sampling_rate, zero_padding=0)
-        self.tab_widget.addTab(widget, "Spectrum of Demodulated Signal")
-        self.tab_widget.setCurrentWidget(widget)
-    def openPhaseTab(self, time, phase):
-        widget = PhaseWidget(time, phase)
-        self.tab_widget.addTab(widget, "Phase vs Time")
-        self.tab_widget.setCurrentWidget(widget)
+    # Повторный клик для того же сигнала и параметров переключает на уже открытую вкладку
+    def openOriginalSignalTab(self, signal, sampling_rate, source=None):
+        self.tabs.open("Original Signal", self.analysis_key("original", signal, source, sampling_rate),
+                       load=lambda progress: signal,
+                       build=lambda x: OriginalSignalWidget(x, sampling_rate), data=signal)
+    def openSpectrumTab(self, demodulated_signal, sampling_rate, source=None, signal=None, band=None,
+                        window='Rectangular'):
+        # band — спектр в полосе частот (zoom FFT) с окном window; без полосы — прежний спектр всей полосы
+        demodulation = demodulation_loader(signal, source, self.analytic_store, (demodulated_signal, None))
+        def load(progress):
+            envelope = demodulation(progress)[0]
+            return envelope, SpectrumWidget.compute_spectrum(envelope, sampling_rate, band=band, window=window)
+        self.tabs.open("Spectrum of Demodulated Signal",
+                       self.analysis_key("spectrum", demodulated_signal, source, sampling_rate,
+                                         *((band, window) if band is not None else ())), load,
+                       build=lambda data: SpectrumWidget(data[0], sampling_rate, zero_padding=0, spectrum=data[1],
+                                                         band=band, window=window))
+    def openPhaseTab(self, time, phase, source=None, signal=None, sampling_rate=None):
+        # Первый показ использует массивы Demodulation; после освобождения фаза берётся
+        # из AnalyticStore или пересчитывается, а ось времени задаётся шагом
+        demodulation = demodulation_loader(signal, source, self.analytic_store, (None, phase))
+        self.tabs.open("Phase vs Time", self.analysis_key("phase", phase, source, sampling_rate),
+                       load=lambda progress: (None, demodulation(progress)[1]),
+                       build=lambda data: PhaseWidget(data[0], data[1], sampling_rate=sampling_rate),
+                       data=(time, phase))
+    def analysis_key(self, analysis, array, source, *params):
+        # Один анализ одного сигнала: по (запись, канал, фильтр), а без источника (поток) — по массиву
+        return (analysis,) + (tuple(source) if source is not None else (array,)) + params
+    def pinned_data(self):
+        # Данные, которые программа держит независимо от вкладок анализа
+        return self.data, self.pipeline, self.demod_widget, self.analytic_store
+    def close_tab(self, index):
+        widget = self.tab_widget.widget(index)
+        if widget is self.demod_tab:
+            return
+        if widget in self.tabs.tabs:
+            self.tabs.close(widget)
+            return
+        self.tab_widget.removeTab(index)
+        widget.deleteLater()
     def open_demodulation_widget(self):
         # Теперь вкладка Demodulation всегда присутствует, поэтому просто переключаемся на неё
-        self.tab_widget.setCurrentWidget(self.demod_widget)
+        self.tab_widget.setCurrentWidget(self.demod_tab)
+    def toggle_stream(self):
+        if self.demod_widget is not None and self.demod_widget.is_streaming():
+            self.demod_widget.stop_stream()
+            return
+        sources = ["Synthetic Interferogram"]
+        if self.data is not None:
+            sources.append("Replay Current Channel")
+        source_name, ok = QInputDialog.getItem(self, "Live Stream", "Data source:", sources, 0, False)
+        if not ok:
+            return
+        rate, ok = QInputDialog.getDouble(self, "Sampling Rate", "Enter sampling frequency (Hz):",
+                                          value=10000.0, min=1.0, max=10000000.0)
+        if not ok:
+            return
+        if source_name == "Replay Current Channel":
+            source = FileReplaySource(self.active_data().channel(self.current_channel), rate)
+        else:
+            source = SyntheticSource(rate, carrier=rate / 20.0)
+        self.demodulation().start_stream(StreamPipeline(source))
+        self.tab_widget.setCurrentWidget(self.demod_tab)
+    def on_stream_state(self, streaming):
+        self.btn_stream.setText("Stop Live Stream" if streaming else "Start Live Stream")
+        if streaming:
+            self.reset_peaks()
+    def init_diagnostics_controls(self):
+        group = QGroupBox("Diagnostics")
+        layout = QVBoxLayout(group)
+        self.trace_check = QCheckBox("Record timings")
+        self.trace_check.setChecked(tracer.enabled)
+        self.trace_check.toggled.connect(self.toggle_tracing)
+        self.trace_panel_check = QCheckBox("Show timing panel")
+        self.trace_panel_check.toggled.connect(self.toggle_trace_panel)
+        self.btn_export_trace = QPushButton("Export Trace")
+        self.btn_export_trace.clicked.connect(self.export_trace)
+        layout.addWidget(self.trace_check)
+        layout.addWidget(self.trace_panel_check)
+        layout.addWidget(self.btn_export_trace)
+        # Память вкладок анализа и её бюджет: при превышении давно не открывавшиеся вкладки освобождаются
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("Tab budget (MB):"))
+        self.tab_budget = QSpinBox()
+        self.tab_budget.setRange(16, 1 << 20)
+        self.tab_budget.setValue(self.tabs.max_bytes // (1024 * 1024))
+        self.tab_budget.valueChanged.connect(lambda mb: self.tabs.set_budget(mb * 1024 * 1024))
+        budget_layout.addWidget(self.tab_budget)
+        layout.addLayout(budget_layout)
+        self.tab_memory = QLabel()
+        self.tab_memory.setStyleSheet("color: #AAAAAA;")
+        layout.addWidget(self.tab_memory)
+        self.tabs.memoryChanged.connect(self.show_tab_memory)
+        self.show_tab_memory(0, self.tabs.max_bytes)
+        self.left_layout.addWidget(group)
+        # Панель создаётся при первом показе
+        self.trace_dock = None
+    def show_tab_memory(self, used, budget):
+        self.tab_memory.setText(f"Tabs: {len(self.tabs.tabs)}, {used / 1048576:.0f} of {budget / 1048576:.0f} MB")
+    def toggle_tracing(self, enabled):
+        if enabled:
+            tracer.enable()
+        else:
+            tracer.disable()
+    def toggle_trace_panel(self, visible):
+        if visible and self.trace_dock is None:
+            self.trace_dock = QDockWidget("Recent Operations", self)
+            self.trace_dock.setWidget(TracePanel())
+            self.trace_dock.visibilityChanged.connect(self.trace_panel_check.setChecked)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.trace_dock)
+        if visible and not tracer.enabled:
+            self.trace_check.setChecked(True)
+        if self.trace_dock is not None:
+            self.trace_dock.setVisible(visible)
+    def export_trace(self):
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export Trace", "interf_trace.json",
+            "Chrome Trace (*.json);;All Files (*)"
+        )
+        if not file_name:
+            return
+        try:
+            tracer.export(file_name)
+            self.statusBar().showMessage(f"Trace saved: {file_name} ({len(tracer.events)} spans)")
+        except OSError as e:
+            self.statusBar().showMessage(f"Trace Export Error: {str(e)}")
+    def closeEvent(self, event):
+        if self.demod_widget is not None:
+            self.demod_widget.stop_stream()
+        shutdown_render_pool()
+        self.jobs.shutdown()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
+    # python Interf_garik.py batch <files|dirs|globs> ... — пакетная обработка без GUI
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from interf_batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    # python Interf_garik.py bench [--quick] [-o report.json] — тесты производительности
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        from interf_bench import main as bench_main
+        sys.exit(bench_main(sys.argv[2:]))
+    # python Interf_garik.py serve [--address A] [-j N] [--stats S] — локальный сервер анализа
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from interf_server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
     app = QApplication(sys.argv)
     app.setFont(QFont("Helvetica", 10))
     window = AdvancedInterferometerApp()
     window.show()
     sys.exit(app.exec_())
-d
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+from interf_trace import span
+from interf_precision import analytic_signal, working_dtype
+from interf_kernels import angle_unwrap
+
+# ----- Хранилище результатов демодуляции по каналам -----
+# Огибающая и развёрнутая фаза хранятся по ключу (запись, канал, настройки
+# предобработки) в пределах бюджета памяти; при переполнении вытесняются давно
+# не использованные каналы. precompute считает сразу группу каналов одним
+# 2-D преобразованием Гильберта (axis=0), так что переключение каналов — это поиск.
+
+DEFAULT_MAX_MB = 1024
+# Оценка байт на отсчёт при пакетном расчёте (float64): вход, аналитический сигнал,
+# временный массив FFT, огибающая и фаза; для float32 — вдвое меньше
+_BYTES_PER_SAMPLE = 64
+
+class AnalyticStore:
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("INTERF_ANALYTIC_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    def _key(self, recording, channel, settings):
+        return id(recording), int(channel), tuple(settings)
+    def get(self, recording, channel, settings=()):
+        key = self._key(recording, channel, settings)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0]() is not recording:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+    def put(self, recording, channel, envelope, phase, settings=()):
+        key = self._key(recording, channel, settings)
+        size = envelope.nbytes + phase.nbytes
+        if size > self.max_bytes:
+            return
+        envelope.flags.writeable = False
+        phase.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._entries[key] = (weakref.ref(recording), envelope, phase, size)
+            self._bytes += size
+            self._evict()
+    def _evict(self):
+        # Записи, которые уже удалены, вытесняются первыми
+        for key, entry in list(self._entries.items()):
+            if entry[0]() is None:
+                del self._entries[key]
+                self._bytes -= entry[3]
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry[3]
+    def discard(self, recording):
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry[0]() is recording:
+                    del self._entries[key]
+                    self._bytes -= entry[3]
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    @property
+    def nbytes(self):
+        return self._bytes
+    def precompute(self, recording, settings=(), channels=None, prepare=None, progress=None):
+        # prepare(signal_2d) применяет предобработку (например, фильтр) к блоку каналов
+        if channels is None:
+            channels = range(recording.n_channels)
+        pending = [ch for ch in channels if self.get(recording, ch, settings) is None]
+        n = len(recording)
+        if not pending or n == 0:
+            return
+        dtype = working_dtype(recording.dtype)
+        # Размер группы каналов ограничен так, чтобы временные массивы уместились в четверть бюджета
+        per_sample = _BYTES_PER_SAMPLE * dtype.itemsize // 8
+        group = max(1, min(len(pending), self.max_bytes // 4 // (n * per_sample)))
+        for done in range(0, len(pending), group):
+            batch = pending[done:done + group]
+            if progress is not None:
+                progress(int(100 * done / len(pending)), f"Precomputing channels {batch[0]}–{batch[-1]}")
+            block = recording.stack(batch, dtype=dtype)
+            if prepare is not None:
+                block = prepare(block)
+            with span("hilbert", "compute", channels=len(batch)):
+                analytic = analytic_signal(block, axis=0)
+            del block
+            envelope = np.abs(analytic)
+            phase = angle_unwrap(analytic, axis=0)
+            del analytic
+            for j, ch in enumerate(batch):
+                self.put(recording, ch, np.ascontiguousarray(envelope[:, j]),
+                         np.ascontiguousarray(phase[:, j]), settings)
@@ -0,0 +1,118 @@
+import sys
+import os
+import glob
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from interf_engine import SUPPORTED_EXTENSIONS, load_recording, demodulate
+from interf_spectrum import amplitude_spectrum
+from interf_cache import RecordingCache
+from interf_graph import DEFAULT_SAMPLING_RATE
+from interf_precision import PRECISIONS, DEFAULT_PRECISION, real_dtype
+from interf_export import (export_arrays, demodulation_arrays, demodulation_figures, render_figure,
+                           init_render_worker)
+
+# ----- Пакетная обработка записей без GUI -----
+# Пример: python interf_batch.py data/ "runs/*.txt" -o results --rate 1000 -j 8
+
+def collect_files(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(os.path.join(item, name) for name in os.listdir(item))
+        else:
+            candidates = sorted(glob.glob(item)) or [item]
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                files.append(path)
+    # Убираем дубликаты, сохраняя порядок
+    return list(dict.fromkeys(files))
+
+def output_names(files):
+    # {файл: имя результата без расширения}. Обычно — имя файла; если имена совпадают
+    # (a/run.txt и b/run.txt), то путь относительно общего каталога входных файлов
+    names = [os.path.basename(path) for path in files]
+    if len(set(names)) == len(names):
+        return dict(zip(files, names))
+    paths = [os.path.abspath(path) for path in files]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return {file: os.path.relpath(path, root) for file, path in zip(files, paths)}
+
+def process_file(file_path, out_dir, channel, sampling_rate, n_zeros, cache_dir=None, data_format="npz",
+                 plots=(), precision="float64", name=None):
+    cache = RecordingCache(cache_dir) if cache_dir else None
+    dtype = real_dtype(precision)
+    recording = load_recording(file_path, cache=cache, dtype=dtype)
+    if sampling_rate is None:
+        # Частота из описания двоичной записи, иначе значение по умолчанию
+        sampling_rate = recording.sampling_rate or DEFAULT_SAMPLING_RATE
+    signal = np.asarray(recording.channel(channel), dtype=dtype)
+    demodulated_signal, instantaneous_phase, time = demodulate(signal, sampling_rate)
+    xf, amplitude = amplitude_spectrum(demodulated_signal, sampling_rate, n_zeros)
+    base = os.path.join(out_dir, name or os.path.basename(file_path))
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    out_path = f"{base}.{data_format}"
+    export_arrays(out_path, demodulation_arrays(signal, demodulated_signal, instantaneous_phase, time, xf, amplitude),
+                  attrs={"source": os.path.abspath(file_path), "channel": channel, "sampling_rate": sampling_rate,
+                         "n_zeros": n_zeros, "precision": precision})
+    # Графики рисуются в этом же рабочем процессе (Qt без дисплея)
+    if plots:
+        figures = demodulation_figures(signal, sampling_rate, demodulated_signal, instantaneous_phase, time,
+                                       xf, amplitude)
+        for key, spec in figures.items():
+            for extension in plots:
+                render_figure(spec, f"{base}_{key}.{extension}")
+    return out_path
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch demodulation of interferometer recordings")
+    parser.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="results", help="output directory")
+    parser.add_argument("-c", "--channel", type=int, default=0, help="channel (column) index")
+    parser.add_argument("-r", "--rate", type=float, default=None,
+                        help=f"sampling frequency (Hz); default: from the binary spec, else {DEFAULT_SAMPLING_RATE:g}")
+    parser.add_argument("-z", "--zeros", type=int, default=0, help="zero padding for the spectrum")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--cache-dir", default=None, help="reuse/populate the binary ingest cache in this directory")
+    parser.add_argument("-f", "--format", default="npz", choices=["npz", "h5", "parquet"],
+                        help="container for the numeric results")
+    parser.add_argument("--plots", type=lambda s: [v for v in s.lower().split(",") if v], default=[],
+                        help="also render figures, e.g. png,svg")
+    parser.add_argument("-p", "--precision", default=DEFAULT_PRECISION, choices=list(PRECISIONS),
+                        help="floating-point precision of the whole pipeline")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    files = collect_files(args.inputs)
+    if not files:
+        print("No recordings found", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    failed = 0
+    unknown = set(args.plots) - {"png", "svg"}
+    if unknown:
+        print(f"Unsupported plot format: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+    initializer = init_render_worker if args.plots else None
+    names = output_names(files)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=initializer) as pool:
+        futures = {
+            pool.submit(process_file, path, args.output, args.channel, args.rate, args.zeros, args.cache_dir,
+                        args.format, args.plots, args.precision, names[path]): path
+            for path in files
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                out_path = future.result()
+                print(f"[{done}/{len(files)}] {path} -> {out_path}")
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(files)}] {path}: Error: {e}", file=sys.stderr)
+    print(f"Processed {len(files) - failed} of {len(files)} files")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,628 @@
+import os
+# Отрисовка без дисплея: платформа Qt выбирается до импорта PyQt5
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import numpy as np
+import scipy
+from scipy.signal import find_peaks
+
+from interf_engine import Recording, load_recording, demodulate, envelope_and_phase
+from interf_spectrum import amplitude_spectrum, spectrum_amplitude, band_amplitude, band_axis, peak_frequency
+from interf_analytic import AnalyticStore
+from interf_filters import apply_filter
+from interf_fringes import find_fringes
+from interf_spectrogram import spectrogram
+from interf_cache import RecordingCache
+from interf_stream import SyntheticSource
+from interf_precision import PRECISIONS, real_dtype, compare_precision, analytic_signal
+from interf_graph import processing_graph
+from interf_rawio import RawSpec, write_spec
+
+# ----- Набор тестов производительности -----
+# Синтетические интерферограммы (несущая + фазовая модуляция + шум) от 10^4 до 10^8
+# отсчётов и от 1 до 16 каналов; замеряются горячие участки программы: разбор файлов,
+# демодуляция (hilbert/unwrap), спектр с дополнением нулями, фильтры, поиск пиков и
+# отрисовка графиков. Результаты пишутся в JSON, чтобы сравнивать коммиты:
+#   python interf_bench.py -o before.json
+#   python interf_bench.py -o after.json --compare before.json
+# Конфигурации, которым не хватает памяти (--max-mb), пропускаются с пометкой в отчёте.
+# --precision float32 прогоняет все тесты в одинарной точности (сравнение с отчётом
+# float64 через --compare); тест precision проверяет границы ошибки float32 и при их
+# нарушении завершает программу с кодом 1.
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7, 10 ** 8]
+DEFAULT_CHANNELS = [1, 4, 16]
+QUICK_SIZES = [10 ** 4, 10 ** 5]
+QUICK_CHANNELS = [1, 4]
+SAMPLING_RATE = 1000.0
+# Шаг квантования синтетического дампа АЦП (int16)
+RAW_SCALE = 1e-3
+# Рабочая память и поле блока в тесте outofcore; короткие записи делятся на участки
+# меньше записи, поле — не больше четверти участка
+OOC_BENCH_MB = 16
+OOC_BENCH_MARGIN = 1 << 16
+# Допустимое расхождение с расчётом в памяти: OOC_ERROR_SCALE / поле — фаза (рад) и огибающая
+# (доля её RMS); склейка приближённая, на сигналах теста расхождение ≈ 1.5–4 / поле. Для
+# float32 к фазе добавляется 4ε·|φ| — округление большой накопленной фазы
+OOC_ERROR_SCALE = 8.0
+# Проверка find_fringes в тесте peaks: сигнал с плато (округлённый) делится на короткие
+# участки (chunk_size, margin), чтобы плато пересекали края участков; длина — не больше
+PEAKS_CHECK_CHUNKS = [(5000, 1), (97, 13)]
+PEAKS_CHECK_SAMPLES = 10 ** 6
+# Запросов, одновременно отправленных серверу анализа в тесте server
+SERVER_PIPELINE = 8
+SCHEMA_VERSION = 1
+
+# ----- Синтетический сигнал -----
+def synthetic_interferogram(n_samples, n_channels=1, sampling_rate=SAMPLING_RATE, noise=0.02, seed=0,
+                            block_size=1 << 20):
+    # Каналы — непрерывные столбцы F-массива; у каждого своя глубина модуляции и фаза шума
+    block = np.empty((n_samples, n_channels), order='F')
+    for ch in range(n_channels):
+        source = SyntheticSource(sampling_rate, block_size=min(block_size, max(n_samples, 1)),
+                                 carrier=sampling_rate / 20.0, mod_depth=3.0 + ch, noise=noise,
+                                 seed=seed + ch)
+        for start in range(0, n_samples, source.block_size):
+            part = source.next_block()
+            block[start:start + len(part), ch] = part[:n_samples - start]
+    return block
+
+# ----- Замер времени -----
+def measure(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+class BenchContext:
+    def __init__(self, n_samples, n_channels, args, workdir):
+        self.n_samples = n_samples
+        self.n_channels = n_channels
+        self.args = args
+        self.workdir = workdir
+        self.sampling_rate = SAMPLING_RATE
+        self.dtype = real_dtype(args.precision)
+        self._block = None
+    @property
+    def block(self):
+        if self._block is None:
+            self._block = synthetic_interferogram(self.n_samples, self.n_channels, self.sampling_rate)
+            if self.dtype != self._block.dtype:
+                self._block = self._block.astype(self.dtype, order='F')
+        return self._block
+    @property
+    def signal(self):
+        return self.block[:, 0]
+    def recording(self):
+        return Recording.from_array([str(i) for i in range(self.n_channels)], self.block)
+    def raw_block(self):
+        return np.round(self.block / RAW_SCALE).astype(np.int16)
+    def file(self, extension):
+        # Файл записи для теста разбора; создаётся один раз на конфигурацию
+        path = os.path.join(self.workdir, f"bench_{self.n_samples}x{self.n_channels}{extension}")
+        if not os.path.exists(path):
+            if extension == '.txt':
+                np.savetxt(path, self.block, fmt='%.9g')
+            elif extension == '.bin':
+                # Дамп АЦП: int16 с чередованием каналов и описанием в <файл>.json
+                self.raw_block().tofile(path)
+                write_spec(path, RawSpec('int16', self.n_channels, scale=RAW_SCALE, sampling_rate=self.sampling_rate))
+            else:
+                header = ",".join(f"ch{i}" for i in range(self.n_channels))
+                if extension == '.csv':
+                    np.savetxt(path, self.block, fmt='%.9g', delimiter=",", header=header, comments="")
+                else:
+                    import pandas as pd
+                    pd.DataFrame(self.block, columns=header.split(",")).to_excel(path, index=False)
+        return path
+
+# ----- Тесты -----
+# Каждый тест — генератор пар (параметры, функция). per_recording=False — тест
+# работает с одним каналом и выполняется один раз на размер сигнала.
+# bytes_per_sample — оценка пиковой памяти на отсчёт × канал для пропуска конфигураций.
+
+def bench_parse(ctx):
+    formats = [('.txt', ctx.args.parse_max_samples), ('.csv', ctx.args.parse_max_samples),
+               ('.xlsx', ctx.args.xlsx_max_samples)]
+    for extension, limit in formats:
+        if ctx.n_samples > limit:
+            yield {"format": extension[1:]}, Skip(f"more than {limit} rows")
+            continue
+        if extension == '.xlsx':
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                yield {"format": "xlsx"}, Skip("openpyxl is not installed")
+                continue
+        path = ctx.file(extension)
+        yield {"format": extension[1:]}, lambda path=path: load_recording(path, dtype=ctx.dtype)
+    if ctx.n_samples <= ctx.args.parse_max_samples:
+        # Повторное открытие из двоичного кэша (np.memmap)
+        path = ctx.file('.txt')
+        cache = RecordingCache(os.path.join(ctx.workdir, "cache"), max_bytes=1 << 40)
+        cache.open(path, dtype=ctx.dtype)
+        yield {"format": "txt", "cache": "hit"}, lambda: load_recording(path, cache=cache, dtype=ctx.dtype)
+    # Двоичный дамп: отображение файла и чтение всех каналов с масштабом (Recording.stack)
+    path = ctx.file('.bin')
+    yield {"format": "bin"}, lambda: load_recording(path, dtype=ctx.dtype)
+    yield {"format": "bin", "read": "stack"}, lambda: load_recording(path, dtype=ctx.dtype).stack()
+    def raw_values():
+        recording = load_recording(path, dtype=ctx.dtype)
+        expected = ctx.raw_block() * ctx.dtype.type(RAW_SCALE)
+        return {"max_abs_error": float(np.max(np.abs(recording.stack() - expected), initial=0.0)),
+                "sampling_rate": recording.sampling_rate}
+    yield {"check": "bin_values"}, Check(raw_values, lambda r: r["max_abs_error"] == 0 and
+                                         r["sampling_rate"] == ctx.sampling_rate)
+
+def bench_demodulate(ctx):
+    signal = ctx.signal
+    yield {}, lambda: demodulate(signal, ctx.sampling_rate)
+
+def bench_precompute(ctx):
+    recording = ctx.recording()
+    yield {}, lambda: AnalyticStore(max_bytes=1 << 40).precompute(recording)
+
+def bench_update_signal(ctx):
+    # Полный путь обновления DemodulationWidget без фоновых задач: демодуляция, спектр, графики.
+    # Каждый прогон — новая запись, поэтому граф обработки ничего не берёт из кэша
+    app = qt_app()
+    from Interf_garik import DemodulationWidget
+    widget = DemodulationWidget(np.array([]), ctx.sampling_rate)
+    widget.resize(1200, 900)
+    signal = ctx.signal
+    def run():
+        widget.pipeline.set(recording=Recording.from_array(["Signal"], signal[:, None]))
+        widget.refresh()
+        app.processEvents()
+    yield {}, run
+
+def bench_pipeline(ctx):
+    # Пересчёт графа обработки после смены одного параметра: полный путь, частота
+    # дискретизации (только оси), дополнение нулями (только FFT), канал (из AnalyticStore)
+    recording = ctx.recording()
+    graph = processing_graph(AnalyticStore(max_bytes=1 << 40), ctx.sampling_rate)
+    names = ["spectrum"]
+    def full():
+        graph.set(recording=Recording(recording.columns, recording.channels))
+        graph.evaluate(names)
+    changes = {
+        # Каждый прогон с новым значением, чтобы ось и амплитуды не брались из кэша spectrum_service
+        "sampling_rate": lambda i: {"sampling_rate": ctx.sampling_rate * (1 + i)},
+        "zero_padding": lambda i: {"spectrum_settings": (ctx.n_samples + i, 'Rectangular', True)},
+        # Фазы каналов после первого обхода берутся из AnalyticStore
+        "channel": lambda i: {"channel": i % recording.n_channels},
+    }
+    yield {"change": "full"}, full
+    graph.set(recording=recording)
+    for change, params in changes.items():
+        counter = iter(range(1 << 30))
+        def run(params=params, counter=counter):
+            graph.set(**params(next(counter)))
+            graph.evaluate(names)
+        yield {"change": change}, run
+    # Частота дискретизации не должна запускать преобразование Гильберта и FFT
+    def rate_change():
+        graph.evaluate(names)
+        before = dict(graph.computed)
+        graph.set(sampling_rate=graph.value("sampling_rate") * 2)
+        graph.evaluate(names)
+        return {node: graph.computed[node] - before.get(node, 0) for node in graph.computed
+                if graph.computed[node] != before.get(node, 0)}
+    yield {"check": "rate_change"}, Check(rate_change, lambda r: set(r) == {"spectrum"})
+
+def bench_spectrum(ctx):
+    envelope = np.abs(ctx.signal)
+    n = ctx.n_samples
+    for n_zeros in (0, n, 3 * n):
+        for fast_length in (False, True):
+            params = {"n_zeros": n_zeros, "fast_length": fast_length}
+            if (n + n_zeros) * 32 > ctx.args.max_bytes:
+                yield params, Skip("memory budget")
+                continue
+            yield params, lambda z=n_zeros, f=fast_length: amplitude_spectrum(envelope, ctx.sampling_rate, z,
+                                                                               fast_length=f)
+    # Тот же шаг по частоте, что и при 3n нулях, но только в полосе 1% вокруг несущей (zoom FFT):
+    # время зависит от числа частот, а не от длины дополненной записи
+    P = 4 * n
+    k0, k1 = P // 20 - P // 200, P // 20 + P // 200
+    yield {"band": "1%", "bins": k1 - k0 + 1}, lambda: band_amplitude(envelope, k0 / P, k1 / P, k1 - k0 + 1)
+    def band_accuracy():
+        metrics = {}
+        if P * 32 <= ctx.args.max_bytes:
+            padded = spectrum_amplitude(envelope, P - n)[k0:k1 + 1] * (P / n)
+            band = band_amplitude(envelope, k0 / P, k1 / P, k1 - k0 + 1)
+            metrics["max_rel_error"] = float(np.max(np.abs(band - padded)) / np.max(padded))
+        # Тон между отсчётами сетки 1/n: ошибка частоты максимума после уточнения, в шагах сетки
+        f0 = 0.1234567
+        tone = np.cos(2 * np.pi * f0 * np.arange(n))
+        lo, hi = f0 - 8.3 / n, f0 + 7.7 / n
+        peak = peak_frequency(band_axis(lo, hi, 17), band_amplitude(tone, lo, hi, 17, 'Hann'))
+        metrics["peak_error_bins"] = abs(peak[0] - f0) * n
+        return metrics
+    yield {"check": "band"}, Check(band_accuracy, lambda r: r.get("max_rel_error", 0) < 1e-9 and
+                                   r["peak_error_bins"] < 0.05)
+    yield {"spectrogram": "nperseg=256"}, lambda: spectrogram(envelope, ctx.sampling_rate, nperseg=256)
+    def spectrogram_agreement():
+        # Столбец на сегмент — те же t и мощность, что у scipy.signal.spectrogram; столбцы из
+        # нескольких сегментов — в среднем центров их сегментов
+        from scipy.signal import spectrogram as scipy_spectrogram
+        nperseg, step = 256, 128
+        _, t, power = scipy_spectrogram(envelope, ctx.sampling_rate, window='hann', nperseg=nperseg,
+                                        noverlap=nperseg - step)
+        single = spectrogram(envelope, ctx.sampling_rate, nperseg=nperseg, max_columns=len(t))
+        merged = spectrogram(envelope, ctx.sampling_rate, nperseg=nperseg, max_columns=len(t) // 7)
+        per_column = -(-len(t) // len(merged.times))
+        centres = np.array([t[i:i + per_column].mean() for i in range(0, len(t), per_column)])
+        return {"max_time_error_s": float(max(np.abs(single.times - t).max(), np.abs(merged.times - centres).max())),
+                "max_power_rel_error": float(np.abs(single.power - power).max() / power.max())}
+    yield {"check": "spectrogram"}, Check(spectrogram_agreement, lambda r: r["max_time_error_s"] < 1e-9
+                                          and r["max_power_rel_error"] < 1e-9)
+
+FILTER_CASES = [
+    ('Moving Average', {'window': 5}), ('Moving Average', {'window': 501}),
+    ('Gaussian', {'sigma': 2.0}), ('Gaussian', {'sigma': 50.0}),
+    ('Savitzky-Golay', {'window': 11, 'polyorder': 3}), ('Savitzky-Golay', {'window': 501, 'polyorder': 3}),
+]
+
+def bench_filter(ctx):
+    block = ctx.block
+    for filter_type, params in FILTER_CASES:
+        yield dict(filter=filter_type, **params), lambda t=filter_type, p=params: apply_filter(block, t, **p)
+
+def bench_peaks(ctx):
+    signal = ctx.signal
+    yield {"engine": "find_fringes"}, lambda: find_fringes(signal, ctx.sampling_rate, prominence=1)
+    # Исходный вызов из find_peaks для сравнения
+    yield {"engine": "scipy"}, lambda: find_peaks(signal, prominence=1)
+    def agreement():
+        # Те же пики и выступы, что у scipy.signal.find_peaks: на всей записи с участками по
+        # умолчанию и на округлённом сигнале с короткими участками
+        rounded = np.round(signal[:PEAKS_CHECK_SAMPLES], 1)
+        cases = [(signal, {})] + [(rounded, {"chunk_size": c, "margin": m}) for c, m in PEAKS_CHECK_CHUNKS]
+        mismatched, max_error = 0, 0.0
+        for x, chunks in cases:
+            reference, properties = find_peaks(x, prominence=1)
+            result = find_fringes(x, ctx.sampling_rate, prominence=1, **chunks)
+            if not np.array_equal(result.peaks, reference):
+                mismatched += 1
+                continue
+            max_error = max(max_error, float(np.abs(result.prominences - properties["prominences"]).max(initial=0)))
+        return {"cases": len(cases), "mismatched": mismatched, "max_prominence_error": max_error}
+    yield {"check": "scipy"}, Check(agreement, lambda r: r["mismatched"] == 0 and r["max_prominence_error"] < 1e-12)
+
+def bench_precision(ctx):
+    # Демодуляция в обеих точностях и проверка границ ошибки float32 (interf_precision)
+    signal = np.asarray(ctx.signal, dtype=np.float64)
+    for precision in PRECISIONS:
+        x = signal.astype(real_dtype(precision))
+        yield {"precision": precision}, lambda x=x: demodulate(x, ctx.sampling_rate)
+    yield {"check": "error_bounds"}, Check(lambda: compare_precision(signal),
+                                           lambda r: r["phase_bound_ratio"] <= 1 and r["opd_bound_ratio"] <= 1)
+
+def bench_render(ctx):
+    # Построение пирамиды min/max и отрисовка графика в QPixmap (пирамида уже построена)
+    app = qt_app()
+    import pyqtgraph as pg
+    from interf_lod import MinMaxPyramid, plot_lod, clear_lod
+    yield {"target": "pyramid"}, lambda: MinMaxPyramid(ctx.signal)
+    plot = pg.PlotWidget()
+    plot.resize(1200, 400)
+    curves = []
+    signal = ctx.signal
+    def run():
+        clear_lod(plot, curves)
+        curves.append(plot_lod(plot, signal))
+        app.processEvents()
+        plot.grab()
+    yield {"target": "pixmap"}, run
+
+def bench_startup(ctx):
+    # Время до первого окна в новом процессе (не зависит от размера сигнала, один раз за запуск);
+    # проверка — до показа окна не импортируются scipy.signal, pandas и pyqtgraph
+    if ctx.n_samples != ctx.args.sizes[0]:
+        return
+    from interf_startup import time_to_first_window
+    yield {"target": "first_window"}, lambda: time_to_first_window()
+    yield {"check": "lazy_imports"}, Check(time_to_first_window, lambda r: not r["heavy_modules"])
+
+def bench_jit(ctx):
+    # Ядра interf_kernels: путь NumPy и ядро Numba (без numba — пропуск) для каждого этапа;
+    # проверка — результаты обоих путей совпадают побитно
+    import interf_kernels
+    from interf_opd import channel_pairs
+    block = ctx.block
+    analytic = analytic_signal(block, axis=0)
+    phase = interf_kernels.angle_unwrap(analytic, axis=0)
+    first, second = channel_pairs(ctx.n_channels, 0) if ctx.n_channels > 1 else (np.empty(0, dtype=np.intp),) * 2
+    scale = np.linspace(1.0, 2.0, ctx.n_channels).astype(phase.dtype)
+    cases = {
+        "angle_unwrap": lambda: interf_kernels.angle_unwrap(analytic, axis=0),
+        "moving_average": lambda: interf_kernels.running_mean(block, 31),
+        "fringe_peaks": lambda: interf_kernels.local_maxima(np.asarray(block[:, 0], dtype=np.float64), 0.5),
+    }
+    if ctx.n_channels > 1:
+        cases["opd"] = lambda: interf_kernels.opd_outputs(phase, scale, first, second)
+    jit = interf_kernels.warm_up()
+    def numpy_path(fn):
+        def run():
+            with interf_kernels.jit_disabled():
+                return fn()
+        return run
+    for name, fn in cases.items():
+        yield {"kernel": name, "impl": "numpy"}, numpy_path(fn)
+        yield {"kernel": name, "impl": "numba"}, fn if jit else Skip("numba is not installed or INTERF_JIT=0")
+    if not jit:
+        return
+    def identical():
+        result = {}
+        for name, fn in cases.items():
+            fast, reference = fn(), numpy_path(fn)()
+            pairs = zip(fast, reference) if isinstance(fast, tuple) else [(fast, reference)]
+            result[name] = all(a.dtype == b.dtype and np.array_equal(a, b) for a, b in pairs)
+        return result
+    yield {"check": "identical"}, Check(identical, lambda r: all(r.values()))
+
+def bench_outofcore(ctx):
+    # Демодуляция канала двоичной записи (np.memmap) по блокам в бюджете OOC_BENCH_MB против
+    # расчёта всей записи в памяти. Бюджет урезается так, чтобы участок был короче записи —
+    # блочный путь проверяется и на коротких записях (--quick). Проверка — расхождение в
+    # пределах OOC_ERROR_SCALE / поле и пиковая память блочного расчёта (tracemalloc: массивы
+    # NumPy) не больше бюджета при любой длине
+    from interf_outofcore import demodulate_blocks, segment_budget, segment_length, MIN_SEGMENT
+    import tracemalloc
+    channel = load_recording(ctx.file('.bin'), dtype=ctx.dtype).channel(0)
+    shorter = 1 << (max(len(channel) - 1, 1).bit_length() - 1)
+    if shorter < MIN_SEGMENT:
+        yield {"mode": "blocks"}, Skip(f"record shorter than {2 * MIN_SEGMENT} samples")
+        return
+    max_bytes = min(int(OOC_BENCH_MB * 1024 * 1024), segment_budget(shorter, ctx.dtype))
+    margin = min(OOC_BENCH_MARGIN, segment_length(max_bytes, ctx.dtype) // 4)
+    tolerance = OOC_ERROR_SCALE / margin
+    run = lambda: demodulate_blocks(channel, max_bytes=max_bytes, margin=margin)
+    yield {"mode": "in_memory"}, lambda: envelope_and_phase(np.asarray(channel))
+    yield {"mode": "blocks", "budget_mb": max_bytes / 2 ** 20, "margin": margin}, run
+    def agreement():
+        tracemalloc.start()
+        try:
+            envelope, phase = run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        reference_envelope, reference_phase = envelope_and_phase(np.asarray(channel))
+        eps = float(np.finfo(ctx.dtype).eps)
+        phase_error = np.abs(np.asarray(phase, dtype=np.float64) - reference_phase)
+        rms = float(np.sqrt(np.mean(np.square(reference_envelope, dtype=np.float64))))
+        return {"max_phase_error": float(phase_error.max()),
+                "phase_tolerance_ratio": float((phase_error / (tolerance + 4 * eps * np.abs(reference_phase))).max()),
+                "max_envelope_error": float(np.abs(np.asarray(envelope, dtype=np.float64) - reference_envelope).max()) / rms,
+                "tolerance": tolerance, "peak_mb": peak / 2 ** 20, "budget_mb": max_bytes / 2 ** 20}
+    yield {"check": "agreement"}, Check(agreement, lambda r: r["phase_tolerance_ratio"] <= 1
+                                        and r["max_envelope_error"] <= r["tolerance"] and r["peak_mb"] <= r["budget_mb"])
+
+def bench_server(ctx):
+    # Сервер анализа в этом процессе (рабочие процессы — по числу ядер) и клиент на Unix-сокете
+    # (без AF_UNIX — localhost TCP). Поставщик данных — SyntheticSource: каждый запрос несёт
+    # новый блок. Замер — один запрос (задержка); проверка — SERVER_PIPELINE запросов без
+    # ожидания: пропускная способность, перцентили времени на сервере, глубина очереди и
+    # совпадение огибающей и фазы с локальным расчётом
+    from interf_server import AnalysisServer
+    from interf_client import AnalysisClient
+    import socket
+    address = ("unix:" + os.path.join(ctx.workdir, "server.sock") if hasattr(socket, "AF_UNIX")
+               else "tcp:127.0.0.1:0")
+    source = SyntheticSource(ctx.sampling_rate, block_size=ctx.n_samples, carrier=ctx.sampling_rate / 20.0, seed=0)
+    blocks = [source.next_block().astype(ctx.dtype) for _ in range(SERVER_PIPELINE)]
+    server = AnalysisServer(address).warm_up().start()
+    client = AnalysisClient(server.address)
+    try:
+        yield {"mode": "round_trip"}, lambda: client.demodulate(blocks[0], sampling_rate=ctx.sampling_rate)
+        def pipelined():
+            started = time.perf_counter()
+            futures = [client.submit("demodulate", block, sampling_rate=ctx.sampling_rate) for block in blocks]
+            responses = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+            error = 0.0
+            for block, response in zip(blocks, responses):
+                envelope, phase = envelope_and_phase(block)
+                error = max(error, float(np.max(np.abs(response["envelope"] - envelope))),
+                            float(np.max(np.abs(response["phase"] - phase))))
+            metrics = client.metrics()
+            return {"requests": len(blocks), "samples_per_s": len(blocks) * ctx.n_samples / elapsed,
+                    "server_p50_ms": 1000 * metrics["total_s"]["p50"],
+                    "server_p95_ms": 1000 * metrics["total_s"]["p95"],
+                    "compute_p50_ms": 1000 * metrics["compute_s"]["p50"],
+                    "max_queue_depth": metrics["max_queue_depth"], "failed": metrics["failed"],
+                    "max_abs_error": error}
+        yield {"check": "pipelined", "in_flight": SERVER_PIPELINE}, Check(
+            pipelined, lambda r: r["failed"] == 0 and r["max_abs_error"] == 0.0)
+    finally:
+        client.close()
+        server.close()
+
+BENCHMARKS = [
+    # (имя, функция, per_recording, bytes_per_sample)
+    ("parse", bench_parse, True, 24),
+    ("demodulate", bench_demodulate, False, 64),
+    ("precompute", bench_precompute, True, 64),
+    ("update_signal", bench_update_signal, False, 96),
+    ("pipeline", bench_pipeline, True, 64),
+    ("spectrum", bench_spectrum, False, 32),
+    ("filter", bench_filter, True, 40),
+    ("peaks", bench_peaks, False, 24),
+    ("render", bench_render, False, 24),
+    ("precision", bench_precision, False, 96),
+    ("startup", bench_startup, False, 0),
+    ("jit", bench_jit, True, 64),
+    ("outofcore", bench_outofcore, False, 40),
+    ("server", bench_server, False, 8 * (2 * SERVER_PIPELINE + 8)),
+]
+
+class Skip:
+    def __init__(self, reason):
+        self.reason = reason
+
+class Check:
+    # Проверка результата вместо замера времени: fn() -> словарь метрик, passed(метрики) -> bool
+    def __init__(self, fn, passed):
+        self.fn = fn
+        self.passed = passed
+
+_qt_app = None
+
+def qt_app():
+    global _qt_app
+    if _qt_app is None:
+        from PyQt5.QtWidgets import QApplication
+        _qt_app = QApplication.instance() or QApplication([sys.argv[0]])
+    return _qt_app
+
+# ----- Запуск и отчёт -----
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def environment(args=None):
+    return {
+        "schema": SCHEMA_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "precision": args.precision if args is not None else "float64",
+    }
+
+def result_key(record):
+    return (record["name"], record["samples"], record["channels"], json.dumps(record["params"], sort_keys=True))
+
+def clear_directory(path):
+    for entry in os.listdir(path):
+        entry = os.path.join(path, entry)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            os.remove(entry)
+
+def run_benchmarks(args, log=print):
+    names = set(args.only) if args.only else None
+    results = []
+    workdir = tempfile.mkdtemp(prefix="interf_bench_")
+    try:
+        for n in args.sizes:
+            for ch in args.channels:
+                ctx = BenchContext(n, ch, args, workdir)
+                for name, bench, per_recording, bytes_per_sample in BENCHMARKS:
+                    if names is not None and name not in names:
+                        continue
+                    # Одноканальные тесты выполняются один раз на размер сигнала
+                    if not per_recording and ch != args.channels[0]:
+                        continue
+                    channels = ch if per_recording else 1
+                    base = {"name": name, "samples": n, "channels": channels}
+                    if n * channels * bytes_per_sample > args.max_bytes:
+                        results.append(dict(base, params={}, skipped="memory budget"))
+                        log(f"{name:14s} n={n:<10d} ch={channels:<3d} skipped (memory budget)")
+                        continue
+                    repeats = args.repeats if n * channels < args.long_samples else 1
+                    for params, fn in bench(ctx):
+                        record = dict(base, params=params)
+                        if isinstance(fn, Skip):
+                            record["skipped"] = fn.reason
+                            log(f"{name:14s} n={n:<10d} ch={channels:<3d} {params} skipped ({fn.reason})")
+                        elif isinstance(fn, Check):
+                            metrics = fn.fn()
+                            record.update(metrics=metrics, passed=bool(fn.passed(metrics)))
+                            log(f"{name:14s} n={n:<10d} ch={channels:<3d} {params} "
+                                f"{'passed' if record['passed'] else 'FAILED'} {metrics}")
+                        else:
+                            times = measure(fn, repeats)
+                            record.update(times=times, best=min(times), median=float(np.median(times)),
+                                          throughput=n * channels / min(times))
+                            log(f"{name:14s} n={n:<10d} ch={channels:<3d} {params} {1000 * min(times):10.2f} ms")
+                        results.append(record)
+                ctx = None
+                clear_directory(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"environment": environment(args), "results": results}
+
+def compare(report, baseline, threshold, log=print):
+    # Отношение времён (текущее / базовое); возвращает число регрессий сильнее threshold
+    old = {result_key(r): r for r in baseline["results"] if "best" in r}
+    regressions = 0
+    for record in report["results"]:
+        previous = old.get(result_key(record))
+        if previous is None or "best" not in record:
+            continue
+        ratio = record["best"] / previous["best"]
+        flag = ""
+        if ratio > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        log(f"{record['name']:14s} n={record['samples']:<10d} ch={record['channels']:<3d} "
+            f"{record['params']} x{ratio:.2f}{flag}")
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Performance benchmarks on synthetic interferograms")
+    parser.add_argument("-o", "--output", default="interf_bench.json", help="JSON report path ('-' for stdout)")
+    parser.add_argument("--sizes", type=lambda s: [int(float(v)) for v in s.split(",")], default=None,
+                        help="comma-separated sample counts (default 1e4,...,1e8)")
+    parser.add_argument("--channels", type=lambda s: [int(v) for v in s.split(",")], default=None,
+                        help="comma-separated channel counts (default 1,4,16)")
+    parser.add_argument("--only", nargs="+", choices=[b[0] for b in BENCHMARKS], help="run only these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small sizes only (1e4, 1e5; 1 and 4 channels)")
+    parser.add_argument("--repeats", type=int, default=3, help="repetitions per case (best time is reported)")
+    parser.add_argument("--long-samples", type=float, default=1e7,
+                        help="cases with at least this many samples x channels run once")
+    parser.add_argument("--max-mb", type=float, default=2048, help="skip cases estimated to need more memory")
+    parser.add_argument("--parse-max-samples", type=int, default=10 ** 6, help="largest row count for text parsing")
+    parser.add_argument("--xlsx-max-samples", type=int, default=10 ** 5, help="largest row count for .xlsx parsing")
+    parser.add_argument("--precision", default="float64", choices=list(PRECISIONS),
+                        help="floating-point precision of the benchmarked pipeline")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.sizes is None:
+        args.sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+    if args.channels is None:
+        args.channels = QUICK_CHANNELS if args.quick else DEFAULT_CHANNELS
+    args.max_bytes = int(args.max_mb * 1024 * 1024)
+    log = (lambda *a: print(*a, file=sys.stderr)) if args.output == '-' else print
+    report = run_benchmarks(args, log)
+    failed = [r for r in report["results"] if r.get("passed") is False]
+    text = json.dumps(report, indent=1)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        log(f"Report written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold, log):
+            return 1
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
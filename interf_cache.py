@@ -0,0 +1,136 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+from interf_engine import Recording, read_recording
+
+# ----- Дисковый кэш разобранных записей -----
+# Каждая запись хранится в отдельном каталоге: meta.json + по одному двоичному файлу
+# на канал. Повторное открытие отображает каналы через np.memmap без разбора текста.
+# Ключ: абсолютный путь, размер, mtime и хэш содержимого (начало, середина и конец файла).
+# Время последнего использования — mtime файла meta.json, по нему идёт LRU-вытеснение.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "interf_garik")
+DEFAULT_MAX_MB = 4096
+HASH_SAMPLE_BYTES = 1 << 20
+CACHE_VERSION = 1
+
+def _content_digest(file_path, size):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - HASH_SAMPLE_BYTES // 2), max(0, size - HASH_SAMPLE_BYTES)}):
+            f.seek(offset)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+class RecordingCache:
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or os.environ.get("INTERF_CACHE_DIR") or DEFAULT_CACHE_DIR
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("INTERF_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+    def key(self, file_path, dtype=None):
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        ident = f"{CACHE_VERSION}|{path}|{st.st_size}|{st.st_mtime_ns}|{_content_digest(path, st.st_size)}"
+        # Запись, разобранная в другой тип (float32), хранится отдельно
+        if dtype is not None:
+            ident += f"|{np.dtype(dtype).str}"
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+    def open(self, file_path, progress=None, dtype=None):
+        key = self.key(file_path, dtype)
+        recording = self.load(key, source=file_path)
+        if recording is not None:
+            if progress is not None:
+                progress(100, "Loaded from cache")
+            return recording
+        parsed = read_recording(file_path, progress=progress, dtype=dtype)
+        return self.store(key, parsed)
+    def load(self, key, source=None):
+        entry = self._entry(key)
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            channels = []
+            for name, dtype in zip(meta["files"], meta["dtypes"]):
+                if meta["length"] == 0:
+                    channels.append(np.empty(0, dtype=dtype))
+                else:
+                    channels.append(np.memmap(os.path.join(entry, name), dtype=dtype, mode='r',
+                                              shape=(meta["length"],)))
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            # Время использования для вытеснения; в кэше только для чтения не обновляется
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return Recording(meta["columns"], channels, source=source)
+    def store(self, key, recording):
+        tmp_dir = None
+        try:
+            tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+            files, dtypes = [], []
+            for i, ch in enumerate(recording.channels):
+                name = f"ch{i:03d}.bin"
+                np.ascontiguousarray(ch).tofile(os.path.join(tmp_dir, name))
+                files.append(name)
+                dtypes.append(np.dtype(ch.dtype).str)
+            meta = {"columns": recording.columns, "length": len(recording),
+                    "files": files, "dtypes": dtypes, "source": recording.source}
+            with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            entry = self._entry(key)
+            if os.path.isdir(entry):
+                # Запись уже есть: сохранена другим процессом (попадание) или испорчена (удаляется)
+                cached = self.load(key, source=recording.source)
+                if cached is not None:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    return cached
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_dir, entry)
+        except OSError:
+            # Запись в кэш не удалась (каталог только для чтения, кэш занят другим процессом) —
+            # работаем без него
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            return recording
+        self.evict(keep=key)
+        return self.load(key, source=recording.source) or recording
+    def entries(self):
+        # (время последнего использования, размер в байтах, ключ)
+        result = []
+        for key in os.listdir(self.root):
+            entry = self._entry(key)
+            meta_path = os.path.join(entry, "meta.json")
+            if key.startswith(".") or not os.path.isfile(meta_path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+                result.append((os.path.getmtime(meta_path), size, key))
+            except FileNotFoundError:
+                # Запись удалена параллельным процессом (вытеснение в пакетной обработке)
+                continue
+        return result
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+    def evict(self, keep=None):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+    def clear(self):
+        for _, _, key in self.entries():
+            shutil.rmtree(self._entry(key), ignore_errors=True)
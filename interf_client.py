@@ -0,0 +1,203 @@
+import os
+import json
+import socket
+import struct
+import tempfile
+import threading
+import itertools
+from contextlib import nullcontext
+from concurrent.futures import Future
+import numpy as np
+
+# ----- Клиент сервера анализа (interf_server) и формат сообщений -----
+# Сообщение: длина заголовка (4 байта, big-endian), заголовок JSON, затем байты массивов
+# подряд в порядке header["arrays"] = [{"name", "dtype", "shape"}, ...]. Массивы
+# отправляются из своей памяти (memoryview, без tobytes) и принимаются recv_into прямо в
+# выделенный np.empty, поэтому сигнал не проходит через промежуточные копии и кодирование.
+# Клиент не зависит от scipy и Qt: его можно подключать к скриптам сбора данных.
+#   with AnalysisClient() as client:
+#       result = client.demodulate(signal, sampling_rate=1e4, spectrum=True)
+#       result["envelope"], result["phase"], result["frequency"], result["amplitude"]
+# Запросы можно отправлять без ожидания (submit → Future): ответы приходят по мере
+# готовности и сопоставляются по id.
+
+MAX_HEADER_BYTES = 1 << 20
+_PREFIX = struct.Struct(">I")
+
+def default_address():
+    # INTERF_SERVER, иначе Unix-сокет во временном каталоге (или localhost TCP без AF_UNIX)
+    address = os.environ.get("INTERF_SERVER")
+    if address:
+        return address
+    if hasattr(socket, "AF_UNIX"):
+        return "unix:" + os.path.join(tempfile.gettempdir(), "interf_garik.sock")
+    return "tcp:127.0.0.1:8765"
+
+def parse_address(address):
+    # "unix:/путь", "/путь" — Unix-сокет; "tcp:хост:порт", "хост:порт" — TCP
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("/"):
+        return socket.AF_UNIX, address
+    if address.startswith("tcp:"):
+        address = address[len("tcp:"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid server address: {address}")
+    return socket.AF_INET, (host, int(port))
+
+def _recv_exact(sock, view):
+    while len(view):
+        received = sock.recv_into(view)
+        if received == 0:
+            raise ConnectionError("Connection closed in the middle of a message")
+        view = view[received:]
+
+def _send_buffers(sock, buffers):
+    # Заголовок и массивы одним вызовом sendmsg (scatter-gather), с досылкой остатка
+    buffers = [view for view in (memoryview(b).cast('B') for b in buffers) if len(view)]
+    if not hasattr(sock, "sendmsg"):
+        for buffer in buffers:
+            sock.sendall(buffer)
+        return
+    while buffers:
+        sent = sock.sendmsg(buffers)
+        while sent:
+            if sent >= len(buffers[0]):
+                sent -= len(buffers.pop(0))
+            else:
+                buffers[0] = buffers[0][sent:]
+                sent = 0
+
+def send_message(sock, header, arrays=None, lock=None):
+    # arrays — {имя: массив}; несмежные массивы копируются, остальные уходят как есть.
+    # Возвращает размер сообщения в байтах
+    arrays = {name: np.ascontiguousarray(value) for name, value in (arrays or {}).items()}
+    header = dict(header, arrays=[{"name": name, "dtype": value.dtype.str, "shape": list(value.shape)}
+                                  for name, value in arrays.items()])
+    encoded = json.dumps(header).encode('utf-8')
+    with lock if lock is not None else nullcontext():
+        _send_buffers(sock, [_PREFIX.pack(len(encoded)) + encoded] + list(arrays.values()))
+    return _PREFIX.size + len(encoded) + sum(value.nbytes for value in arrays.values())
+
+def recv_message(sock):
+    # (заголовок, {имя: массив}, байт) или None, если соединение закрыто между сообщениями
+    prefix = bytearray(_PREFIX.size)
+    first = sock.recv_into(prefix)
+    if first == 0:
+        return None
+    _recv_exact(sock, memoryview(prefix)[first:])
+    length = _PREFIX.unpack(prefix)[0]
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Message header too large: {length} bytes")
+    encoded = bytearray(length)
+    _recv_exact(sock, memoryview(encoded))
+    header = json.loads(encoded.decode('utf-8'))
+    arrays = {}
+    size = _PREFIX.size + length
+    for spec in header.get("arrays", []):
+        value = np.empty(spec["shape"], dtype=np.dtype(spec["dtype"]))
+        if value.nbytes:
+            _recv_exact(sock, memoryview(value).cast('B'))
+        arrays[spec["name"]] = value
+        size += value.nbytes
+    return header, arrays, size
+
+class ServerError(RuntimeError):
+    pass
+
+class Response:
+    # Массивы ответа (result["envelope"]), сведения о сигнале (attrs) и времена этапов на сервере
+    def __init__(self, arrays, attrs, timing):
+        self.arrays = arrays
+        self.attrs = attrs
+        self.timing = timing
+    def __getitem__(self, name):
+        return self.arrays[name]
+    def __contains__(self, name):
+        return name in self.arrays
+    def keys(self):
+        return self.arrays.keys()
+
+class AnalysisClient:
+    def __init__(self, address=None, timeout=None, connect_timeout=10.0):
+        # timeout — ожидание ответа в call (None — без ограничения)
+        family, target = parse_address(address or default_address())
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(connect_timeout)
+        self.sock.connect(target)
+        # Ответы читает отдельный поток; блокирующее ожидание — только в Future.result
+        self.sock.settimeout(None)
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, name="interf-client", daemon=True)
+        self._reader.start()
+    def _read(self):
+        error = ConnectionError("Connection closed")
+        try:
+            while True:
+                message = recv_message(self.sock)
+                if message is None:
+                    break
+                header, arrays, _ = message
+                with self._lock:
+                    future = self._pending.pop(header.get("id"), None)
+                if future is None:
+                    continue
+                if header.get("ok"):
+                    future.set_result(Response(arrays, header.get("attrs", {}), header.get("timing", {})))
+                else:
+                    future.set_exception(ServerError(header.get("error", "Unknown server error")))
+        except (OSError, ValueError) as e:
+            error = e
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+    def submit(self, op, signal=None, path=None, **params):
+        # Сигнал — массивом или путём к файлу записи на стороне сервера (+ channel)
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        header = {"id": request_id, "op": op, "params": params}
+        if path is not None:
+            header["path"] = os.path.abspath(path)
+        try:
+            send_message(self.sock, header, {"signal": signal} if signal is not None else None, self._send_lock)
+        except OSError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise
+        return future
+    def call(self, op, signal=None, path=None, **params):
+        return self.submit(op, signal, path, **params).result(self.timeout)
+    def demodulate(self, signal=None, path=None, **params):
+        # params: channel, sampling_rate, filter={"type": ..., параметры}, spectrum=True, n_zeros,
+        # window, fast_length, band=[от Гц, до Гц, частот], precision
+        return self.call("demodulate", signal, path, **params)
+    def spectrum(self, signal=None, path=None, **params):
+        return self.call("spectrum", signal, path, **params)
+    def filter(self, signal=None, path=None, **params):
+        return self.call("filter", signal, path, **params)
+    def metrics(self):
+        return self.call("metrics").attrs
+    def ping(self):
+        return self.call("ping").attrs
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self._reader.join(timeout=5)
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+        return False
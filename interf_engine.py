@@ -0,0 +1,163 @@
+import numpy as np
+
+from interf_textio import read_text_columns
+from interf_rawio import RAW_EXTENSIONS, read_raw
+from interf_trace import span, traced
+from interf_precision import analytic_signal as _analytic_signal, working_dtype
+from interf_kernels import angle_unwrap
+
+# ----- Вычислительное ядро без зависимостей от Qt -----
+# Все этапы обработки сигнала интерферометра вынесены сюда, чтобы их можно было
+# вызывать как из GUI, так и из пакетной обработки (interf_batch.py).
+
+SUPPORTED_EXTENSIONS = ('.txt', '.csv', '.xlsx') + RAW_EXTENSIONS
+
+# Необязательный аргумент progress(percent, message) позволяет сообщать о ходе работы;
+# вызывающая сторона может выбросить из него исключение, чтобы прервать обработку.
+def _report(progress, percent, message):
+    if progress is not None:
+        progress(percent, message)
+
+# ----- Запись: набор одномерных массивов-каналов -----
+# Каналы хранятся по отдельности (в том числе как np.memmap из кэша или каналы двоичной
+# записи interf_rawio), поэтому виджеты получают представления без копирования, а не
+# полный DataFrame. sampling_rate — частота дискретизации из файла, если он её содержит.
+class Recording:
+    def __init__(self, columns, channels, source=None, sampling_rate=None):
+        self.columns = [str(c) for c in columns]
+        self.channels = list(channels)
+        self.source = source
+        self.sampling_rate = sampling_rate
+    @classmethod
+    def from_frame(cls, frame, source=None):
+        channels = []
+        for i in range(frame.shape[1]):
+            column = frame.iloc[:, i]
+            if not np.issubdtype(column.dtype, np.number):
+                raise ValueError(f"Non-numeric data detected in column {frame.columns[i]}")
+            channels.append(column.to_numpy())
+        return cls(frame.columns, channels, source)
+    def __len__(self):
+        return len(self.channels[0]) if self.channels else 0
+    @property
+    def n_channels(self):
+        return len(self.channels)
+    @property
+    def dtype(self):
+        return self.channels[0].dtype
+    @property
+    def nbytes(self):
+        return sum(ch.nbytes for ch in self.channels)
+    def channel(self, index):
+        return self.channels[index]
+    def stack(self, channels=None, dtype=None):
+        # Каналы одним 2-D массивом (отсчёты × каналы) для векторной обработки;
+        # по умолчанию float32 для записи в float32, иначе float64
+        if dtype is None:
+            dtype = working_dtype(self.dtype) if self.channels else np.float64
+        if channels is None:
+            channels = range(self.n_channels)
+        block = np.empty((len(self), len(channels)), dtype=dtype, order='F')
+        for j, ch in enumerate(channels):
+            channel = self.channels[ch]
+            if hasattr(channel, "read_into"):
+                # Канал двоичной записи масштабируется прямо в столбец
+                channel.read_into(block[:, j])
+            else:
+                block[:, j] = channel
+        return block
+    @classmethod
+    def from_array(cls, columns, block, source=None, sampling_rate=None):
+        # Столбцы F-массива — непрерывные представления без копирования
+        block = np.asfortranarray(block)
+        return cls(columns, [block[:, j] for j in range(block.shape[1])], source, sampling_rate)
+
+# ----- Чтение файла записи -----
+def read_table(file_path, progress=None):
+    import pandas as pd
+    _report(progress, 0, "Parsing file")
+    lower = file_path.lower()
+    if lower.endswith('.csv'):
+        data = pd.read_csv(file_path)
+    elif lower.endswith('.xlsx'):
+        data = pd.read_excel(file_path)
+    elif lower.endswith('.txt'):
+        try:
+            data = pd.read_csv(file_path, sep=r'\s+', header=None)
+        except Exception:
+            data = pd.DataFrame(np.loadtxt(file_path))
+    else:
+        data = pd.read_csv(file_path)
+    if data.empty:
+        raise ValueError("File is empty")
+    if not np.issubdtype(data.iloc[:, 0].dtype, np.number):
+        raise ValueError("Non-numeric data detected")
+    _report(progress, 100, "File parsed")
+    return data
+
+@traced("parse", "io")
+def read_recording(file_path, progress=None, dtype=None, usecols=None):
+    # .txt читается потоково сразу в массивы каналов, минуя DataFrame;
+    # двоичные записи отображаются с диска (interf_rawio)
+    if file_path.lower().endswith(RAW_EXTENSIONS):
+        columns, channels, sampling_rate = read_raw(file_path, dtype=dtype, progress=progress)
+        if usecols is not None:
+            keep = sorted(set(usecols))
+            columns, channels = [columns[i] for i in keep], [channels[i] for i in keep]
+        _report(progress, 100, "File mapped")
+        return Recording(columns, channels, source=file_path, sampling_rate=sampling_rate)
+    if file_path.lower().endswith('.txt'):
+        columns, values = read_text_columns(file_path, usecols=usecols, dtype=np.float64 if dtype is None else dtype,
+                                            progress=progress)
+        _report(progress, 100, "File parsed")
+        return Recording(columns, [values[:, i] for i in range(values.shape[1])], source=file_path)
+    data = read_table(file_path, progress=progress)
+    if usecols is not None:
+        data = data.iloc[:, sorted(set(usecols))]
+    recording = Recording.from_frame(data, source=file_path)
+    if dtype is not None:
+        recording.channels = [ch.astype(dtype, copy=False) for ch in recording.channels]
+    return recording
+
+def load_recording(file_path, cache=None, progress=None, dtype=None):
+    # С кэшем (interf_cache.RecordingCache) повторное открытие обходится без разбора текста;
+    # dtype=np.float32 — режим пониженной точности (interf_precision). Двоичные записи
+    # и так отображаются с диска без разбора, кэш им не нужен
+    if cache is not None and not file_path.lower().endswith(RAW_EXTENSIONS):
+        return cache.open(file_path, progress=progress, dtype=dtype)
+    return read_recording(file_path, progress=progress, dtype=dtype)
+
+# ----- Этапы демодуляции -----
+@traced("hilbert", "compute")
+def analytic_signal(signal):
+    # complex64 для float32, complex128 для остальных типов
+    return _analytic_signal(signal)
+
+@traced("envelope", "compute")
+def envelope(analytic):
+    return np.abs(analytic)
+
+def unwrapped_phase(analytic):
+    # np.angle и развёртка; с numba — одним проходом (interf_kernels)
+    with span("unwrap", "compute"):
+        return angle_unwrap(analytic)
+
+def time_axis(n_samples, sampling_rate):
+    return np.arange(n_samples) / sampling_rate
+
+def envelope_and_phase(signal, progress=None):
+    # Огибающая и развёрнутая фаза от номера отсчёта: частота дискретизации нужна только оси времени
+    if signal.size == 0:
+        return np.array([]), np.array([])
+    _report(progress, 0, "Hilbert transform")
+    analytic = analytic_signal(signal)
+    _report(progress, 50, "Envelope")
+    demodulated_signal = envelope(analytic)
+    _report(progress, 60, "Phase unwrapping")
+    return demodulated_signal, unwrapped_phase(analytic)
+
+def demodulate(signal, sampling_rate, progress=None):
+    # Возвращает (огибающая, развёрнутая фаза, ось времени)
+    demodulated_signal, instantaneous_phase = envelope_and_phase(signal, progress)
+    _report(progress, 90, "Time axis")
+    return demodulated_signal, instantaneous_phase, time_axis(len(signal), sampling_rate)
@@ -0,0 +1,244 @@
+import os
+import json
+import multiprocessing
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# ----- Экспорт результатов: числовые массивы и графики -----
+# Массивы (сигнал, огибающая, фаза, спектр...) пишутся в сжатый двоичный контейнер:
+#   .npz      — всегда доступен (zip + deflate);
+#   .h5/.hdf5 — при наличии h5py: блоки по chunk_rows строк, gzip + shuffle;
+#   .parquet  — при наличии pyarrow: zstd, группы строк по chunk_rows; массивы разной
+#               длины (ряды во времени и спектр) идут в отдельные файлы <имя>-<массив>.parquet.
+# Графики описываются словарём (figure spec) с уже прореженными рядами и рисуются
+# pyqtgraph без дисплея (QT_QPA_PLATFORM=offscreen) в отдельных процессах, поэтому
+# экспорт PNG/SVG не блокирует GUI и идёт параллельно.
+# h5py и pyarrow импортируются только при записи: для списка форматов достаточно
+# проверить, что пакет установлен.
+
+DEFAULT_CHUNK_ROWS = 1 << 20
+COMPRESSION_LEVEL = 4
+FIGURE_WIDTH = 1920
+FIGURE_HEIGHT = 1080
+FIGURE_POINTS = 4000
+
+def _available(package):
+    return importlib.util.find_spec(package) is not None
+
+def data_formats():
+    # Доступные контейнеры: (подпись для диалога, расширение)
+    formats = [("NumPy Archive (*.npz)", ".npz")]
+    if _available("h5py"):
+        formats.append(("HDF5 (*.h5 *.hdf5)", ".h5"))
+    if _available("pyarrow"):
+        formats.append(("Parquet (*.parquet)", ".parquet"))
+    return formats
+
+def format_of(file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in ('.h5', '.hdf5'):
+        return 'hdf5'
+    if ext == '.parquet':
+        return 'parquet'
+    if ext == '.npz':
+        return 'npz'
+    raise ValueError(f"Unsupported export format: {ext or file_path}")
+
+def export_arrays(file_path, arrays, attrs=None, chunk_rows=DEFAULT_CHUNK_ROWS, level=COMPRESSION_LEVEL):
+    # arrays — {имя: массив}; attrs — сведения о записи (JSON-совместимые значения)
+    fmt = format_of(file_path)
+    attrs = dict(attrs or {})
+    if fmt == 'hdf5':
+        if not _available("h5py"):
+            raise RuntimeError("HDF5 export requires h5py")
+        return _export_hdf5(file_path, arrays, attrs, chunk_rows, level)
+    if fmt == 'parquet':
+        if not _available("pyarrow"):
+            raise RuntimeError("Parquet export requires pyarrow")
+        return _export_parquet(file_path, arrays, attrs, chunk_rows)
+    np.savez_compressed(file_path, attrs=np.array(json.dumps(attrs)),
+                        **{name: np.asarray(values) for name, values in arrays.items()})
+    return [file_path]
+
+def _export_hdf5(file_path, arrays, attrs, chunk_rows, level):
+    import h5py
+    with h5py.File(file_path, 'w') as f:
+        for key, value in attrs.items():
+            # У атрибутов HDF5 нет None: необязательное поле без значения не записывается
+            if value is not None:
+                f.attrs[key] = value
+        for name, values in arrays.items():
+            values = np.asarray(values)
+            if values.size == 0 or values.dtype.kind in 'OUS':
+                f.create_dataset(name, data=values)
+                continue
+            chunks = (min(chunk_rows, len(values)),) + values.shape[1:]
+            dataset = f.create_dataset(name, shape=values.shape, dtype=values.dtype, chunks=chunks,
+                                       compression='gzip', compression_opts=level, shuffle=True)
+            # Запись блоками: np.memmap не читается в память целиком
+            for start in range(0, len(values), chunk_rows):
+                dataset[start:start + chunk_rows] = values[start:start + chunk_rows]
+    return [file_path]
+
+def _export_parquet(file_path, arrays, attrs, chunk_rows):
+    import pyarrow
+    import pyarrow.parquet
+    groups = {}
+    for name, values in arrays.items():
+        values = np.asarray(values)
+        if values.ndim == 2:
+            for j in range(values.shape[1]):
+                groups.setdefault(len(values), {})[f"{name}_{j}"] = values[:, j]
+        else:
+            groups.setdefault(len(values), {})[name] = values
+    stem, ext = os.path.splitext(file_path)
+    written = []
+    # Самая длинная группа — основной файл, остальные рядом с ним
+    for i, (_, columns) in enumerate(sorted(groups.items(), key=lambda item: -item[0])):
+        path = file_path if i == 0 else f"{stem}-{next(iter(columns))}{ext}"
+        table = pyarrow.table({name: np.ascontiguousarray(values) for name, values in columns.items()})
+        table = table.replace_schema_metadata({"interf": json.dumps(attrs)})
+        pyarrow.parquet.write_table(table, path, compression='zstd', row_group_size=chunk_rows)
+        written.append(path)
+    return written
+
+def demodulation_arrays(signal, envelope, phase, time, frequency=None, amplitude=None):
+    # Набор массивов одного канала; имена совпадают с результатами пакетной обработки
+    arrays = {"time": time, "signal": signal, "envelope": envelope, "phase": phase}
+    if frequency is not None:
+        arrays["frequency"] = frequency
+        arrays["amplitude"] = amplitude
+    return arrays
+
+# ----- Описание графика для отрисовки в другом процессе -----
+def decimate(y, x=None, max_points=FIGURE_POINTS):
+    # Прореживание min/max (interf_lod): форма сигнала и его экстремумы сохраняются
+    from interf_lod import pyramid_for
+    y = np.asarray(y)
+    idx, values = pyramid_for(y).query(0, len(y), max_points)
+    if x is None:
+        return idx.astype(np.float64), values
+    x = np.asarray(x)
+    if len(x) > 1:
+        return x[0] + idx * (x[1] - x[0]), values
+    return np.asarray(idx, dtype=np.float64), values
+
+def series(y, x=None, color='#00FF00', width=2, label=None, symbol=None, max_points=FIGURE_POINTS):
+    x, y = decimate(y, x, max_points) if symbol is None else (np.asarray(x), np.asarray(y))
+    return {"x": x, "y": y, "color": color, "width": width, "label": label, "symbol": symbol}
+
+def figure_spec(series_list, title="", xlabel="", ylabel="", xunits=None, yunits=None,
+                background='k', width=FIGURE_WIDTH, height=FIGURE_HEIGHT, x_range=None, y_range=None):
+    return {"series": series_list, "title": title, "xlabel": xlabel, "ylabel": ylabel, "xunits": xunits,
+            "yunits": yunits, "background": background, "width": width, "height": height,
+            "x_range": x_range, "y_range": y_range}
+
+def demodulation_figures(signal, sampling_rate, envelope, phase, time, frequency=None, amplitude=None):
+    # Те же три графика, что во вкладке Demodulation: исходный сигнал, спектр огибающей, фаза
+    figures = {
+        "original": figure_spec([series(signal, color='#00FF00')], "Original Signal", "Sample Index", "Amplitude"),
+        "phase": figure_spec([series(phase, time, color='#00FFFF')], "Phase vs Time", "Time (s)",
+                             "Phase (radians)"),
+    }
+    if frequency is not None:
+        figures["spectrum"] = figure_spec([series(amplitude, frequency, color='#00FFFF')], "Spectrum",
+                                          "Frequency (Hz)", "Amplitude")
+    return figures
+
+def spec_from_plot(plot_widget, width=FIGURE_WIDTH, height=FIGURE_HEIGHT):
+    # Снимок того, что сейчас показано на графике pyqtgraph (кривые уже прорежены interf_lod)
+    plot_item = plot_widget.getPlotItem()
+    series_list = []
+    for item in plot_item.listDataItems():
+        x, y = item.getData()
+        if x is None or len(x) == 0:
+            continue
+        pen = item.opts.get('pen')
+        color = _color_name(pen.color()) if hasattr(pen, 'color') else (pen or '#00FF00')
+        symbol = item.opts.get('symbol')
+        if symbol is not None:
+            brush = item.opts.get('symbolBrush')
+            color = _color_name(brush.color()) if hasattr(brush, 'color') else (brush or '#FF4040')
+        series_list.append({"x": np.array(x), "y": np.array(y), "color": color,
+                            "width": pen.widthF() if hasattr(pen, 'widthF') else 1, "label": item.name(),
+                            "symbol": symbol})
+    view_range = plot_item.getViewBox().viewRange()
+    return figure_spec(series_list, title=plot_item.titleLabel.text,
+                       xlabel=plot_item.getAxis('bottom').labelText, ylabel=plot_item.getAxis('left').labelText,
+                       xunits=plot_item.getAxis('bottom').labelUnits or None,
+                       yunits=plot_item.getAxis('left').labelUnits or None,
+                       width=width, height=height, x_range=list(view_range[0]), y_range=list(view_range[1]))
+
+def _color_name(color):
+    return color.name() if color is not None else '#FFFFFF'
+
+# ----- Отрисовка в рабочем процессе -----
+_qt_app = None
+
+def init_render_worker():
+    # Инициализатор процесса: Qt без дисплея, одно QApplication на процесс
+    global _qt_app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    _qt_app = QApplication.instance() or QApplication(["interf-render"])
+
+def render_figure(spec, file_path):
+    if _qt_app is None:
+        init_render_worker()
+    import pyqtgraph as pg
+    import pyqtgraph.exporters as exporters
+    plot = pg.PlotWidget(title=spec["title"] or None)
+    plot.setBackground(spec["background"])
+    plot.resize(spec["width"], spec["height"])
+    plot.showGrid(x=True, y=True)
+    plot.setLabel('bottom', spec["xlabel"], units=spec["xunits"])
+    plot.setLabel('left', spec["ylabel"], units=spec["yunits"])
+    if any(s["label"] for s in spec["series"]):
+        plot.addLegend()
+    for s in spec["series"]:
+        if s["symbol"] is None:
+            plot.plot(s["x"], s["y"], pen=pg.mkPen(s["color"], width=s["width"]), name=s["label"])
+        else:
+            plot.plot(s["x"], s["y"], pen=None, symbol=s["symbol"], symbolBrush=s["color"], symbolPen=None,
+                      name=s["label"])
+    if spec["x_range"] is not None:
+        plot.setXRange(*spec["x_range"], padding=0)
+    if spec["y_range"] is not None:
+        plot.setYRange(*spec["y_range"], padding=0)
+    # Раскладка применяется только к показанному виджету; на экран он не выводится
+    from PyQt5.QtCore import Qt
+    plot.setAttribute(Qt.WA_DontShowOnScreen)
+    plot.show()
+    _qt_app.processEvents()
+    if file_path.lower().endswith('.svg'):
+        exporter = exporters.SVGExporter(plot.plotItem)
+    else:
+        exporter = exporters.ImageExporter(plot.plotItem)
+        exporter.parameters()['width'] = spec["width"]
+    exporter.export(file_path)
+    plot.close()
+    return file_path
+
+_render_pool = None
+
+def render_pool(max_workers=None):
+    # Общий пул процессов отрисовки; spawn — Qt нельзя наследовать через fork
+    global _render_pool
+    if _render_pool is None:
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        _render_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=init_render_worker)
+    return _render_pool
+
+def render_figures(jobs, pool=None):
+    # jobs — [(spec, путь)]; возвращает список futures
+    pool = pool or render_pool()
+    return [pool.submit(render_figure, spec, path) for spec, path in jobs]
+
+def shutdown_render_pool():
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
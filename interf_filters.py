@@ -0,0 +1,94 @@
+import numpy as np
+
+from interf_trace import traced
+from interf_precision import working_dtype
+from interf_kernels import running_mean
+
+# ----- Фильтры сглаживания для всех каналов сразу -----
+# Вход — 2-D массив (отсчёты × каналы), фильтрация идёт по axis=0 одним вызовом.
+#   Moving Average  — через кумулятивные суммы, O(N) независимо от ширины окна;
+#                     результат совпадает с np.convolve(x, ones(w)/w, mode='same').
+#   Gaussian        — ядро ±truncate·σ; прямая свёртка для коротких ядер и
+#                     overlap-add FFT (oaconvolve) для длинных.
+#   Savitzky-Golay  — savgol_filter; для длинных окон центральная часть считается
+#                     FFT-свёрткой с коэффициентами savgol_coeffs, края — как в mode='interp'.
+# float32 на входе даёт float32 на выходе (ядра приводятся к типу сигнала); суммы
+# скользящего среднего копятся в float64, чтобы ошибка не росла с длиной записи.
+
+FILTER_TYPES = ['Moving Average', 'Gaussian', 'Savitzky-Golay']
+# Длина ядра, начиная с которой свёртка выполняется через FFT
+FFT_KERNEL_THRESHOLD = 64
+
+def as_2d(x):
+    x = np.asarray(x)
+    x = x.astype(working_dtype(x.dtype), copy=False)
+    return x[:, None] if x.ndim == 1 else x
+
+def moving_average(x, window):
+    x = as_2d(x)
+    window = int(window)
+    if window < 1:
+        raise ValueError("Window size must be positive")
+    return running_mean(x, window)
+
+def convolve_same(x, kernel):
+    # Свёртка по axis=0 с нулевыми краями и центрированным ядром нечётной длины
+    x = as_2d(x)
+    kernel = np.asarray(kernel, dtype=x.dtype)
+    if len(kernel) >= FFT_KERNEL_THRESHOLD:
+        from scipy.signal import oaconvolve
+        return oaconvolve(x, kernel[:, None], mode='same', axes=0)
+    from scipy.ndimage import convolve1d
+    return convolve1d(x, kernel, axis=0, mode='constant', cval=0.0)
+
+def gaussian_kernel(sigma, truncate=4.0):
+    radius = max(1, int(truncate * sigma + 0.5))
+    t = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (t / sigma) ** 2)
+    return kernel / kernel.sum()
+
+def gaussian(x, sigma, truncate=4.0):
+    if sigma <= 0:
+        raise ValueError("Sigma must be positive")
+    return convolve_same(x, gaussian_kernel(sigma, truncate))
+
+def savitzky_golay(x, window, polyorder=3):
+    from scipy.signal import savgol_filter, savgol_coeffs
+    x = as_2d(x)
+    window = int(window)
+    if window % 2 == 0:
+        window += 1
+    if polyorder >= window:
+        raise ValueError("Polynomial order must be less than the window size")
+    if window > len(x):
+        raise ValueError("Window size exceeds signal length")
+    if window < FFT_KERNEL_THRESHOLD:
+        return savgol_filter(x, window, polyorder, axis=0, mode='interp').astype(x.dtype, copy=False)
+    out = convolve_same(x, savgol_coeffs(window, polyorder, use='conv'))
+    half = window // 2
+    # Края: в режиме 'interp' они зависят только от первых/последних window отсчётов
+    out[:half] = savgol_filter(x[:window], window, polyorder, axis=0, mode='interp')[:half]
+    out[-half:] = savgol_filter(x[-window:], window, polyorder, axis=0, mode='interp')[-half:]
+    return out
+
+def parse_filter_params(filter_type, text):
+    # "окно[, σ]" для Gaussian (по умолчанию σ = окно / 6), "окно[, порядок]" для Savitzky-Golay
+    values = [float(v) for v in text.replace(';', ',').split(',') if v.strip()]
+    if not values:
+        raise ValueError("Filter parameters are empty")
+    window = int(values[0])
+    if filter_type == 'Gaussian':
+        return {'sigma': values[1] if len(values) > 1 else window / 6.0}
+    if filter_type == 'Savitzky-Golay':
+        return {'window': window, 'polyorder': int(values[1]) if len(values) > 1 else 3}
+    return {'window': window}
+
+@traced("filter", "compute")
+def apply_filter(x, filter_type, **params):
+    if filter_type == 'Moving Average':
+        return moving_average(x, params['window'])
+    if filter_type == 'Gaussian':
+        return gaussian(x, params['sigma'])
+    if filter_type == 'Savitzky-Golay':
+        return savitzky_golay(x, params['window'], params.get('polyorder', 3))
+    raise ValueError(f"Unknown filter type: {filter_type}")
@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from interf_trace import traced
+from interf_kernels import local_maxima
+
+# ----- Поиск пиков и счёт интерференционных полос для длинных записей -----
+# Запись делится на участки по chunk_size отсчётов; каждый участок читается с полями
+# margin с обеих сторон, пики ищутся в расширенном участке, а сохраняются только те,
+# что лежат в его основной части, — так каждый пик попадает ровно в один участок. Плато
+# (равные соседние отсчёты), пересекающее край расширенного участка, дочитывается до конца
+# вместе с соседним отсчётом: пик плато — его середина, как в scipy, — определяется целиком.
+# Выступ (prominence), посчитанный внутри участка, не больше истинного: если поиск
+# основания дошёл до края участка, а не до более высокого отсчёта, выступ такого пика
+# досчитывается по всей записи. Результат совпадает с scipy.signal.find_peaks
+# (height, prominence, wlen) на всей записи; участки считаются в пуле потоков
+# (код поиска пиков scipy отпускает GIL).
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_CHUNK = 1 << 22
+DEFAULT_MARGIN = 1 << 16
+
+class FringeResult:
+    def __init__(self, peaks, heights, prominences, n_samples, sampling_rate):
+        self.peaks = peaks                  # индексы пиков
+        self.heights = heights              # значения сигнала в пиках
+        self.prominences = prominences      # выступы пиков (None, если не запрашивались)
+        self.n_samples = n_samples
+        self.sampling_rate = sampling_rate
+    @property
+    def count(self):
+        return len(self.peaks)
+    def at_rate(self, sampling_rate):
+        # Пики заданы индексами отсчётов: другая частота дискретизации меняет только перевод во время
+        return FringeResult(self.peaks, self.heights, self.prominences, self.n_samples, sampling_rate)
+    @property
+    def duration(self):
+        return self.n_samples / self.sampling_rate
+    @property
+    def mean_rate(self):
+        return self.count / self.duration if self.n_samples else 0.0
+    def cumulative(self, times):
+        # Число полос, прошедших к моментам times
+        return np.searchsorted(self.peaks, np.asarray(times) * self.sampling_rate, side='right')
+    def rate(self, bin_seconds=None, max_bins=2000):
+        # Частота полос (Гц) по интервалам bin_seconds; возвращает (центры интервалов, частота)
+        if bin_seconds is None:
+            bin_seconds = max(self.duration / max_bins, 1.0 / self.sampling_rate)
+        bin_size = max(1, int(round(bin_seconds * self.sampling_rate)))
+        n_bins = max(1, -(-self.n_samples // bin_size))
+        counts = np.bincount(self.peaks // bin_size, minlength=n_bins)[:n_bins]
+        # Последний интервал может быть неполным
+        widths = np.full(n_bins, bin_size, dtype=np.float64)
+        widths[-1] = self.n_samples - (n_bins - 1) * bin_size
+        times = (np.arange(n_bins) * bin_size + widths / 2.0) / self.sampling_rate
+        return times, counts / (widths / self.sampling_rate)
+
+def _side_min(x, peak, height, step, limit, chunk):
+    # Минимум x от пика до первого более высокого отсчёта (или до limit) в направлении step
+    lowest = height
+    pos = peak
+    while pos != limit:
+        if step < 0:
+            lo = max(limit, pos - chunk)
+            seg = np.asarray(x[lo:pos], dtype=np.float64)[::-1]
+        else:
+            hi = min(limit, pos + chunk)
+            seg = np.asarray(x[pos + 1:hi + 1], dtype=np.float64)
+        higher = np.flatnonzero(seg > height)
+        if higher.size:
+            seg = seg[:higher[0]]
+            if seg.size:
+                lowest = min(lowest, seg.min())
+            break
+        lowest = min(lowest, seg.min())
+        pos = lo if step < 0 else hi
+        chunk *= 2
+    return lowest
+
+def _global_prominence(x, peak, wlen, chunk):
+    n = len(x)
+    height = float(x[peak])
+    left, right = 0, n - 1
+    if wlen is not None:
+        left = max(left, peak - wlen // 2)
+        right = min(right, peak + wlen // 2)
+    return height - max(_side_min(x, peak, height, -1, left, chunk),
+                        _side_min(x, peak, height, 1, right, chunk))
+
+def _plateau_edge(x, pos, step, chunk=1024):
+    # Первый индекс от pos в направлении step, где значение отличается от x[pos]
+    # (или край записи: -1 / len(x))
+    n = len(x)
+    value = x[pos]
+    while True:
+        if step < 0:
+            lo = max(0, pos - chunk)
+            seg = np.asarray(x[lo:pos])[::-1]
+        else:
+            hi = min(n, pos + 1 + chunk)
+            seg = np.asarray(x[pos + 1:hi])
+        other = np.flatnonzero(seg != value)
+        if other.size:
+            return pos + step * (int(other[0]) + 1)
+        if not seg.size or (lo == 0 if step < 0 else hi == n):
+            return -1 if step < 0 else n
+        pos = lo if step < 0 else hi - 1
+        chunk *= 2
+
+def _process_chunk(x, start, stop, margin, height, prominence, wlen):
+    from scipy.signal import peak_prominences
+    n = len(x)
+    lo = max(0, start - margin)
+    hi = min(n, stop + margin)
+    # Края участка не разрезают плато: участок дочитывается до первого отсчёта, отличного
+    # от крайнего (плато из одного отсчёта — на один отсчёт)
+    if lo > 0:
+        lo = max(0, _plateau_edge(x, lo, -1))
+    if hi < n:
+        hi = min(n, _plateau_edge(x, hi - 1, 1) + 1)
+    block = np.asarray(x[lo:hi], dtype=np.float64)
+    peaks = local_maxima(block, height)
+    peaks = peaks[(peaks >= start - lo) & (peaks < stop - lo)]
+    heights = block[peaks]
+    if prominence is None or len(peaks) == 0:
+        return peaks + lo, heights, None
+    prominences = peak_prominences(block, peaks, wlen=wlen)[0]
+    # Пики, у которых поиск основания мог выйти за пределы участка
+    reach = wlen // 2 if wlen is not None else n
+    open_left = (peaks - reach < 0) & (lo > 0)
+    open_right = (peaks + reach > len(block) - 1) & (hi < n)
+    if open_left.any():
+        before = np.maximum.accumulate(block)
+        open_left &= before[peaks - 1] <= heights
+    if open_right.any():
+        after = np.maximum.accumulate(block[::-1])[::-1]
+        open_right &= after[np.minimum(peaks + 1, len(block) - 1)] <= heights
+    open_ = np.flatnonzero(open_left | open_right)
+    for k in open_:
+        prominences[k] = _global_prominence(x, int(peaks[k]) + lo, wlen, max(margin, 1024))
+    return peaks + lo, heights, prominences
+
+def _interval(value):
+    # Порог как в scipy: число — нижняя граница, пара — (мин, макс)
+    if value is None:
+        return None, None
+    if np.ndim(value) == 0:
+        return value, None
+    return value[0], value[1]
+
+@traced("find_fringes", "compute")
+def find_fringes(x, sampling_rate=1.0, height=None, prominence=None, wlen=None,
+                 chunk_size=DEFAULT_CHUNK, margin=DEFAULT_MARGIN, workers=DEFAULT_WORKERS, progress=None):
+    n = len(x)
+    if wlen is not None:
+        wlen = int(np.ceil(wlen))
+        if wlen < 3:
+            raise ValueError("wlen must be at least 3")
+        # Поля не меньше окна выступа: досчёт по всей записи не понадобится
+        margin = max(margin, wlen // 2 + 1)
+    margin = max(1, int(margin))
+    chunk_size = max(1, int(chunk_size))
+    starts = range(0, n, chunk_size)
+    results = [None] * len(starts)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_process_chunk, x, s, min(s + chunk_size, n), margin, height,
+                               prominence, wlen): i for i, s in enumerate(starts)}
+        for done, future in enumerate(futures):
+            results[futures[future]] = future.result()
+            if progress is not None:
+                progress(int(100 * (done + 1) / len(starts)), "Finding peaks")
+    if results:
+        peaks = np.concatenate([r[0] for r in results])
+        heights = np.concatenate([r[1] for r in results])
+    else:
+        peaks, heights = np.empty(0, dtype=np.intp), np.empty(0)
+    prominences = None
+    if prominence is not None:
+        prominences = np.concatenate([r[2] if r[2] is not None else np.empty(0) for r in results]) \
+            if results else np.empty(0)
+        pmin, pmax = _interval(prominence)
+        keep = np.ones(len(peaks), dtype=bool)
+        if pmin is not None:
+            keep &= prominences >= pmin
+        if pmax is not None:
+            keep &= prominences <= pmax
+        peaks, heights, prominences = peaks[keep], heights[keep], prominences[keep]
+    return FringeResult(peaks, heights, prominences, n, sampling_rate)
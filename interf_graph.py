@@ -0,0 +1,191 @@
+import threading
+import itertools
+from collections import Counter
+import numpy as np
+
+from interf_trace import span
+from interf_outofcore import channel_envelope_and_phase
+from interf_filters import apply_filter
+from interf_spectrum import spectrum_length, spectrum_service
+from interf_opd import OPDConfig, extract_opd
+from interf_fringes import find_fringes
+
+# ----- Граф зависимостей этапов обработки -----
+# Параметры (запись, фильтр, канал, частота дискретизации, настройки спектра...) и узлы —
+# функции от параметров и других узлов. Параметр получает новую версию, только когда его
+# значение действительно меняется (массивы и объекты сравниваются по идентичности).
+# Ключ узла — версии всех параметров, от которых он зависит через входы; узел хранит
+# последний результат с ключом и пересчитывается, только если ключ изменился. Поэтому
+# смена параметра затрагивает лишь этапы ниже по цепочке: другая частота дискретизации
+# пересчитывает оси, но не преобразование Гильберта, другое число нулей — только FFT.
+# evaluate работает со снимком параметров и может выполняться в рабочем потоке; один
+# узел не считается двумя потоками одновременно.
+
+DEFAULT_SAMPLING_RATE = 1000.0
+
+def _same(a, b):
+    if isinstance(a, (str, bytes, int, float, bool, tuple, type(None))) and type(a) is type(b):
+        return a == b
+    return a is b
+
+def _pinned(key):
+    # Ключ с параметром, заданным только для одного вызова evaluate
+    return key is None or (isinstance(key, tuple) and any(_pinned(k) for k in key))
+
+class Graph:
+    def __init__(self):
+        self._params = {}
+        self._nodes = {}
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)
+        # Число вычислений каждого узла (для диагностики и бенчмарка)
+        self.computed = Counter()
+    def add_param(self, name, value=None):
+        self._params[name] = (value, next(self._versions))
+    def add_node(self, name, fn, inputs, progress=False, cache=True):
+        # fn(*значения входов[, progress=...]); cache=False — результат не хранится в графе
+        # (его держит потребитель, например вкладка анализа)
+        for item in inputs:
+            if item not in self._params and item not in self._nodes:
+                raise KeyError(f"Unknown graph input: {item}")
+        self._nodes[name] = (fn, tuple(inputs), progress, cache)
+        self._locks[name] = threading.Lock()
+    def set(self, **values):
+        # Возвращает имена параметров, значение которых изменилось
+        changed = []
+        with self._lock:
+            for name, value in values.items():
+                if not _same(self._params[name][0], value):
+                    self._params[name] = (value, next(self._versions))
+                    changed.append(name)
+        return changed
+    def value(self, name):
+        return self._params[name][0]
+    def values(self, *names):
+        with self._lock:
+            return {name: self._params[name][0] for name in names}
+    def _snapshot(self, pinned):
+        with self._lock:
+            snapshot = dict(self._params)
+        for name, value in pinned.items():
+            if not _same(snapshot[name][0], value):
+                snapshot[name] = (value, None)
+        return snapshot
+    def key(self, name, snapshot=None):
+        snapshot = self._snapshot({}) if snapshot is None else snapshot
+        if name in snapshot:
+            return snapshot[name][1]
+        return tuple(self.key(item, snapshot) for item in self._nodes[name][1])
+    def is_valid(self, name):
+        entry = self._cache.get(name)
+        return entry is not None and entry[0] == self.key(name)
+    def cached(self, name):
+        # Результат узла, если он посчитан для текущих параметров, иначе None
+        entry = self._cache.get(name)
+        return entry[1] if entry is not None and entry[0] == self.key(name) else None
+    def invalidate(self, *names):
+        for name in names or list(self._cache):
+            self._cache.pop(name, None)
+    def evaluate(self, names, progress=None, **pinned):
+        # {имя: значение} для узлов и параметров names. pinned задаёт параметры только для этого
+        # вызова (например, те, с которыми была открыта вкладка): если они совпадают с текущими,
+        # используется кэш, иначе зависящие от них узлы считаются заново без записи в кэш
+        snapshot = self._snapshot(pinned)
+        return {name: self._evaluate(name, snapshot, progress) for name in names}
+    def _evaluate(self, name, snapshot, progress):
+        if name in snapshot:
+            return snapshot[name][0]
+        key = self.key(name, snapshot)
+        entry = self._cache.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        fn, inputs, with_progress, cache = self._nodes[name]
+        args = [self._evaluate(item, snapshot, progress) for item in inputs]
+        with self._locks[name]:
+            entry = self._cache.get(name)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+            if progress is not None:
+                progress(0, name.replace('_', ' ').capitalize())
+            with span(f"graph.{name}", "compute"):
+                value = fn(*args, progress=progress) if with_progress else fn(*args)
+            self.computed[name] += 1
+            if cache and not _pinned(key):
+                self._cache[name] = (key, value)
+        return value
+
+# ----- Цепочка обработки программы -----
+#   recording, filter → filtered → signal (channel)
+#                                → demodulation (channel): огибающая и фаза, AnalyticStore
+#                                     → amplitude (spectrum_settings) → spectrum (sampling_rate)
+#                                     → band_spectrum (band, sampling_rate): zoom FFT в полосе
+#                       → opd_phase (opd_config) → opd (sampling_rate)
+#   signal → peaks → fringes (sampling_rate)
+# Узлы до частоты дискретизации работают в номерах отсчётов, поэтому её смена
+# пересчитывает только spectrum, opd и fringes — оси, без FFT и преобразования Гильберта.
+# filter — () или (тип фильтра, (параметр, значение), ...); opd_config — (λ в м, n, опорный канал);
+# band — None или (от Гц, до Гц, число частот).
+def processing_graph(store=None, sampling_rate=DEFAULT_SAMPLING_RATE, prominence=1):
+    graph = Graph()
+    graph.add_param("recording")
+    graph.add_param("filter", ())
+    graph.add_param("channel", 0)
+    graph.add_param("sampling_rate", float(sampling_rate))
+    graph.add_param("spectrum_settings", (0, 'Rectangular', False))
+    graph.add_param("band")
+    graph.add_param("opd_config")
+    def filtered(recording, settings):
+        if recording is None or not settings:
+            return recording
+        block = apply_filter(recording.stack(), settings[0], **dict(settings[1:]))
+        return recording.from_array(recording.columns, block, source=recording.source,
+                                    sampling_rate=recording.sampling_rate)
+    def signal(recording, channel):
+        return np.array([]) if recording is None else recording.channel(channel)
+    def demodulation(recording, channel, settings, progress=None):
+        if recording is None:
+            return np.array([]), np.array([])
+        cached = store.get(recording, channel, settings) if store is not None else None
+        if cached is not None:
+            return cached
+        # Длинные каналы — по блокам с результатом в np.memmap (interf_outofcore)
+        envelope, phase = channel_envelope_and_phase(recording.channel(channel), progress=progress)
+        if store is not None:
+            store.put(recording, channel, envelope, phase, settings)
+        return envelope, phase
+    def amplitude(demodulated, settings):
+        envelope = demodulated[0]
+        return spectrum_length(len(envelope), settings[0], settings[2]), spectrum_service.amplitude(envelope, *settings)
+    def spectrum(amplitude, rate):
+        N, values = amplitude
+        return spectrum_service.axis(N, rate), values
+    def band_spectrum(demodulated, settings, band, rate):
+        if band is None:
+            return None
+        return spectrum_service.band(demodulated[0], rate, *band, window=settings[1])
+    def opd_phase(recording, settings, config, progress=None):
+        if recording is None or config is None:
+            return None
+        wavelength, index, reference = config
+        return extract_opd(recording, 1.0, OPDConfig(wavelength, index), reference=reference, store=store,
+                           settings=settings, progress=progress)
+    def opd(result, rate):
+        return None if result is None else result.at_rate(rate)
+    def peaks(x, progress=None):
+        return find_fringes(x, 1.0, prominence=prominence, progress=progress)
+    def fringes(result, rate):
+        return result.at_rate(rate)
+    graph.add_node("filtered", filtered, ("recording", "filter"))
+    graph.add_node("signal", signal, ("filtered", "channel"))
+    graph.add_node("demodulation", demodulation, ("filtered", "channel", "filter"), progress=True)
+    graph.add_node("amplitude", amplitude, ("demodulation", "spectrum_settings"))
+    graph.add_node("spectrum", spectrum, ("amplitude", "sampling_rate"))
+    graph.add_node("band_spectrum", band_spectrum, ("demodulation", "spectrum_settings", "band", "sampling_rate"))
+    # Результат OPD держит вкладка, граф его не хранит; фазы берутся из AnalyticStore
+    graph.add_node("opd_phase", opd_phase, ("filtered", "filter", "opd_config"), progress=True, cache=False)
+    graph.add_node("opd", opd, ("opd_phase", "sampling_rate"), cache=False)
+    graph.add_node("peaks", peaks, ("signal",), progress=True)
+    graph.add_node("fringes", fringes, ("peaks", "sampling_rate"))
+    return graph
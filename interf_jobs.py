@@ -0,0 +1,109 @@
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from interf_trace import span
+
+# ----- Фоновые задачи: загрузка и демодуляция вне GUI-потока -----
+# NumPy/SciPy отпускают GIL, поэтому пул потоков даёт реальное перекрытие вычислений.
+# Для каждого вида задачи (kind) актуальна только последняя отправленная задача:
+# новая отменяет предыдущую, а результаты устаревших задач отбрасываются.
+
+class JobCancelled(Exception):
+    pass
+
+class JobContext:
+    def __init__(self, job_id, kind, manager):
+        self.job_id = job_id
+        self.kind = kind
+        self._manager = manager
+        self._cancel_event = threading.Event()
+    def cancel(self):
+        self._cancel_event.set()
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+    def check(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+    def progress(self, percent, message=""):
+        # Вызывается из рабочего потока; заодно служит точкой отмены
+        self.check()
+        self._manager._progress.emit(self.job_id, int(percent), message)
+
+class JobManager(QObject):
+    progress = pyqtSignal(int, int, str)      # job_id, percent, message
+    finished = pyqtSignal(int, str, object)   # job_id, kind, result
+    failed = pyqtSignal(int, str, str)        # job_id, kind, error
+    cancelled = pyqtSignal(int, str)          # job_id, kind
+    idle = pyqtSignal()
+    # Внутренние сигналы испускаются из рабочих потоков и доставляются в GUI-поток очередью
+    _progress = pyqtSignal(int, int, str)
+    _done = pyqtSignal(int, str, object)
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="interf-job")
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._latest = {}
+        self._progress.connect(self._on_progress)
+        self._done.connect(self._on_done)
+    def submit(self, kind, fn, on_result=None, on_error=None):
+        # fn(job) выполняется в рабочем потоке и получает JobContext
+        self.cancel(kind)
+        job_id = next(self._ids)
+        job = JobContext(job_id, kind, self)
+        self._jobs[job_id] = (job, on_result, on_error)
+        self._latest[kind] = job_id
+        self._executor.submit(self._run, job, fn)
+        return job_id
+    def cancel(self, kind=None):
+        for job_id, (job, _, _) in list(self._jobs.items()):
+            if kind is None or job.kind == kind:
+                job.cancel()
+                del self._jobs[job_id]
+                self.cancelled.emit(job_id, job.kind)
+        if kind is None:
+            self._latest.clear()
+        else:
+            self._latest.pop(kind, None)
+        if not self._jobs:
+            self.idle.emit()
+    def is_busy(self):
+        return bool(self._jobs)
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    def _run(self, job, fn):
+        try:
+            job.check()
+            with span(f"job.{job.kind}", "job"):
+                result = fn(job)
+            self._done.emit(job.job_id, "ok", result)
+        except JobCancelled:
+            self._done.emit(job.job_id, "cancelled", None)
+        except Exception as e:
+            self._done.emit(job.job_id, "error", str(e))
+    def _on_progress(self, job_id, percent, message):
+        if job_id in self._jobs:
+            self.progress.emit(job_id, percent, message)
+    def _on_done(self, job_id, status, payload):
+        entry = self._jobs.pop(job_id, None)
+        # Задача уже отменена или заменена более новой — результат устарел
+        if entry is None:
+            return
+        job, on_result, on_error = entry
+        if self._latest.get(job.kind) == job_id:
+            del self._latest[job.kind]
+        if status == "ok":
+            self.finished.emit(job_id, job.kind, payload)
+            if on_result is not None:
+                on_result(payload)
+        elif status == "error":
+            self.failed.emit(job_id, job.kind, payload)
+            if on_error is not None:
+                on_error(payload)
+        else:
+            self.cancelled.emit(job_id, job.kind)
+        if not self._jobs:
+            self.idle.emit()
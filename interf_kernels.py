@@ -0,0 +1,131 @@
+import os
+import threading
+from contextlib import contextmanager
+from importlib.util import find_spec
+import numpy as np
+
+from interf_precision import unwrap
+
+# ----- Ускорение поотсчётных этапов (необязательный Numba) -----
+# Если установлен numba, развёртка фазы (вместе с np.angle), скользящее среднее, поиск
+# пиков для счёта полос и перевод фазы в OPD с разностями каналов выполняются ядрами
+# interf_numba — одним проходом без временных массивов длины записи. Без numba (или с
+# INTERF_JIT=0) работают прежние пути NumPy/scipy; результаты обоих путей совпадают
+# побитно. numba импортируется и ядра компилируются при первом вызове (или при прогреве
+# interf_startup), поэтому на время запуска программы он не влияет. Короче JIT_MIN_SAMPLES
+# отсчётов вызов ядра не окупается — используется NumPy. Сравнение путей — тест jit.
+
+JIT_AVAILABLE = find_spec("numba") is not None
+JIT_ENABLED = JIT_AVAILABLE and os.environ.get("INTERF_JIT", "1") != "0"
+JIT_MIN_SAMPLES = 1 << 12
+# Участок, по которому np.arctan2 считает углы для ядра развёртки
+ANGLE_CHUNK = 1 << 16
+_lock = threading.Lock()
+_kernels = None
+
+def kernels(n_samples=None):
+    # Модуль ядер interf_numba или None, если ускорение недоступно или выключено
+    global _kernels
+    if not JIT_ENABLED or (n_samples is not None and n_samples < JIT_MIN_SAMPLES):
+        return None
+    if _kernels is None:
+        with _lock:
+            import interf_numba
+            _kernels = interf_numba
+    return _kernels
+
+@contextmanager
+def jit_disabled():
+    # Временно только пути NumPy (сравнение в interf_bench)
+    global JIT_ENABLED
+    enabled, JIT_ENABLED = JIT_ENABLED, False
+    try:
+        yield
+    finally:
+        JIT_ENABLED = enabled
+
+def warm_up():
+    # Компиляция (или загрузка из кэша) всех ядер на коротких массивах
+    jit = kernels()
+    if jit is None:
+        return False
+    x = np.linspace(-1.0, 1.0, 16)
+    for dtype in (np.float64, np.float32):
+        signal = x.astype(dtype)[:, None]
+        kernel = jit.unwrap_chunk64 if dtype == np.float64 else jit.unwrap_chunk32
+        # Столбец результата: непрерывный (один канал) и с шагом (несколько каналов)
+        kernel(np.ascontiguousarray(signal[:, 0]), np.zeros(3), np.empty(len(signal), dtype=dtype))
+        kernel(np.ascontiguousarray(signal[:, 0]), np.zeros(3), np.empty((len(signal), 2), dtype=dtype)[:, 0])
+        jit.moving_average(signal, 3, np.empty_like(signal))
+        jit.opd_outputs(signal, np.ones(1, dtype=dtype), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp),
+                        np.empty_like(signal), np.empty((16, 0), dtype=dtype), np.empty((16, 0), dtype=dtype))
+    jit.local_maxima(x, -np.inf, np.inf, np.empty(8, dtype=np.intp))
+    return True
+
+# ----- Ядра с запасным путём NumPy -----
+def angle_unwrap(analytic, axis=0):
+    # unwrap(np.angle(analytic), axis) — развёрнутая фаза аналитического сигнала
+    analytic = np.asarray(analytic)
+    jit = kernels(analytic.shape[axis]) if analytic.ndim in (1, 2) and analytic.dtype.kind == 'c' else None
+    if jit is None:
+        return unwrap(np.angle(analytic), axis=axis)
+    if analytic.dtype not in (np.complex64, np.complex128):
+        analytic = analytic.astype(np.complex128)
+    columns = np.moveaxis(analytic, axis, 0) if analytic.ndim == 2 else analytic[:, None]
+    n = len(columns)
+    out = np.empty(columns.shape, dtype=analytic.real.dtype)
+    kernel = jit.unwrap_chunk32 if analytic.dtype == np.complex64 else jit.unwrap_chunk64
+    buffer = np.empty(min(n, ANGLE_CHUNK), dtype=out.dtype)
+    for c in range(columns.shape[1]):
+        state = np.zeros(3)
+        for start in range(0, n, ANGLE_CHUNK):
+            part = columns[start:start + ANGLE_CHUNK, c]
+            kernel(np.arctan2(part.imag, part.real, out=buffer[:len(part)]), state, out[start:start + len(part), c])
+    return np.moveaxis(out, 0, axis) if analytic.ndim == 2 else out[:, 0]
+
+def running_mean(x, window):
+    # Скользящее среднее по axis=0 двумерного массива (отсчёты × каналы), края — как у
+    # np.convolve(..., mode='same'); суммы копятся в float64
+    n = len(x)
+    jit = kernels(n)
+    if jit is not None:
+        return jit.moving_average(x, window, np.empty(x.shape, dtype=x.dtype))
+    csum = np.zeros((n + 1, x.shape[1]))
+    np.cumsum(x, axis=0, out=csum[1:])
+    i = np.arange(n)
+    lo = np.clip(i - window // 2, 0, n)
+    hi = np.clip(i + (window - 1) // 2 + 1, 0, n)
+    return ((csum[hi] - csum[lo]) / window).astype(x.dtype, copy=False)
+
+def local_maxima(x, height=None):
+    # Индексы пиков, как scipy.signal.find_peaks(x, height=height)[0] для порога-числа или пары
+    jit = kernels(len(x))
+    if jit is None or not (height is None or np.ndim(height) == 0 or
+                           (np.ndim(height) == 1 and len(height) == 2 and
+                            all(v is None or np.ndim(v) == 0 for v in height))):
+        from scipy.signal import find_peaks
+        return find_peaks(x, height=height)[0]
+    hmin, hmax = -np.inf, np.inf
+    if height is not None:
+        hmin, hmax = (height, None) if np.ndim(height) == 0 else height
+        hmin = -np.inf if hmin is None else float(hmin)
+        hmax = np.inf if hmax is None else float(hmax)
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    out = np.empty(max(0, (len(x) - 1) // 2), dtype=np.intp)
+    return out[:jit.local_maxima(x, hmin, hmax, out)].copy()
+
+def opd_outputs(phase, scale, first, second):
+    # (OPD, разностная фаза, разностная OPD) для пар каналов (first[k], second[k])
+    # Без пар каналов остаётся одно умножение — NumPy не медленнее
+    jit = kernels(len(phase)) if len(first) else None
+    if jit is None:
+        opd = phase * scale
+        return opd, phase[:, first] - phase[:, second], opd[:, first] - opd[:, second]
+    n_pairs = len(first)
+    opd = np.empty(phase.shape, dtype=phase.dtype)
+    differential_phase = np.empty((len(phase), n_pairs), dtype=phase.dtype)
+    differential_opd = np.empty((len(phase), n_pairs), dtype=phase.dtype)
+    jit.opd_outputs(np.ascontiguousarray(phase), np.asarray(scale, dtype=phase.dtype),
+                    np.asarray(first, dtype=np.intp), np.asarray(second, dtype=np.intp),
+                    opd, differential_phase, differential_opd)
+    return opd, differential_phase, differential_opd
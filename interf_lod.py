@@ -0,0 +1,185 @@
+import math
+import weakref
+import numpy as np
+
+from interf_trace import span
+
+# ----- Пирамида min/max для быстрой отрисовки длинных сигналов -----
+# Уровень k хранит минимумы и максимумы блоков по LOD_FACTOR**(k+1) отсчётов.
+# Для видимого участка выбирается самый подробный уровень, который укладывается
+# в число точек, нужное экрану; при сильном увеличении отдаются исходные отсчёты.
+# Экстремумы сохраняются, поэтому огибающая сигнала на графике не искажается.
+
+LOD_FACTOR = 4
+LOD_MIN_LEVEL_SIZE = 1024
+# Первый уровень строится по участкам исходного сигнала такой длины
+LOD_CHUNK = 1 << 20
+
+class MinMaxPyramid:
+    def __init__(self, y, factor=LOD_FACTOR):
+        self.y = y
+        self.factor = factor
+        self.levels = []
+        mins = maxs = y
+        block = 1
+        if len(y) > LOD_MIN_LEVEL_SIZE:
+            mins, maxs = _first_level(y, factor)
+            block = factor
+            self.levels.append((block, mins, maxs))
+        while len(mins) > LOD_MIN_LEVEL_SIZE:
+            starts = np.arange(0, len(mins), factor)
+            mins = np.minimum.reduceat(mins, starts)
+            maxs = np.maximum.reduceat(maxs, starts)
+            block *= factor
+            self.levels.append((block, mins, maxs))
+    def __len__(self):
+        return len(self.y)
+    @property
+    def nbytes(self):
+        return sum(mins.nbytes + maxs.nbytes for _, mins, maxs in self.levels)
+    def query(self, start, stop, max_points):
+        # Возвращает (индексы отсчётов, значения) для участка [start, stop)
+        start = max(0, min(int(start), len(self.y)))
+        stop = max(start, min(int(stop), len(self.y)))
+        if stop - start <= max_points or not self.levels:
+            return np.arange(start, stop), np.asarray(self.y[start:stop])
+        for block, mins, maxs in self.levels:
+            if 2 * (stop - start) / block <= max_points:
+                break
+        i0 = start // block
+        i1 = -(-stop // block)
+        centers = (np.arange(i0, i1) * block + block / 2.0).repeat(2)
+        values = np.empty(2 * (i1 - i0), dtype=mins.dtype)
+        values[0::2] = mins[i0:i1]
+        values[1::2] = maxs[i0:i1]
+        return centers, values
+
+def _first_level(y, factor, chunk=LOD_CHUNK):
+    # По участкам: для np.memmap и каналов двоичных записей (interf_rawio) в памяти
+    # одновременно только один участок исходных отсчётов
+    chunk -= chunk % factor
+    n = -(-len(y) // factor)
+    mins = maxs = None
+    for start in range(0, len(y), chunk):
+        part = np.asarray(y[start:start + chunk])
+        if mins is None:
+            mins, maxs = np.empty(n, dtype=part.dtype), np.empty(n, dtype=part.dtype)
+        starts = np.arange(0, len(part), factor)
+        mins[start // factor:start // factor + len(starts)] = np.minimum.reduceat(part, starts)
+        maxs[start // factor:start // factor + len(starts)] = np.maximum.reduceat(part, starts)
+    return mins, maxs
+
+# Пирамиды общие для всех вкладок, отображающих один и тот же массив
+_pyramids = weakref.WeakValueDictionary()
+
+def pyramid_for(y):
+    pyramid = _pyramids.get(id(y))
+    if pyramid is None or pyramid.y is not y:
+        pyramid = MinMaxPyramid(y)
+        _pyramids[id(y)] = pyramid
+    return pyramid
+
+# ----- Кривая с уровнем детализации, пересчитываемая при изменении области просмотра -----
+class LODCurve:
+    def __init__(self, plot_widget, y, x0=0.0, dx=1.0, pen=None, max_points=None):
+        self.plot_widget = plot_widget
+        self.view_box = plot_widget.getViewBox()
+        self.pyramid = pyramid_for(y)
+        self.x0 = float(x0)
+        self.dx = float(dx)
+        self.max_points = max_points
+        self.item = plot_widget.plot(pen=pen)
+        self.view_box.sigRangeChanged.connect(self.refresh)
+        self.view_box.sigResized.connect(self.refresh)
+        self.refresh()
+    def visible_samples(self):
+        n = len(self.pyramid)
+        if self.view_box.autoRangeEnabled()[0]:
+            return 0, n
+        xmin, xmax = self.view_box.viewRange()[0]
+        start = math.floor((xmin - self.x0) / self.dx) - 1
+        stop = math.ceil((xmax - self.x0) / self.dx) + 2
+        return max(0, start), min(n, stop)
+    def refresh(self, *args):
+        if len(self.pyramid) == 0:
+            self.item.setData([], [])
+            return
+        with span("plot.refresh", "plot") as s:
+            max_points = self.max_points or 2 * max(int(self.view_box.width()), 1000)
+            start, stop = self.visible_samples()
+            idx, values = self.pyramid.query(start, stop, max_points)
+            self.item.setData(self.x0 + idx * self.dx, values)
+            s.set(points=len(idx))
+    def set_axis(self, x0, dx):
+        # Другой масштаб оси (например, частота дискретизации) без пересчёта пирамиды;
+        # увеличенная область просмотра пересчитывается в новые единицы
+        x0, dx = float(x0), float(dx)
+        if not self.view_box.autoRangeEnabled()[0]:
+            xmin, xmax = self.view_box.viewRange()[0]
+            lo = x0 + (xmin - self.x0) / self.dx * dx
+            hi = x0 + (xmax - self.x0) / self.dx * dx
+            self.x0, self.dx = x0, dx
+            self.view_box.setXRange(lo, hi, padding=0)
+        self.x0, self.dx = x0, dx
+        self.refresh()
+    def detach(self):
+        for signal in (self.view_box.sigRangeChanged, self.view_box.sigResized):
+            try:
+                signal.disconnect(self.refresh)
+            except TypeError:
+                pass
+        self.plot_widget.removeItem(self.item)
+
+# ----- Отметки пиков поверх графика: в видимой области не больше max_points точек -----
+class PeakOverlay:
+    def __init__(self, plot_widget, peaks, values, x0=0.0, dx=1.0, max_points=5000, symbol='o', size=6,
+                 brush='#FF4040'):
+        self.plot_widget = plot_widget
+        self.view_box = plot_widget.getViewBox()
+        self.peaks = np.asarray(peaks)
+        self.values = np.asarray(values)
+        self.x0 = float(x0)
+        self.dx = float(dx)
+        self.max_points = max_points
+        self.item = plot_widget.plot(pen=None, symbol=symbol, symbolSize=size, symbolBrush=brush,
+                                     symbolPen=None)
+        self.view_box.sigRangeChanged.connect(self.refresh)
+        self.refresh()
+    def refresh(self, *args):
+        lo, hi = 0, len(self.peaks)
+        if not self.view_box.autoRangeEnabled()[0]:
+            xmin, xmax = self.view_box.viewRange()[0]
+            lo, hi = np.searchsorted(self.peaks, [(xmin - self.x0) / self.dx, (xmax - self.x0) / self.dx])
+        # Прореживание с постоянным шагом сохраняет плотность отметок по оси
+        step = max(1, -(-(hi - lo) // self.max_points))
+        idx = self.peaks[lo:hi:step]
+        with span("plot.peaks", "plot", points=len(idx)):
+            self.item.setData(self.x0 + idx * self.dx, self.values[lo:hi:step])
+    def detach(self):
+        try:
+            self.view_box.sigRangeChanged.disconnect(self.refresh)
+        except TypeError:
+            pass
+        self.plot_widget.removeItem(self.item)
+
+def plot_lod(plot_widget, y, x=None, pen=None, dx=None):
+    # x — необязательная равномерная ось (время, частота); по умолчанию номер отсчёта.
+    # dx — шаг оси от нуля без отдельного массива (например, 1 / частота дискретизации).
+    # Канал двоичной записи не копируется: пирамида читает его по участкам
+    if not isinstance(y, np.ndarray) and not hasattr(y, "read_into"):
+        y = np.asarray(y)
+    if dx is not None:
+        return LODCurve(plot_widget, y, 0.0, dx, pen)
+    x0, dx = 0.0, 1.0
+    if x is not None and len(x) > 0:
+        x0 = x[0]
+        if len(x) > 1:
+            dx = x[1] - x[0]
+    return LODCurve(plot_widget, y, x0, dx, pen)
+
+def clear_lod(plot_widget, curves):
+    # Отключает кривые от сигналов области просмотра и очищает график
+    for curve in curves:
+        curve.detach()
+    curves.clear()
+    plot_widget.clear()
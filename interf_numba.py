@@ -0,0 +1,106 @@
+import numpy as np
+from numba import njit
+
+# ----- Ядра Numba для поотсчётных циклов (выбор и запасные пути NumPy — interf_kernels) -----
+# Каждое ядро — один проход по отсчётам без временных массивов длины записи; результат
+# пишется в готовый массив out. Порядок и тип операций повторяют путь NumPy, поэтому
+# результаты совпадают побитно (проверка — тест jit в interf_bench). Углы для развёртки
+# считает np.arctan2 по участкам в небольшой буфер: atan2 из LLVM отличается от NumPy в
+# последнем бите, а собственная реализация NumPy быстрее. cache=True сохраняет
+# скомпилированный код рядом с модулем: компиляция — только при первом запуске, nogil=True —
+# участки find_fringes считаются потоками параллельно.
+
+TWO_PI = 2 * np.pi
+
+@njit(cache=True, nogil=True)
+def unwrap_chunk64(wrapped, state, out):
+    # np.unwrap по участкам: поправки ±2π копятся суммой, как cumsum в np.unwrap.
+    # state = [последний отсчёт предыдущего участка, накопленная поправка, участков до этого]
+    prev, correction, start = state[0], state[1], 0
+    if state[2] == 0 and len(wrapped):
+        prev = wrapped[0]
+        out[0] = prev
+        start = 1
+    for i in range(start, len(wrapped)):
+        p = wrapped[i]
+        dd = p - prev
+        if not abs(dd) < np.pi:
+            ddmod = (dd + np.pi) % TWO_PI - np.pi
+            if ddmod == -np.pi and dd > 0:
+                ddmod = np.pi
+            correction += ddmod - dd
+        out[i] = p + correction
+        prev = p
+    state[0], state[1], state[2] = prev, correction, state[2] + 1
+
+@njit(cache=True, nogil=True)
+def unwrap_chunk32(wrapped, state, out):
+    # interf_precision.unwrap для float32: целое число оборотов, перевод в радианы в float64;
+    # state — как у unwrap_chunk64, вместо поправки число оборотов
+    two_pi = np.float32(TWO_PI)
+    prev, turns, start = np.float32(state[0]), int(state[1]), 0
+    if state[2] == 0 and len(wrapped):
+        prev = wrapped[0]
+        out[0] = prev
+        start = 1
+    for i in range(start, len(wrapped)):
+        p = wrapped[i]
+        turns += int(np.rint((p - prev) / two_pi))
+        out[i] = np.float64(p) - TWO_PI * np.float64(turns)
+        prev = p
+    state[0], state[1], state[2] = prev, turns, state[2] + 1
+
+@njit(cache=True, nogil=True)
+def moving_average(x, window, out):
+    # Разность двух бегущих сумм float64 — те же частичные суммы, что и у cumsum
+    n, m = x.shape
+    behind = window // 2
+    ahead = (window - 1) // 2 + 1
+    for c in range(m):
+        upper = 0.0
+        lower = 0.0
+        hi_pos = 0
+        lo_pos = 0
+        for i in range(n):
+            hi = min(i + ahead, n)
+            lo = max(i - behind, 0)
+            while hi_pos < hi:
+                upper += x[hi_pos, c]
+                hi_pos += 1
+            while lo_pos < lo:
+                lower += x[lo_pos, c]
+                lo_pos += 1
+            out[i, c] = (upper - lower) / window
+    return out
+
+@njit(cache=True, nogil=True)
+def local_maxima(x, hmin, hmax, out):
+    # Локальные максимумы (середина плато) с порогом высоты, как scipy.signal.find_peaks(height=...);
+    # возвращает число найденных пиков в out
+    n = len(x)
+    count = 0
+    i = 1
+    while i < n - 1:
+        if x[i - 1] < x[i]:
+            ahead = i + 1
+            while ahead < n - 1 and x[ahead] == x[i]:
+                ahead += 1
+            if x[ahead] < x[i]:
+                peak = (i + ahead - 1) // 2
+                if hmin <= x[peak] <= hmax:
+                    out[count] = peak
+                    count += 1
+                i = ahead
+        i += 1
+    return count
+
+@njit(cache=True, nogil=True)
+def opd_outputs(phase, scale, first, second, opd, differential_phase, differential_opd):
+    # OPD каналов и разностные фаза и OPD пар каналов за один проход по отсчётам
+    n, m = phase.shape
+    for k in range(n):
+        for c in range(m):
+            opd[k, c] = phase[k, c] * scale[c]
+        for p in range(len(first)):
+            differential_phase[k, p] = phase[k, first[p]] - phase[k, second[p]]
+            differential_opd[k, p] = opd[k, first[p]] - opd[k, second[p]]
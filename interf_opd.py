@@ -0,0 +1,90 @@
+import numpy as np
+
+from interf_kernels import opd_outputs
+from interf_outofcore import channel_envelope_and_phase
+
+# ----- Оптическая разность хода (OPD) по всем каналам сразу -----
+# Фаза каждого канала берётся из AnalyticStore, а если её там нет — считается так же, как
+# для вкладки Demodulation (длинные каналы — по блокам, interf_outofcore) и сохраняется в
+# AnalyticStore. Фазы каналов собираются в 2-D массив (отсчёты × каналы); перевод фазы в
+# OPD и разностные величины между каналами считаются векторно, без циклов по каналам.
+#   OPD = φ · λ / (2π · n)
+
+class OPDConfig:
+    def __init__(self, wavelength=632.8e-9, refractive_index=1.0):
+        self.wavelength = wavelength                # м
+        self.refractive_index = refractive_index    # число или массив по каналам
+    def scale(self, n_channels, dtype=np.float64):
+        # Множитель рад → м для каждого канала (в точности фазы: float32 не повышается до float64)
+        n = np.broadcast_to(np.asarray(self.refractive_index, dtype=np.float64), (n_channels,))
+        return (self.wavelength / (2.0 * np.pi * n)).astype(dtype)
+
+class OPDResult:
+    def __init__(self, columns, time, phase, opd, pairs, differential_phase, differential_opd):
+        self.columns = columns
+        self.time = time
+        self.phase = phase                          # (отсчёты, каналы), рад
+        self.opd = opd                              # (отсчёты, каналы), м
+        self.pairs = pairs                          # [(i, j), ...] для разностных столбцов
+        self.differential_phase = differential_phase
+        self.differential_opd = differential_opd
+    def pair_labels(self):
+        return [f"{self.columns[i]}-{self.columns[j]}" for i, j in self.pairs]
+    def at_rate(self, sampling_rate):
+        # Тот же результат с осью времени для другой частоты дискретизации: массивы фазы и OPD общие
+        return OPDResult(self.columns, np.arange(len(self.phase)) / sampling_rate, self.phase, self.opd,
+                         self.pairs, self.differential_phase, self.differential_opd)
+
+def channel_pairs(n_channels, reference=None):
+    # reference=None — все пары i < j; иначе разности относительно опорного канала
+    if reference is None:
+        i, j = np.triu_indices(n_channels, k=1)
+    else:
+        j = np.full(n_channels - 1, reference)
+        i = np.delete(np.arange(n_channels), reference)
+    return i, j
+
+def extract_opd(recording, sampling_rate, config, reference=0, channels=None, store=None, settings=(),
+                progress=None):
+    if channels is None:
+        channels = list(range(recording.n_channels))
+    # Фазы, уже посчитанные в AnalyticStore, повторно не вычисляются; новые сохраняются в нём
+    phases = []
+    for k, ch in enumerate(channels):
+        cached = store.get(recording, ch, settings) if store is not None else None
+        if cached is None:
+            part = None
+            if progress is not None:
+                part = lambda percent, message, k=k: progress(int((k + percent / 100) * 80 / len(channels)),
+                                                              f"Channel {k + 1} of {len(channels)}: {message}")
+            cached = channel_envelope_and_phase(recording.channel(ch), progress=part)
+            if store is not None:
+                store.put(recording, ch, *cached, settings)
+        phases.append(cached[1])
+    phase = np.column_stack(phases)
+    if progress is not None:
+        progress(80, "OPD")
+    if len(channels) > 1:
+        i, j = channel_pairs(len(channels), channels.index(reference) if reference is not None else None)
+        pairs = list(zip(i.tolist(), j.tolist()))
+    else:
+        i = j = np.empty(0, dtype=np.intp)
+        pairs = []
+    # OPD и разности пар каналов; с numba — одним проходом (interf_kernels)
+    opd, differential_phase, differential_opd = opd_outputs(phase, config.scale(phase.shape[1], phase.dtype), i, j)
+    time = np.arange(len(phase)) / sampling_rate
+    columns = [recording.columns[ch] for ch in channels]
+    return OPDResult(columns, time, phase, opd, pairs, differential_phase, differential_opd)
+
+def export_opd(file_path, result):
+    # .npz — сжатый архив массивов; .csv — таблица (время, OPD каналов, разностные OPD)
+    if file_path.lower().endswith('.csv'):
+        header = ",".join(["time"] + [f"opd_{c}" for c in result.columns] +
+                          [f"dopd_{label}" for label in result.pair_labels()])
+        table = np.column_stack([result.time, result.opd, result.differential_opd])
+        np.savetxt(file_path, table, delimiter=",", header=header, comments="")
+    else:
+        np.savez_compressed(file_path, time=result.time, columns=np.array(result.columns),
+                            phase=result.phase, opd=result.opd, pairs=np.array(result.pairs).reshape(-1, 2),
+                            differential_phase=result.differential_phase,
+                            differential_opd=result.differential_opd)
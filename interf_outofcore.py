@@ -0,0 +1,123 @@
+import os
+import tempfile
+import numpy as np
+
+from interf_trace import span
+from interf_precision import analytic_signal, working_dtype
+from interf_kernels import angle_unwrap
+from interf_engine import envelope_and_phase
+
+# ----- Демодуляция по блокам для записей больше памяти -----
+# Канал (np.memmap, канал двоичной записи interf_rawio или обычный массив) читается блоками
+# по B отсчётов с полями по OOC_MARGIN с каждой стороны; преобразование Гильберта участка
+# B + 2·поле, от результата остаётся середина. Ядро преобразования убывает как 1/расстояние,
+# поэтому склейка приближённая: краевой эффект участка в середине ослаблен, но не исчезает —
+# расхождение с расчётом по всей записи порядка нескольких единиц / поле (около 10⁻⁴ рад при
+# OOC_MARGIN). За краями записи поля берутся с другого её конца — как у FFT всей записи, так
+# что первый и последний блок склеиваются с той же точностью. Фаза разворачивается непрерывно:
+# каждый блок начинается от последней свёрнутой фазы предыдущего, а накопленное число
+# оборотов переносится дальше. Огибающая и фаза пишутся в np.memmap во временном каталоге
+# (INTERF_OOC_DIR; файл удаляется сразу, данные живут, пока жив массив) — графики (пирамида
+# LOD строится по участкам) и экспорт читают их с диска. Рабочая память — не больше
+# INTERF_OOC_MAX_MB (по умолчанию 256 МБ) при любой длине записи; каналы, которым в этом
+# бюджете не хватает места для расчёта целиком, демодулируются так автоматически
+# (channel_envelope_and_phase). Совпадение с расчётом в памяти проверяет тест outofcore.
+
+DEFAULT_MAX_MB = 256
+OOC_MARGIN = 1 << 16
+# Самый короткий участок; поле — не больше четверти участка (при малом бюджете точность ниже)
+MIN_SEGMENT = 1 << 12
+# Оценка байт на отсчёт участка: вход, аналитический сигнал, временный массив FFT, огибающая
+# и фаза участка. Для float32 — больше половины: развёртка переводит обороты в радианы
+# через временные массивы float64 (interf_precision.unwrap)
+_BYTES_PER_SAMPLE = {np.dtype(np.float64): 64, np.dtype(np.float32): 40}
+
+def memory_budget():
+    return int(float(os.environ.get("INTERF_OOC_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+
+def _per_sample(dtype):
+    return _BYTES_PER_SAMPLE[working_dtype(dtype)]
+
+def needs_out_of_core(signal, max_bytes=None):
+    # Расчёт всего канала сразу не укладывается в бюджет рабочей памяти
+    max_bytes = memory_budget() if max_bytes is None else max_bytes
+    return len(signal) * _per_sample(signal.dtype) > max_bytes
+
+def segment_budget(length, dtype=np.float64):
+    # Бюджет, при котором участок — length отсчётов (степень двойки)
+    return length * _per_sample(dtype)
+
+def segment_length(max_bytes, dtype=np.float64):
+    # Длина участка (степень двойки) в пределах бюджета
+    samples = max_bytes // _per_sample(dtype)
+    if samples < MIN_SEGMENT:
+        raise ValueError(f"Memory budget of {max_bytes} bytes is too small for block demodulation")
+    return 1 << (int(samples).bit_length() - 1)
+
+def output_array(n, dtype, directory=None):
+    fd, path = tempfile.mkstemp(prefix="interf_ooc_", suffix=".dat",
+                                dir=directory or os.environ.get("INTERF_OOC_DIR"))
+    os.close(fd)
+    array = np.memmap(path, dtype=dtype, mode='w+', shape=(n,))
+    try:
+        # Отображение остаётся действительным; место на диске освобождается вместе с массивом
+        os.unlink(path)
+    except OSError:
+        pass
+    return array
+
+def _segment(signal, start, stop, dtype):
+    # Отсчёты [start, stop) с продолжением записи по кругу за её краями
+    n = len(signal)
+    out = np.empty(stop - start, dtype=dtype)
+    done = 0
+    while done < len(out):
+        k = (start + done) % n
+        take = min(len(out) - done, n - k)
+        out[done:done + take] = signal[k:k + take]
+        done += take
+    return out
+
+def demodulate_blocks(signal, max_bytes=None, margin=OOC_MARGIN, directory=None, progress=None):
+    # Возвращает (огибающая, развёрнутая фаза) — np.memmap той же точности, что и расчёт в памяти
+    max_bytes = memory_budget() if max_bytes is None else max_bytes
+    n = len(signal)
+    dtype = working_dtype(signal.dtype)
+    length = segment_length(max_bytes, dtype)
+    margin = min(margin, length // 4)
+    block = length - 2 * margin
+    envelope = output_array(n, dtype, directory)
+    phase = output_array(n, dtype, directory)
+    if n <= length:
+        # Короткая запись считается целиком
+        envelope[:], phase[:] = envelope_and_phase(np.asarray(signal, dtype=dtype), progress=progress)
+        return envelope, phase
+    turns = 0
+    last = None
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        if progress is not None:
+            progress(int(100 * start / n), f"Demodulating block {start // block + 1} of {-(-n // block)}")
+        with span("ooc.block", "compute", start=start):
+            analytic = analytic_signal(_segment(signal, start - margin, stop + margin, dtype))
+            analytic = analytic[margin:margin + stop - start]
+            envelope[start:stop] = np.abs(analytic)
+            if last is None:
+                local = angle_unwrap(analytic)
+            else:
+                # Развёртка от последнего отсчёта предыдущего блока
+                local = angle_unwrap(np.concatenate((last, analytic)))[1:]
+            last = analytic[-1:].copy()
+            del analytic
+            phase[start:stop] = local
+            if turns:
+                # Обороты прошлых блоков прибавляются в float64 по буферам ufunc, без копии блока
+                np.add(phase[start:stop], np.float64(2 * np.pi * turns), out=phase[start:stop])
+            turns += int(np.rint((float(local[-1]) - float(np.angle(last[0]))) / (2 * np.pi)))
+    return envelope, phase
+
+def channel_envelope_and_phase(signal, progress=None, max_bytes=None):
+    # Демодуляция канала: целиком в памяти или, если не укладывается в бюджет, по блокам
+    if needs_out_of_core(signal, max_bytes):
+        return demodulate_blocks(signal, max_bytes=max_bytes, progress=progress)
+    return envelope_and_phase(signal, progress=progress)
@@ -0,0 +1,119 @@
+import os
+import numpy as np
+
+# ----- Точность вычислений: float64 (по умолчанию) или float32 -----
+# В режиме float32 каналы разбираются сразу в float32, аналитический сигнал — complex64,
+# огибающая, фаза, спектр и OPD — float32: память на отсчёт вдвое меньше, чем в float64.
+#   analytic_signal — преобразование Гильберта через scipy.fft без повышения типа
+#                     (спектр изменяется на месте, обратное FFT пишет в тот же буфер);
+#                     для float64 результат совпадает со scipy.signal.hilbert.
+#   unwrap          — для float32 поправки считаются целым числом оборотов (int32/int64),
+#                     а не накапливаются суммой float32: ошибка не растёт с длиной записи.
+# Границы ошибки float32 относительно float64 (ε = 2⁻²⁴ ≈ 6·10⁻⁸, N — длина записи,
+# A — огибающая в отсчёте, A_rms — её среднеквадратичное значение по записи):
+#   |Δφ| ≤ PHASE_NOISE_FACTOR · ε · log₂N · A_rms / A + 2ε · |φ|            (рад)
+#   |ΔOPD| ≤ |Δφ| · λ / (2π·n) + 2ε · |OPD|                                 (м)
+# Первое слагаемое — ошибка округления FFT и входных данных, отнесённая к огибающей,
+# второе — представление большой накопленной фазы в float32. Границы выполняются, пока
+# фаза между соседними отсчётами меняется меньше чем на π − |Δφ| (полосы заметно реже
+# fs/2), иначе округление может изменить решение развёртки на 2π. Проверка на
+# синтетических записях — бенчмарк precision (interf_bench).
+
+PRECISIONS = {
+    'float64': (np.float64, np.complex128),
+    'float32': (np.float32, np.complex64),
+}
+DEFAULT_PRECISION = os.environ.get("INTERF_PRECISION", "float64")
+EPSILON32 = float(np.finfo(np.float32).eps) / 2
+PHASE_NOISE_FACTOR = 4.0
+FFT_WORKERS = os.cpu_count() or 1
+# Блок при переводе оборотов в радианы: временный массив float64 не больше блока
+_UNWRAP_BLOCK = 1 << 20
+
+def real_dtype(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    return np.dtype(PRECISIONS[precision][0])
+
+def working_dtype(dtype):
+    # float32 остаётся float32, всё остальное (целые, float64) считается в float64
+    return np.dtype(np.float32) if np.dtype(dtype) in (np.float32, np.complex64) else np.dtype(np.float64)
+
+def precision_of(x):
+    return 'float32' if working_dtype(np.asarray(x).dtype) == np.float32 else 'float64'
+
+def _along(axis, ndim, index):
+    key = [slice(None)] * ndim
+    key[axis] = index
+    return tuple(key)
+
+def analytic_signal(x, axis=0, workers=FFT_WORKERS):
+    x = np.asarray(x)
+    x = x.astype(working_dtype(x.dtype), copy=False)
+    n = x.shape[axis]
+    if n == 0:
+        return np.empty(x.shape, dtype=PRECISIONS[precision_of(x)][1])
+    from scipy import fft as sp_fft
+    spectrum = sp_fft.fft(x, axis=axis, workers=workers)
+    spectrum[_along(axis, x.ndim, slice(1, (n + 1) // 2))] *= 2.0
+    spectrum[_along(axis, x.ndim, slice(n // 2 + 1, None))] = 0.0
+    return sp_fft.ifft(spectrum, axis=axis, overwrite_x=True, workers=workers)
+
+def unwrap(wrapped, axis=0):
+    wrapped = np.asarray(wrapped)
+    if wrapped.dtype != np.float32 or wrapped.shape[axis] < 2:
+        return np.unwrap(wrapped, axis=axis)
+    n = wrapped.shape[axis]
+    # Скачок больше π — целый оборот; при |скачок| = π поправки нет, как в np.unwrap
+    jumps = np.rint(np.diff(wrapped, axis=axis) / np.float32(2 * np.pi)).astype(np.int8)
+    cycles = np.cumsum(jumps, axis=axis, dtype=np.int32 if n < 2 ** 31 else np.int64)
+    del jumps
+    phase = np.array(wrapped, copy=True)
+    for start in range(0, n - 1, _UNWRAP_BLOCK):
+        block = _along(axis, phase.ndim, slice(start + 1, start + 1 + _UNWRAP_BLOCK))
+        turns = cycles[_along(axis, cycles.ndim, slice(start, start + _UNWRAP_BLOCK))]
+        phase[block] = wrapped[block] - (2 * np.pi) * turns
+    return phase
+
+def phase_error_bound(envelope, phase, n_samples=None):
+    # Допустимая ошибка фазы float32 в каждом отсчёте (рад), см. формулу выше
+    envelope = np.abs(np.asarray(envelope, dtype=np.float64))
+    n = max(2, n_samples or len(envelope))
+    rms = np.sqrt(np.mean(envelope ** 2, axis=0)) if envelope.size else 0.0
+    with np.errstate(divide='ignore'):
+        noise = PHASE_NOISE_FACTOR * EPSILON32 * np.log2(n) * rms / envelope
+    return noise + 2 * EPSILON32 * np.abs(np.asarray(phase, dtype=np.float64))
+
+def opd_error_bound(phase_bound, opd, scale):
+    return phase_bound * np.abs(scale) + 2 * EPSILON32 * np.abs(np.asarray(opd, dtype=np.float64))
+
+def compare_precision(signal, config=None):
+    # Демодуляция в float64 и float32 одного сигнала: максимальные ошибки и запас до границ
+    from interf_opd import OPDConfig
+    config = config or OPDConfig()
+    signal = np.asarray(signal, dtype=np.float64)
+    reference = analytic_signal(signal)
+    envelope = np.abs(reference)
+    phase = unwrap(np.angle(reference))
+    del reference
+    single = analytic_signal(signal.astype(np.float32))
+    phase32 = unwrap(np.angle(single))
+    envelope32 = np.abs(single)
+    del single
+    scale = float(config.scale(1)[0])
+    opd = phase * scale
+    opd32 = phase32 * np.float32(scale)
+    phase_bound = phase_error_bound(envelope, phase)
+    opd_bound = opd_error_bound(phase_bound, opd, scale)
+    phase_error = np.abs(phase32 - phase)
+    opd_error = np.abs(opd32 - opd)
+    return {
+        "samples": len(signal),
+        "max_phase_error": float(phase_error.max(initial=0.0)),
+        "max_opd_error": float(opd_error.max(initial=0.0)),
+        "max_envelope_error": float(np.abs(envelope32 - envelope).max(initial=0.0)),
+        # Отношение ошибки к границе: ≤ 1 — граница выполнена
+        "phase_bound_ratio": float((phase_error / phase_bound).max(initial=0.0)),
+        "opd_bound_ratio": float((opd_error / opd_bound).max(initial=0.0)),
+        "max_phase": float(np.abs(phase).max(initial=0.0)),
+    }
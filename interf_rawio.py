@@ -0,0 +1,149 @@
+import os
+import json
+import numpy as np
+
+# ----- Двоичные записи АЦП (.bin, .dat) без разбора и копирования -----
+# Отсчёты лежат в файле как есть: целые int16/int32 (или float) с чередованием каналов
+# (кадр — по отсчёту каждого канала) либо подряд канал за каналом. Описание — JSON рядом
+# с файлом (<файл>.json или <имя без расширения>.json) или первой строкой самого файла:
+#   {"dtype": "int16", "channels": 4, "interleaved": true, "scale": 3.05e-4, "offset": 0,
+#    "sampling_rate": 250000, "header_bytes": 512, "columns": ["X", "Y", "Z", "Ref"]}
+# scale и offset — число или список по каналам (значение = отсчёт · scale + offset);
+# header_bytes — заголовок дигитайзера перед данными (при описании в первой строке файла
+# по умолчанию — длина этой строки); неполный последний кадр отбрасывается.
+# Файл отображается через np.memmap, каналы — strided-представления без копий, а масштаб
+# применяется только к запрошенному участку (блок таблицы, видимая часть графика, столбец
+# фильтра), поэтому открытие записи любого размера не зависит от её длины.
+
+RAW_EXTENSIONS = ('.bin', '.dat')
+SPEC_KEYS = ("dtype", "channels", "interleaved", "scale", "offset", "sampling_rate", "header_bytes", "columns")
+# Первая строка файла с описанием не длиннее
+MAX_HEADER_LINE = 1 << 16
+
+def _per_channel(value, n_channels, name):
+    values = np.asarray(value, dtype=np.float64)
+    if values.ndim == 0:
+        values = np.full(n_channels, values)
+    if values.shape != (n_channels,):
+        raise ValueError(f"Binary spec: {name} must be a number or a list of {n_channels} values")
+    return [float(v) for v in values]
+
+class RawSpec:
+    def __init__(self, dtype, channels, interleaved=True, scale=1.0, offset=0.0, sampling_rate=None,
+                 header_bytes=0, columns=None):
+        self.dtype = np.dtype(dtype)
+        if self.dtype.kind not in "iuf":
+            raise ValueError(f"Binary spec: unsupported sample type {dtype}")
+        self.channels = int(channels)
+        if self.channels < 1:
+            raise ValueError("Binary spec: channels must be positive")
+        self.interleaved = bool(interleaved)
+        self.scale = _per_channel(scale, self.channels, "scale")
+        self.offset = _per_channel(offset, self.channels, "offset")
+        self.sampling_rate = None if sampling_rate is None else float(sampling_rate)
+        if self.sampling_rate is not None and not self.sampling_rate > 0:
+            raise ValueError("Binary spec: sampling_rate must be positive")
+        self.header_bytes = int(header_bytes)
+        if self.header_bytes < 0:
+            raise ValueError("Binary spec: header_bytes must not be negative")
+        self.columns = [str(c) for c in columns] if columns is not None else [str(i) for i in range(self.channels)]
+        if len(self.columns) != self.channels:
+            raise ValueError(f"Binary spec: expected {self.channels} column names")
+    @classmethod
+    def from_dict(cls, spec):
+        unknown = set(spec) - set(SPEC_KEYS)
+        if unknown:
+            raise ValueError(f"Binary spec: unknown keys {', '.join(sorted(unknown))}")
+        for key in ("dtype", "channels"):
+            if key not in spec:
+                raise ValueError(f"Binary spec: '{key}' is required")
+        return cls(**spec)
+    def to_dict(self):
+        return {"dtype": self.dtype.str, "channels": self.channels, "interleaved": self.interleaved,
+                "scale": self.scale, "offset": self.offset, "sampling_rate": self.sampling_rate,
+                "header_bytes": self.header_bytes, "columns": self.columns}
+
+def spec_paths(file_path):
+    return [file_path + ".json", os.path.splitext(file_path)[0] + ".json"]
+
+def read_spec(file_path):
+    for path in spec_paths(file_path):
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return RawSpec.from_dict(json.load(f))
+    # Описание в первой строке файла
+    with open(file_path, 'rb') as f:
+        head = f.read(MAX_HEADER_LINE)
+    if head.startswith(b"{") and b"\n" in head:
+        line = head[:head.index(b"\n") + 1]
+        spec = json.loads(line.decode('utf-8'))
+        spec.setdefault("header_bytes", len(line))
+        return RawSpec.from_dict(spec)
+    raise ValueError(f"No description for binary file {os.path.basename(file_path)}: "
+                     f"expected {os.path.basename(spec_paths(file_path)[0])} or a JSON first line")
+
+def write_spec(file_path, spec):
+    with open(spec_paths(file_path)[0], 'w', encoding='utf-8') as f:
+        json.dump(spec.to_dict(), f, indent=2)
+
+# ----- Канал с масштабом, вычисляемым при чтении -----
+class ScaledChannel:
+    # Представление np.memmap и линейный масштаб. Срез или индекс возвращает значения только
+    # запрошенных отсчётов, np.asarray — весь канал (например, для преобразования Гильберта)
+    ndim = 1
+    def __init__(self, raw, scale=1.0, offset=0.0, dtype=np.float64):
+        self.raw = raw
+        self.dtype = np.dtype(dtype)
+        self.scale = self.dtype.type(scale)
+        self.offset = self.dtype.type(offset)
+    def __len__(self):
+        return len(self.raw)
+    @property
+    def shape(self):
+        return (len(self.raw),)
+    @property
+    def size(self):
+        return len(self.raw)
+    @property
+    def nbytes(self):
+        # Размер значений после масштабирования, как у массива того же типа
+        return len(self.raw) * self.dtype.itemsize
+    def _scaled(self, raw, out=None):
+        out = np.multiply(raw, self.scale, out=out, dtype=self.dtype)
+        if self.offset:
+            out += self.offset
+        return out
+    def __getitem__(self, index):
+        values = self.raw[index]
+        if np.ndim(values) == 0:
+            return self.dtype.type(values * self.scale + self.offset)
+        return self._scaled(values)
+    def read_into(self, out):
+        # Масштабирование прямо в готовый массив (столбец Recording.stack) без временной копии
+        return self._scaled(self.raw, out=out)
+    def __array__(self, dtype=None, copy=None):
+        values = self._scaled(self.raw)
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+def read_raw(file_path, spec=None, dtype=None, progress=None):
+    # Возвращает (названия каналов, каналы ScaledChannel, частота дискретизации или None)
+    spec = read_spec(file_path) if spec is None else spec
+    frame = spec.dtype.itemsize * spec.channels
+    n_samples = max(0, os.path.getsize(file_path) - spec.header_bytes) // frame
+    dtype = np.float64 if dtype is None else dtype
+    if progress is not None:
+        progress(0, "Mapping binary file")
+    if n_samples == 0:
+        channels = [np.empty(0, dtype=dtype) for _ in range(spec.channels)]
+        return spec.columns, channels, spec.sampling_rate
+    if spec.interleaved:
+        raw = np.memmap(file_path, dtype=spec.dtype, mode='r', offset=spec.header_bytes,
+                        shape=(n_samples, spec.channels))
+        views = [raw[:, j] for j in range(spec.channels)]
+    else:
+        raw = np.memmap(file_path, dtype=spec.dtype, mode='r', offset=spec.header_bytes,
+                        shape=(spec.channels, n_samples))
+        views = [raw[j] for j in range(spec.channels)]
+    channels = [ScaledChannel(view, scale, offset, dtype)
+                for view, scale, offset in zip(views, spec.scale, spec.offset)]
+    return spec.columns, channels, spec.sampling_rate
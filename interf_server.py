@@ -0,0 +1,352 @@
+import os
+import sys
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+
+from interf_client import parse_address, default_address, send_message, recv_message
+from interf_engine import load_recording, envelope_and_phase
+from interf_filters import apply_filter
+from interf_spectrum import (spectrum_length, spectrum_amplitude, frequency_axis, band_amplitude, band_axis,
+                             peak_frequency)
+from interf_precision import real_dtype
+from interf_graph import DEFAULT_SAMPLING_RATE
+from interf_trace import span
+
+# ----- Локальный сервер анализа -----
+# Долго работающий процесс на Unix-сокете или localhost TCP: принимает сигналы (массивом
+# или путём к файлу записи) и считает фильтр, огибающую/фазу и спектр в пуле рабочих
+# процессов. Формат сообщений и клиент — interf_client. Соединение обслуживают два потока:
+# чтение запросов (не больше MAX_INFLIGHT в работе, дальше — противодавление TCP) и
+# отправка ответов в порядке готовности. Ответ содержит времена этапов, а запрос
+# {"op": "metrics"} — глубину очереди пула и перцентили времён последних запросов.
+#   python Interf_garik.py serve --address tcp:127.0.0.1:8765 --workers 4 --stats 10
+# Операции: demodulate (огибающая, фаза; spectrum/band — спектр огибающей),
+# spectrum (спектр самого сигнала), filter (отфильтрованный сигнал), ping, metrics.
+
+OPS = ("demodulate", "spectrum", "filter")
+MAX_INFLIGHT = 64
+METRICS_WINDOW = 1024
+STAGES = ("queue_s", "load_s", "compute_s", "send_s", "total_s")
+
+# ----- Вычисления (в рабочем процессе) -----
+def _load_signal(params, arrays, path):
+    sampling_rate = params.get("sampling_rate")
+    if path is not None:
+        recording = load_recording(path)
+        signal = recording.channel(int(params.get("channel", 0)))
+        sampling_rate = sampling_rate or recording.sampling_rate
+    elif "signal" in arrays:
+        signal = arrays["signal"]
+    else:
+        raise ValueError("Request has neither a signal nor a path")
+    precision = params.get("precision")
+    signal = np.asarray(signal, dtype=real_dtype(precision) if precision else None)
+    if signal.ndim != 1:
+        raise ValueError("Signal must be one-dimensional")
+    return signal, float(sampling_rate or DEFAULT_SAMPLING_RATE)
+
+def _spectrum(x, sampling_rate, params):
+    window = params.get("window", 'Rectangular')
+    band = params.get("band")
+    if band:
+        lo, hi, n_bins = float(band[0]) / sampling_rate, float(band[1]) / sampling_rate, int(band[2])
+        frequency = band_axis(lo, hi, n_bins) * sampling_rate
+        return frequency, band_amplitude(x, lo, hi, n_bins, window)
+    n_zeros, fast_length = int(params.get("n_zeros", 0)), bool(params.get("fast_length", False))
+    N = spectrum_length(len(x), n_zeros, fast_length)
+    return frequency_axis(N, sampling_rate), spectrum_amplitude(x, n_zeros, window, fast_length)
+
+def run_request(op, params, arrays, path=None):
+    # Возвращает (массивы, сведения, времена этапов)
+    started = time.perf_counter()
+    signal, sampling_rate = _load_signal(params, arrays, path)
+    loaded = time.perf_counter()
+    out = {}
+    settings = params.get("filter")
+    if settings:
+        settings = dict(settings)
+        signal = apply_filter(signal, settings.pop("type"), **settings)
+        if op == "filter":
+            out["filtered"] = signal
+    elif op == "filter":
+        raise ValueError("Filter request needs filter={'type': ..., parameters}")
+    attrs = {"samples": len(signal), "sampling_rate": sampling_rate}
+    spectrum_of = None
+    if op == "demodulate":
+        out["envelope"], out["phase"] = envelope_and_phase(signal)
+        if params.get("spectrum") or params.get("band"):
+            spectrum_of = out["envelope"]
+    elif op == "spectrum":
+        spectrum_of = signal
+    if spectrum_of is not None:
+        out["frequency"], out["amplitude"] = _spectrum(spectrum_of, sampling_rate, params)
+        # Частота модуляции с уточнением между отсчётами (interf_spectrum.peak_frequency)
+        attrs["peak"] = peak_frequency(out["frequency"], out["amplitude"], skip_dc=not params.get("band"))
+    return out, attrs, {"load_s": loaded - started, "compute_s": time.perf_counter() - loaded}
+
+def _warm_worker():
+    from interf_startup import warm_up
+    warm_up()
+    return os.getpid()
+
+# ----- Метрики -----
+class ServerMetrics:
+    def __init__(self, window=METRICS_WINDOW):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.connections = 0
+        # Запросы в пуле (ждут рабочего или считаются); готовые, но не отправленные — не в счёт
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.samples = 0
+        # Времена этапов последних запросов
+        self.recent = deque(maxlen=window)
+    def connection(self, delta):
+        with self._lock:
+            self.connections += delta
+    def queued(self, size):
+        with self._lock:
+            self.bytes_in += size
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+    def dequeued(self):
+        with self._lock:
+            self.queue_depth -= 1
+    def finished(self, op, ok, timing, size, samples=0):
+        with self._lock:
+            self.bytes_out += size
+            if ok:
+                self.completed += 1
+                self.samples += samples
+                self.recent.append(dict(timing, op=op))
+            else:
+                self.failed += 1
+    def snapshot(self):
+        with self._lock:
+            uptime = time.monotonic() - self.started
+            result = {"uptime_s": uptime, "connections": self.connections, "queue_depth": self.queue_depth,
+                      "max_queue_depth": self.max_queue_depth, "completed": self.completed,
+                      "failed": self.failed, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                      "samples_per_s": self.samples / uptime if uptime > 0 else 0.0}
+            recent = list(self.recent)
+        for stage in STAGES:
+            values = np.array([r[stage] for r in recent if stage in r])
+            if len(values):
+                result[stage] = {"mean": float(values.mean()), "p50": float(np.percentile(values, 50)),
+                                 "p95": float(np.percentile(values, 95)), "max": float(values.max())}
+        return result
+
+# ----- Сервер -----
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.owner.serve_connection(self.request)
+
+def _stale_socket(path):
+    # На сокете никто не слушает (сервер завершился, не удалив его)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return True
+    finally:
+        probe.close()
+    return False
+
+class AnalysisServer:
+    def __init__(self, address=None, workers=None):
+        # workers — число рабочих процессов (None — по числу ядер); 0 — потоки в этом процессе
+        self.address = address or default_address()
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            if not _stale_socket(target):
+                raise RuntimeError(f"Analysis server already running at {self.address}")
+            # Сокет, оставшийся от завершившегося сервера
+            os.unlink(target)
+        self.workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        if self.workers > 0:
+            # spawn: рабочие процессы не наследуют потоки и сокеты сервера
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="interf-server")
+        self.metrics = ServerMetrics()
+        self._socket_path = None
+        if family == socket.AF_UNIX:
+            self._server = _UnixServer(target, _Handler)
+            self._socket_path = target
+        else:
+            self._server = _TCPServer(target, _Handler)
+            host, port = self._server.server_address[:2]
+            self.address = f"tcp:{host}:{port}"
+        self._server.owner = self
+        self._thread = None
+    def warm_up(self):
+        # Запуск рабочих процессов и импорт scipy до первого запроса
+        if self.workers > 0:
+            for future in [self.pool.submit(_warm_worker) for _ in range(self.workers)]:
+                future.result()
+        return self
+    def start(self):
+        # Обслуживание в фоновом потоке (для тестов и встраивания)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="interf-server", daemon=True)
+        self._thread.start()
+        return self
+    def serve_forever(self):
+        self._server.serve_forever()
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self._socket_path is not None and os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    def serve_connection(self, sock):
+        if sock.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_lock = threading.Lock()
+        slots = threading.BoundedSemaphore(MAX_INFLIGHT)
+        replies = queue.Queue()
+        writer = threading.Thread(target=self._write_replies, args=(sock, send_lock, slots, replies),
+                                  name="interf-server-writer", daemon=True)
+        writer.start()
+        self.metrics.connection(1)
+        try:
+            while True:
+                message = recv_message(sock)
+                if message is None:
+                    break
+                header, arrays, size = message
+                received = time.perf_counter()
+                request_id, op = header.get("id"), header.get("op")
+                if op == "ping":
+                    send_message(sock, {"id": request_id, "ok": True,
+                                        "attrs": {"pid": os.getpid(), "workers": self.workers}}, lock=send_lock)
+                elif op == "metrics":
+                    send_message(sock, {"id": request_id, "ok": True, "attrs": self.metrics.snapshot()},
+                                 lock=send_lock)
+                elif op not in OPS:
+                    send_message(sock, {"id": request_id, "ok": False, "error": f"Unknown operation: {op}"},
+                                 lock=send_lock)
+                else:
+                    slots.acquire()
+                    self.metrics.queued(size)
+                    try:
+                        future = self.pool.submit(run_request, op, header.get("params", {}), arrays,
+                                                  header.get("path"))
+                    except Exception as e:
+                        # Пул закрыт (close) или сломан: запрос не принят
+                        self.metrics.dequeued()
+                        self.metrics.finished(op, False, {}, 0)
+                        slots.release()
+                        send_message(sock, {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"},
+                                     lock=send_lock)
+                        continue
+                    future.add_done_callback(lambda f, r=request_id, o=op, t=received:
+                                             self._completed(replies, r, o, t, f))
+        except Exception:
+            # Обрыв соединения, испорченное сообщение, нехватка памяти под массивы —
+            # соединение закрывается, принятые запросы получают ответы
+            pass
+        finally:
+            # Ответы на уже принятые запросы отправляются до закрытия соединения
+            for _ in range(MAX_INFLIGHT):
+                slots.acquire()
+            replies.put(None)
+            writer.join()
+            self.metrics.connection(-1)
+    def _completed(self, replies, request_id, op, received, future):
+        # Запрос покинул пул; отправкой ответа занимается поток записи
+        self.metrics.dequeued()
+        replies.put((request_id, op, received, future))
+    def _write_replies(self, sock, send_lock, slots, replies):
+        while True:
+            item = replies.get()
+            if item is None:
+                return
+            request_id, op, received, future = item
+            timing, size, ok, samples = {}, 0, False, 0
+            try:
+                with span(f"server.{op}", "server"):
+                    try:
+                        arrays, attrs, timing = future.result()
+                    except Exception as e:
+                        header, arrays = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}, None
+                    else:
+                        pool_s = time.perf_counter() - received
+                        # Ожидание в очереди пула и передача данных рабочему процессу
+                        timing["queue_s"] = max(0.0, pool_s - timing["load_s"] - timing["compute_s"])
+                        timing["total_s"] = pool_s
+                        header, ok, samples = {"id": request_id, "ok": True, "attrs": attrs,
+                                               "timing": timing}, True, attrs["samples"]
+                    sending = time.perf_counter()
+                    size = send_message(sock, header, arrays, lock=send_lock)
+                    timing["send_s"] = time.perf_counter() - sending
+                    timing["total_s"] = time.perf_counter() - received
+            except OSError:
+                ok = False
+            finally:
+                self.metrics.finished(op, ok, timing, size, samples)
+                slots.release()
+
+# ----- Запуск из командной строки -----
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local interferometer analysis server")
+    parser.add_argument("--address", default=None,
+                        help=f"unix:/path.sock or tcp:127.0.0.1:PORT (default: {default_address()})")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count; 0 — threads in the server process)")
+    parser.add_argument("--stats", type=float, default=0.0, help="print metrics every N seconds")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        server = AnalysisServer(args.address, workers=args.workers).warm_up()
+    except (RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Listening on {server.address} ({server.workers} workers)", file=sys.stderr)
+    if args.stats > 0:
+        def report():
+            while True:
+                time.sleep(args.stats)
+                m = server.metrics.snapshot()
+                total = m.get("total_s", {})
+                print(f"completed {m['completed']} failed {m['failed']} queue {m['queue_depth']} "
+                      f"(max {m['max_queue_depth']}) {m['samples_per_s']:.0f} samples/s "
+                      f"p50 {1000 * total.get('p50', 0):.2f} ms p95 {1000 * total.get('p95', 0):.2f} ms",
+                      file=sys.stderr)
+        threading.Thread(target=report, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
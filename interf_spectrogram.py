@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ----- Спектрограмма (STFT) и усреднённая СПМ по Уэлчу для длинных записей -----
+# Запись обрабатывается пакетами перекрывающихся сегментов; каждый пакет читает только
+# свой участок сигнала (подходит и для np.memmap). Соседние сегменты усредняются в
+# столбцы изображения, число которых ограничено max_columns, поэтому пиковая память
+# не зависит от длины записи. Пакеты считаются параллельно в пуле потоков.
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+class SpectrogramResult:
+    def __init__(self, freqs, times, power, psd, segments):
+        self.freqs = freqs          # частоты, Гц
+        self.times = times          # центры столбцов, с
+        self.power = power          # (частоты, столбцы) — средняя мощность сегментов столбца
+        self.psd = psd              # СПМ по Уэлчу, ед.²/Гц
+        self.segments = segments    # число сегментов
+
+def spectrogram(signal, sampling_rate, nperseg=4096, overlap=0.5, window='hann', max_columns=2048,
+                batch_segments=256, workers=DEFAULT_WORKERS, progress=None):
+    from scipy.fft import rfft, rfftfreq
+    from scipy.signal import get_window
+    n = len(signal)
+    nperseg = int(min(nperseg, n))
+    if nperseg < 2:
+        raise ValueError("Signal is too short for a spectrogram")
+    step = max(1, int(round(nperseg * (1.0 - overlap))))
+    n_segments = (n - nperseg) // step + 1
+    per_column = -(-n_segments // max_columns)
+    n_columns = -(-n_segments // per_column)
+    # Пакет содержит целое число столбцов
+    batch = per_column * max(1, batch_segments // per_column)
+    w = get_window(window, nperseg)
+    # Масштаб плотности как в scipy.signal.welch (односторонний спектр, detrend='constant')
+    scale = 1.0 / (sampling_rate * np.sum(w * w))
+    n_freqs = nperseg // 2 + 1
+    power = np.empty((n_freqs, n_columns))
+    psd_sum = np.zeros(n_freqs)
+
+    def process(first):
+        last = min(first + batch, n_segments)
+        lo = first * step
+        hi = (last - 1) * step + nperseg
+        chunk = np.asarray(signal[lo:hi], dtype=np.float64)
+        segments = sliding_window_view(chunk, nperseg)[::step]
+        segments = segments - segments.mean(axis=1, keepdims=True)
+        spec = np.abs(rfft(segments * w, axis=1, workers=1)) ** 2
+        spec *= scale
+        if nperseg % 2:
+            spec[:, 1:] *= 2
+        else:
+            spec[:, 1:-1] *= 2
+        starts = np.arange(0, last - first, per_column)
+        columns = np.add.reduceat(spec, starts, axis=0) / np.diff(np.append(starts, last - first))[:, None]
+        return first // per_column, columns, spec.sum(axis=0)
+
+    firsts = range(0, n_segments, batch)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # Ограничиваем число пакетов в работе, чтобы память оставалась постоянной
+        pending = []
+        done = 0
+        for first in firsts:
+            pending.append(pool.submit(process, first))
+            if len(pending) >= 2 * max(1, workers):
+                done = _collect(pending.pop(0), power, psd_sum, done, len(firsts), progress)
+        for future in pending:
+            done = _collect(future, power, psd_sum, done, len(firsts), progress)
+    freqs = rfftfreq(nperseg, 1.0 / sampling_rate)
+    # Центр столбца — среднее центров его сегментов (как t у scipy.signal.spectrogram);
+    # в последнем столбце сегментов может быть меньше per_column
+    first_segments = np.arange(n_columns) * per_column
+    counts = np.minimum(per_column, n_segments - first_segments)
+    times = (first_segments * step + ((counts - 1) * step + nperseg) / 2.0) / sampling_rate
+    return SpectrogramResult(freqs, times, power, psd_sum / n_segments, n_segments)
+
+def _collect(future, power, psd_sum, done, total, progress):
+    column, columns, psd_part = future.result()
+    power[:, column:column + len(columns)] = columns.T
+    psd_sum += psd_part
+    done += 1
+    if progress is not None:
+        progress(int(100 * done / total), "Spectrogram")
+    return done
@@ -0,0 +1,228 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+from interf_trace import traced
+from interf_precision import working_dtype
+
+# ----- Амплитудный спектр вещественного сигнала -----
+# rfft считает только неотрицательные частоты, а дополнение нулями передаётся через
+# аргумент n, без копии np.pad. Нормировка совпадает с прежней: 2/N·|X| для
+# прямоугольного окна; для остальных окон делается поправка на когерентное усиление.
+
+WINDOWS = {
+    'Rectangular': 'boxcar',
+    'Hann': 'hann',
+    'Hamming': 'hamming',
+    'Blackman': 'blackman',
+    'Flat Top': 'flattop',
+}
+FFT_WORKERS = os.cpu_count() or 1
+
+def spectrum_length(n_samples, n_zeros=0, fast_length=False):
+    N = n_samples + max(0, int(n_zeros))
+    if not fast_length:
+        return N
+    from scipy.fft import next_fast_len
+    return next_fast_len(N, real=True)
+
+def frequency_axis(N, sampling_rate):
+    # Частоты первых N // 2 отсчётов спектра длины N
+    if N == 0:
+        return np.array([])
+    from scipy.fft import rfftfreq
+    return rfftfreq(N, 1.0 / sampling_rate)[:N // 2]
+
+@traced("fft", "compute")
+def spectrum_amplitude(signal, n_zeros=0, window='Rectangular', fast_length=False, workers=FFT_WORKERS):
+    # Амплитуды не зависят от частоты дискретизации: при её смене пересчитывается только ось
+    n = len(signal)
+    N = spectrum_length(n, n_zeros, fast_length)
+    if N == 0:
+        return np.array([])
+    scale = 2.0 / N
+    from scipy.fft import rfft
+    # Пустой сигнал с нулями — нулевой спектр при любом окне (у окна длины 0 сумма 0)
+    if n and WINDOWS.get(window, window) != 'boxcar':
+        from scipy.signal import get_window
+        w = get_window(WINDOWS.get(window, window), n, fftbins=True)
+        if np.asarray(signal).dtype == np.float32:
+            # Окно в типе сигнала: спектр float32 не повышается до float64
+            w = w.astype(np.float32)
+        scale *= n / w.sum()
+        signal = signal * w
+    yf = rfft(signal, n=N, workers=workers)
+    amplitude = np.abs(yf[:N // 2])
+    amplitude *= scale
+    return amplitude
+
+def amplitude_spectrum(signal, sampling_rate, n_zeros=0, window='Rectangular', fast_length=False,
+                       workers=FFT_WORKERS):
+    N = spectrum_length(len(signal), n_zeros, fast_length)
+    return frequency_axis(N, sampling_rate), spectrum_amplitude(signal, n_zeros, window, fast_length, workers)
+
+# ----- Спектр в полосе частот: zoom FFT через chirp-Z преобразование -----
+# Вместо дополнения нулями всей записи считаются только n_bins частот от f_lo до f_hi
+# включительно (f — в долях частоты дискретизации) алгоритмом Bluestein: свёртка с
+# линейно-частотным сигналом через FFT длины ≈ блок + n_bins. Запись обрабатывается
+# блоками; спектр блока умножается на фазовый множитель сдвига его начала и суммируется,
+# поэтому память — блок + n_bins при любом шаге по частоте, а БПФ-образы чирпов общие для
+# всех блоков. Нормировка как у spectrum_amplitude без дополнения нулями: 2/Σw·|X(f)|.
+ZOOM_BLOCK = 1 << 16
+
+def _turns(x):
+    # exp(-2πi·x) по дробной части x: фаза больших аргументов без потери точности
+    return np.exp(-2j * np.pi * np.mod(x, 1.0))
+
+@traced("czt", "compute")
+def band_amplitude(signal, f_lo, f_hi, n_bins, window='Rectangular', block=ZOOM_BLOCK, workers=FFT_WORKERS):
+    from scipy.fft import next_fast_len, fft, ifft
+    n = len(signal)
+    m = int(n_bins)
+    if n == 0 or m < 1:
+        return np.array([])
+    dtype = working_dtype(signal.dtype)
+    w = None
+    if WINDOWS.get(window, window) != 'boxcar':
+        from scipy.signal import get_window
+        w = get_window(WINDOWS.get(window, window), n, fftbins=True)
+    gain = float(w.sum()) if w is not None else float(n)
+    step = (f_hi - f_lo) / (m - 1) if m > 1 else 0.0
+    freqs = f_lo + step * np.arange(m)
+    # Длина FFT используется целиком: блок = L - m + 1 отсчётов
+    L = next_fast_len(min(n, max(int(block), 2 * m)) + m - 1)
+    B = min(n, L - m + 1)
+    # X(f_lo + j·d) = e^{-πi·d·j²} · Σ_k [x_k·e^{-2πi(f_lo·k + d·k²/2)}] · e^{πi·d·(j-k)²}
+    k = np.arange(B, dtype=np.float64)
+    pre = _turns(f_lo * k + 0.5 * step * k * k)
+    j = np.arange(m, dtype=np.float64)
+    post = _turns(0.5 * step * j * j)
+    t = np.arange(-(B - 1), m, dtype=np.float64)
+    chirp = np.zeros(L, dtype=np.complex128)
+    chirp[:len(t)] = _turns(-0.5 * step * t * t)
+    chirp = fft(chirp, workers=workers)
+    total = np.zeros(m, dtype=np.complex128)
+    buffer = np.zeros(L, dtype=np.complex128)
+    for start in range(0, n, B):
+        part = np.asarray(signal[start:start + B], dtype=np.float64)
+        if w is not None:
+            part = part * w[start:start + len(part)]
+        buffer[:len(part)] = part * pre[:len(part)]
+        buffer[len(part):] = 0.0
+        spectrum = fft(buffer, workers=workers)
+        spectrum *= chirp
+        X = ifft(spectrum, overwrite_x=True, workers=workers)[B - 1:B - 1 + m]
+        # Сдвиг начала блока: множитель exp(-2πi·f·start)
+        total += X * _turns(freqs * start)
+    amplitude = np.abs(total * post)
+    amplitude *= 2.0 / gain
+    return amplitude.astype(dtype, copy=False)
+
+def band_axis(f_lo, f_hi, n_bins):
+    return np.linspace(f_lo, f_hi, int(n_bins)) if n_bins > 1 else np.array([float(f_lo)] * int(n_bins))
+
+def peak_frequency(freqs, amplitude, skip_dc=False):
+    # (частота, амплитуда) максимума с уточнением между отсчётами: парабола через логарифмы
+    # трёх соседних амплитуд; на краю массива — без уточнения. skip_dc — максимум ищется
+    # после спада от нулевой частоты (постоянная составляющая огибающей и её утечка через окно).
+    # None для пустого спектра
+    first = 0
+    if skip_dc and len(amplitude) > 1:
+        rising = np.flatnonzero(np.diff(amplitude) >= 0)
+        first = int(rising[0]) if len(rising) else len(amplitude)
+    if len(amplitude) <= first:
+        return None
+    k = first + int(np.argmax(amplitude[first:]))
+    f, a = float(freqs[k]), float(amplitude[k])
+    if k == first or k == len(amplitude) - 1 or a <= 0:
+        return f, a
+    alpha, beta, gamma = np.log(np.maximum(np.asarray(amplitude[k - 1:k + 2], dtype=np.float64),
+                                           np.finfo(np.float64).tiny))
+    curvature = alpha - 2 * beta + gamma
+    if curvature >= 0:
+        return f, a
+    p = 0.5 * (alpha - gamma) / curvature
+    return f + float(p) * float(freqs[k + 1] - freqs[k]), float(np.exp(beta - 0.25 * (alpha - gamma) * p))
+
+# ----- Общий сервис спектров с кэшированием результатов -----
+# Амплитуды хранятся по ключу (сигнал, дополнение нулями, окно, округление длины) без
+# частоты дискретизации; ось частот для (длина, частота) — в отдельном небольшом кэше.
+# Сигнал идентифицируется объектом массива; слабая ссылка не даёт перепутать
+# новый массив с удалённым, у которого совпал id.
+class SpectrumService:
+    MAX_AXES = 4
+    def __init__(self, max_entries=32, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._axes = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    def amplitude(self, signal, n_zeros=0, window='Rectangular', fast_length=False):
+        key = (id(signal), int(n_zeros), window, bool(fast_length))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is signal:
+                self._entries.move_to_end(key)
+                return entry[1]
+        amplitude = spectrum_amplitude(signal, n_zeros, window, fast_length)
+        amplitude.flags.writeable = False
+        self._store(key, signal, amplitude)
+        return amplitude
+    def axis(self, N, sampling_rate):
+        key = (int(N), float(sampling_rate))
+        with self._lock:
+            xf = self._axes.get(key)
+            if xf is not None:
+                self._axes.move_to_end(key)
+                return xf
+        xf = frequency_axis(N, sampling_rate)
+        xf.flags.writeable = False
+        with self._lock:
+            self._axes[key] = xf
+            while len(self._axes) > self.MAX_AXES:
+                self._axes.popitem(last=False)
+        return xf
+    def spectrum(self, signal, sampling_rate, n_zeros=0, window='Rectangular', fast_length=False):
+        amplitude = self.amplitude(signal, n_zeros, window, fast_length)
+        return self.axis(spectrum_length(len(signal), n_zeros, fast_length), sampling_rate), amplitude
+    def band(self, signal, sampling_rate, f_lo, f_hi, n_bins, window='Rectangular'):
+        # (частоты, амплитуды) в полосе f_lo…f_hi Гц; ключ — полоса в долях частоты дискретизации
+        lo, hi = float(f_lo) / sampling_rate, float(f_hi) / sampling_rate
+        key = ("band", id(signal), lo, hi, int(n_bins), window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is signal:
+                self._entries.move_to_end(key)
+                amplitude = entry[1]
+            else:
+                amplitude = None
+        if amplitude is None:
+            amplitude = band_amplitude(signal, lo, hi, n_bins, window)
+            amplitude.flags.writeable = False
+            self._store(key, signal, amplitude)
+        return band_axis(lo, hi, n_bins) * sampling_rate, amplitude
+    def _store(self, key, signal, result):
+        try:
+            ref = weakref.ref(signal)
+        except TypeError:
+            return
+        size = result.nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (ref, result, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._axes.clear()
+            self._bytes = 0
+
+spectrum_service = SpectrumService()
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import time
+import importlib
+import subprocess
+import numpy as np
+
+# ----- Быстрый запуск -----
+# Тяжёлые пакеты (pandas, scipy.signal, scipy.fft, pyqtgraph, h5py, pyarrow) импортируются
+# модулями программы при первом использовании, а вкладка Demodulation с графиками строится,
+# когда появляются данные. После показа окна warm_up в фоне заранее импортирует то, что
+# понадобится первой обработке, и выполняет маленькое FFT (инициализация scipy.fft), чтобы
+# первое открытие файла не ждало импорта (и компиляции ядер interf_kernels, если установлен
+# numba). INTERF_WARMUP=0 отключает прогрев.
+# time_to_first_window замеряет запуск в отдельном процессе: от старта интерпретатора до
+# первой отрисовки главного окна (тест startup в interf_bench).
+
+WARMUP_ENABLED = os.environ.get("INTERF_WARMUP", "1") != "0"
+# Импортируются в рабочем потоке; pyqtgraph создаёт объекты Qt и импортируется в GUI-потоке
+WARMUP_MODULES = ("numpy.fft", "scipy.fft", "scipy.signal", "scipy.ndimage", "pandas")
+
+def warm_up(progress=None):
+    for i, name in enumerate(WARMUP_MODULES):
+        if progress is not None:
+            progress(int(100 * i / len(WARMUP_MODULES)), f"Warming up {name}")
+        importlib.import_module(name)
+    from scipy.fft import rfft
+    rfft(np.zeros(64))
+    # Ядра Numba (если он установлен) компилируются или загружаются из кэша до первого расчёта
+    from interf_kernels import warm_up as warm_up_kernels
+    warm_up_kernels()
+    return WARMUP_MODULES
+
+def first_window():
+    # Запуск программы с замером: печатает JSON с отметками времени (time.monotonic)
+    started = time.monotonic()
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import Interf_garik
+    imported = time.monotonic()
+    window = Interf_garik.AdvancedInterferometerApp()
+    window.show()
+    built = time.monotonic()
+    marks = {}
+    def painted():
+        marks["shown"] = time.monotonic()
+        app.quit()
+    # Срабатывает после обработки событий показа, то есть после первой отрисовки окна
+    QTimer.singleShot(0, painted)
+    app.exec_()
+    modules = sorted(name for name in ("pandas", "scipy.signal", "scipy.fft", "pyqtgraph") if name in sys.modules)
+    print(json.dumps({"started": started, "imported": imported, "built": built, "shown": marks["shown"],
+                      "heavy_modules": modules}))
+    window.close()
+
+def time_to_first_window(python=sys.executable, timeout=120):
+    # Время до первого окна в новом процессе (с запуском интерпретатора), с.
+    # Прогрев отключён: он начинается после показа окна и на замер не влияет
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"), INTERF_WARMUP="0")
+    package = os.path.dirname(os.path.abspath(__file__))
+    launched = time.monotonic()
+    output = subprocess.run([python, "-c", "import interf_startup; interf_startup.first_window()"], cwd=package,
+                            env=env, capture_output=True, text=True, timeout=timeout, check=True).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {
+        "first_window_s": marks["shown"] - launched,
+        "interpreter_s": marks["started"] - launched,
+        "import_s": marks["imported"] - marks["started"],
+        "build_s": marks["built"] - marks["imported"],
+        "show_s": marks["shown"] - marks["built"],
+        "heavy_modules": marks["heavy_modules"],
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(time_to_first_window(), indent=2))
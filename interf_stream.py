@@ -0,0 +1,230 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+
+# ----- Потоковая демодуляция в реальном времени -----
+# Источник (синтетический или воспроизведение файла) пишет блоки отсчётов в кольцевой
+# буфер; поток демодулятора забирает новые отсчёты, фильтрует их КИХ-фильтром Гильберта
+# с сохранением состояния между блоками и дописывает огибающую и непрерывно
+# развёрнутую фазу в выходные кольцевые буферы. История не пересчитывается.
+
+# ----- Кольцевой буфер -----
+class RingBuffer:
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        self._total = 0
+        self._lock = threading.Lock()
+        # (индекс конца блока, время записи) — для измерения задержки
+        self._stamps = deque(maxlen=4096)
+    @property
+    def total(self):
+        return self._total
+    def write(self, block, stamp=None):
+        # От блока длиннее буфера остаются последние capacity отсчётов — на своих абсолютных
+        # номерах, поэтому total, read и метки времени указывают на записанные данные
+        block = np.asarray(block)
+        skipped = max(len(block) - self.capacity, 0)
+        block = block[skipped:]
+        with self._lock:
+            self._total += skipped
+            start = self._total % self.capacity
+            first = min(len(block), self.capacity - start)
+            self._data[start:start + first] = block[:first]
+            self._data[:len(block) - first] = block[first:]
+            self._total += len(block)
+            self._stamps.append((self._total, time.perf_counter() if stamp is None else stamp))
+    def read(self, start, stop=None):
+        # Отсчёты с абсолютными номерами [start, stop); перезаписанные пропускаются
+        with self._lock:
+            stop = self._total if stop is None else min(stop, self._total)
+            start = max(start, stop - self.capacity, 0)
+            idx = np.arange(start, stop) % self.capacity
+            return start, self._data[idx]
+    def latest(self, n):
+        return self.read(self._total - n)[1]
+    def stamp_for(self, index):
+        # Время записи блока, содержащего отсчёт index - 1
+        with self._lock:
+            for end, stamp in self._stamps:
+                if end >= index:
+                    return stamp
+        return None
+
+# ----- КИХ-фильтр Гильберта -----
+def design_hilbert_fir(numtaps=127, transition=0.02):
+    # Тип III (нечётная длина); полоса [transition, 0.5 - transition] от частоты дискретизации
+    if numtaps % 2 == 0:
+        numtaps += 1
+    from scipy.signal import remez
+    # remez возвращает коэффициенты с обратным знаком относительно scipy.signal.hilbert
+    return -remez(numtaps, [transition, 0.5 - transition], [1.0], type='hilbert', fs=1.0)
+
+class StreamingDemodulator:
+    def __init__(self, numtaps=127, transition=0.02):
+        self.taps = design_hilbert_fir(numtaps, transition)
+        self.delay = (len(self.taps) - 1) // 2
+        self.reset()
+    def reset(self):
+        self._zi = np.zeros(len(self.taps) - 1)
+        self._delay_line = np.zeros(self.delay)
+        self._last_phase = None
+    def process(self, block):
+        # Возвращает (огибающая, фаза) для блока; выход задержан на self.delay отсчётов
+        from scipy.signal import lfilter
+        block = np.asarray(block, dtype=np.float64)
+        quadrature, self._zi = lfilter(self.taps, [1.0], block, zi=self._zi)
+        delayed = np.concatenate((self._delay_line, block))
+        in_phase = delayed[:len(block)]
+        self._delay_line = delayed[len(block):]
+        analytic = in_phase + 1j * quadrature
+        envelope = np.abs(analytic)
+        wrapped = np.angle(analytic)
+        if self._last_phase is None:
+            phase = np.unwrap(wrapped)
+        else:
+            phase = np.unwrap(np.concatenate(([self._last_phase], wrapped)))[1:]
+        if len(phase):
+            self._last_phase = phase[-1]
+        return envelope, phase
+
+# ----- Источники данных -----
+class StreamSource:
+    def __init__(self, sampling_rate, block_size=1024):
+        self.sampling_rate = float(sampling_rate)
+        self.block_size = int(block_size)
+        self._stop = threading.Event()
+        self._thread = None
+    def next_block(self):
+        raise NotImplementedError
+    def start(self, ring):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(ring,), daemon=True, name="interf-source")
+        self._thread.start()
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    def _run(self, ring):
+        # Блоки выдаются в темпе частоты дискретизации
+        period = self.block_size / self.sampling_rate
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            block = self.next_block()
+            if block is None:
+                break
+            ring.write(block)
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+
+class SyntheticSource(StreamSource):
+    # Несущая с синусоидальной фазовой модуляцией, медленным дрейфом фазы и шумом
+    def __init__(self, sampling_rate, block_size=1024, carrier=50.0, amplitude=1.0,
+                 mod_depth=3.0, mod_freq=0.5, drift=0.2, noise=0.02, seed=None):
+        super().__init__(sampling_rate, block_size)
+        self.carrier = carrier
+        self.amplitude = amplitude
+        self.mod_depth = mod_depth
+        self.mod_freq = mod_freq
+        self.drift = drift
+        self.noise = noise
+        self._rng = np.random.default_rng(seed)
+        self._n = 0
+    def phase(self, t):
+        return self.mod_depth * np.sin(2 * np.pi * self.mod_freq * t) + self.drift * t
+    def next_block(self):
+        t = (self._n + np.arange(self.block_size)) / self.sampling_rate
+        self._n += self.block_size
+        block = self.amplitude * np.cos(2 * np.pi * self.carrier * t + self.phase(t))
+        if self.noise:
+            block += self.noise * self._rng.standard_normal(self.block_size)
+        return block
+
+class FileReplaySource(StreamSource):
+    # Воспроизведение загруженного канала записи с заданной частотой дискретизации
+    def __init__(self, signal, sampling_rate, block_size=1024, loop=True):
+        super().__init__(sampling_rate, block_size)
+        self.signal = signal
+        self.loop = loop
+        self._pos = 0
+    def next_block(self):
+        if len(self.signal) == 0:
+            return None
+        if self._pos >= len(self.signal):
+            if not self.loop:
+                return None
+            self._pos = 0
+        block = np.asarray(self.signal[self._pos:self._pos + self.block_size], dtype=np.float64)
+        self._pos += len(block)
+        return block
+
+# ----- Конвейер: источник → кольцевой буфер → демодулятор → выходные буферы -----
+class StreamPipeline:
+    def __init__(self, source, capacity=1 << 20, demodulator=None):
+        self.source = source
+        self.sampling_rate = source.sampling_rate
+        self.demodulator = demodulator or StreamingDemodulator()
+        self.raw = RingBuffer(capacity)
+        self.envelope = RingBuffer(capacity)
+        self.phase = RingBuffer(capacity)
+        self._stop = threading.Event()
+        self._thread = None
+        self._latencies = deque(maxlen=1000)
+        self.processed = 0
+        self.dropped = 0
+        self.started_at = None
+    def start(self):
+        self.demodulator.reset()
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="interf-demod")
+        self._thread.start()
+        self.source.start(self.raw)
+    def stop(self):
+        self.source.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    def _run(self):
+        cursor = 0
+        while not self._stop.is_set():
+            if self.raw.total == cursor:
+                self._stop.wait(0.001)
+                continue
+            start, block = self.raw.read(cursor)
+            self.dropped += start - cursor
+            cursor = start + len(block)
+            envelope, phase = self.demodulator.process(block)
+            self.envelope.write(envelope)
+            self.phase.write(phase)
+            self.processed += len(block)
+            stamp = self.raw.stamp_for(cursor)
+            if stamp is not None:
+                self._latencies.append(time.perf_counter() - stamp)
+    def view(self, n_samples):
+        # Последние n_samples результатов и соответствующий им сырой сигнал:
+        # выход с номером k относится к входному отсчёту k - delay
+        delay = self.demodulator.delay
+        end = self.phase.total
+        n = max(0, min(n_samples, end - delay))
+        _, raw = self.raw.read(end - n - delay, end - delay)
+        _, envelope = self.envelope.read(end - n, end)
+        _, phase = self.phase.read(end - n, end)
+        n = min(len(raw), len(envelope), len(phase))
+        t = (end - delay - n + np.arange(n)) / self.sampling_rate
+        return t, raw[len(raw) - n:], envelope[len(envelope) - n:], phase[len(phase) - n:]
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "throughput": self.processed / elapsed if elapsed > 0 else 0.0,
+            "latency_mean_ms": 1000.0 * float(latencies.mean()),
+            "latency_max_ms": 1000.0 * float(latencies.max()),
+        }
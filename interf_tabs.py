@@ -0,0 +1,253 @@
+import os
+import mmap
+import itertools
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal, Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
+
+# ----- Менеджер вкладок анализа -----
+# Вкладка описывается ключом (анализ, источник, параметры), функцией load(progress) → данные
+# и функцией build(данные) → виджет. Повторное открытие с тем же ключом переключает на
+# уже открытую вкладку. Данные берутся из общих хранилищ (AnalyticStore, spectrum_service),
+# поэтому вкладки и Demodulation разделяют одни и те же массивы, а не копии.
+# Память вкладки — сумма байт различных буферов её массивов (представления сводятся к
+# базовому массиву; отображённые с диска np.memmap не считаются). Буферы, которые держит
+# сама программа (pinned: текущая запись, результаты Demodulation), в бюджет не входят.
+# При превышении бюджета у давно не просматривавшихся вкладок освобождаются данные и
+# виджет; при следующем показе вкладка пересчитывается через load.
+
+DEFAULT_MAX_MB = 1024
+# Глубина обхода атрибутов при поиске массивов вкладки
+_WALK_DEPTH = 6
+
+def _root(array):
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+def _buffer_bytes(root):
+    # Массив, отображённый с диска, занимает страничный кэш, а не память процесса
+    if isinstance(root, np.memmap) or isinstance(root.base, mmap.mmap):
+        return 0
+    return root.nbytes
+
+def array_buffers(obj, found=None, depth=_WALK_DEPTH, seen=None):
+    # {id(базовый буфер): (буфер, байт)} для массивов в obj: последовательности, словари и
+    # объекты модулей программы (interf_*, Interf_garik) просматриваются рекурсивно
+    found = {} if found is None else found
+    seen = set() if seen is None else seen
+    if id(obj) in seen or depth < 0:
+        return found
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        root = _root(obj)
+        found[id(root)] = (root, _buffer_bytes(root))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            array_buffers(item, found, depth - 1, seen)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            array_buffers(item, found, depth - 1, seen)
+    elif _is_own(obj):
+        for item in vars(obj).values():
+            array_buffers(item, found, depth - 1, seen)
+    return found
+
+def _is_own(obj):
+    module = getattr(type(obj), "__module__", "") or ""
+    return module.startswith(("interf_", "Interf_garik")) or module == "__main__"
+
+def normalize_key(key, objects=None):
+    # Массивы и объекты сравниваются по идентичности, остальное — по значению; объекты ключа
+    # собираются в objects и держатся вкладкой, поэтому их id не может достаться другому объекту
+    objects = [] if objects is None else objects
+    if isinstance(key, (str, bytes, int, float, bool, type(None))):
+        return key, objects
+    if isinstance(key, tuple):
+        return tuple(normalize_key(part, objects)[0] for part in key), objects
+    objects.append(key)
+    return ("id", id(key)), objects
+
+class ManagedTab(QWidget):
+    def __init__(self, key, sources, title, load, build, parent=None):
+        super().__init__(parent)
+        self.key = key
+        # Объекты ключа (сигнал, запись): по ним load пересчитывает освобождённые данные
+        self.sources = sources
+        self.title = title
+        self.load = load
+        self.build = build
+        self.data = None
+        self.content = None
+        self.last_viewed = 0
+        self.job_kind = None
+        self.layout_ = QVBoxLayout(self)
+        self.layout_.setContentsMargins(0, 0, 0, 0)
+        self.placeholder = QLabel("Loading...")
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.placeholder.setStyleSheet("color: #AAAAAA;")
+        self.layout_.addWidget(self.placeholder)
+    @property
+    def loaded(self):
+        return self.content is not None
+    def set_data(self, data):
+        self.job_kind = None
+        self.drop_content()
+        self.data = data
+        self.content = self.build(data)
+        self.placeholder.hide()
+        self.layout_.addWidget(self.content)
+    def drop_content(self):
+        if self.content is not None:
+            self.layout_.removeWidget(self.content)
+            self.content.setParent(None)
+            self.content.deleteLater()
+            self.content = None
+    def release(self):
+        self.drop_content()
+        self.data = None
+        self.placeholder.setText("Released to save memory; reloads when shown")
+        self.placeholder.show()
+    def buffers(self):
+        found = array_buffers(self.sources)
+        if self.content is not None:
+            array_buffers(self.data, found)
+            array_buffers(vars(self.content), found)
+        return found
+
+class TabManager(QObject):
+    # Память вкладок изменилась: (всего байт, бюджет)
+    memoryChanged = pyqtSignal(object, object)
+    def __init__(self, tab_widget, jobs=None, max_bytes=None, pinned=None, parent=None):
+        super().__init__(parent)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("INTERF_TABS_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.tab_widget = tab_widget
+        self.jobs = jobs
+        self.max_bytes = max_bytes
+        # pinned() → объекты, которые программа держит независимо от вкладок
+        self.pinned = pinned
+        self.tabs = []
+        self._clock = itertools.count(1)
+        self._ids = itertools.count(1)
+        tab_widget.currentChanged.connect(self.on_current_changed)
+    def find(self, key):
+        normalized, _ = normalize_key(tuple(key))
+        for tab in self.tabs:
+            if tab.key == normalized:
+                return tab
+        return None
+    def open(self, title, key, load, build, data=None, activate=True):
+        # Возвращает вкладку (существующую или новую) и при activate делает её текущей;
+        # data — уже посчитанные данные, чтобы не запускать load повторно
+        tab = self.find(key)
+        if tab is None:
+            normalized, sources = normalize_key(tuple(key))
+            tab = ManagedTab(normalized, tuple(sources), title, load, build)
+            self.tabs.append(tab)
+            self.tab_widget.addTab(tab, title)
+        if data is not None and not tab.loaded:
+            self.cancel_load(tab)
+            tab.set_data(data)
+        if not activate:
+            self.enforce_budget()
+        elif self.tab_widget.currentWidget() is tab:
+            self.on_current_changed(self.tab_widget.currentIndex())
+        else:
+            self.tab_widget.setCurrentWidget(tab)
+        return tab
+    def close(self, tab):
+        if tab not in self.tabs:
+            return
+        self.cancel_load(tab)
+        self.tabs.remove(tab)
+        self.tab_widget.removeTab(self.tab_widget.indexOf(tab))
+        tab.drop_content()
+        tab.deleteLater()
+        self.update_memory()
+    def clear(self):
+        for tab in list(self.tabs):
+            self.close(tab)
+    def close_where(self, predicate):
+        # Закрывает вкладки, у которых predicate(источники ключа) истинно — например, вкладки
+        # замещённой записи: источники держат её массивы, и release их не освобождает
+        for tab in [tab for tab in self.tabs if predicate(tab.sources)]:
+            self.close(tab)
+    def on_current_changed(self, index):
+        tab = self.tab_widget.widget(index)
+        if tab not in self.tabs:
+            return
+        tab.last_viewed = next(self._clock)
+        if not tab.loaded and tab.job_kind is None:
+            self.restore(tab)
+        self.enforce_budget()
+    def restore(self, tab):
+        tab.placeholder.setText("Loading...")
+        tab.placeholder.show()
+        if self.jobs is None:
+            tab.set_data(tab.load(None))
+            self.update_memory()
+            return
+        def on_result(data, tab=tab):
+            if tab in self.tabs:
+                tab.set_data(data)
+                self.enforce_budget()
+        def on_error(error, tab=tab):
+            tab.job_kind = None
+            tab.placeholder.setText(f"Error: {error}")
+        # У каждой загрузки свой вид задачи: загрузки разных вкладок не отменяют друг друга
+        tab.job_kind = f"tab.{next(self._ids)}"
+        self.jobs.submit(tab.job_kind, lambda job: tab.load(job.progress), on_result=on_result, on_error=on_error)
+    def cancel_load(self, tab):
+        if tab.job_kind is not None and self.jobs is not None:
+            self.jobs.cancel(tab.job_kind)
+        tab.job_kind = None
+    # ----- Учёт памяти -----
+    def _pinned_buffers(self):
+        return array_buffers(self.pinned()) if self.pinned is not None else {}
+    def usage(self):
+        # [(вкладка, своих байт, общих с другими вкладками байт, байт, освобождаемых release)],
+        # всего байт (без pinned)
+        pinned = self._pinned_buffers()
+        per_tab = []
+        for tab in self.tabs:
+            buffers = {k: v for k, v in tab.buffers().items() if k not in pinned}
+            per_tab.append((tab, buffers, array_buffers(tab.sources)))
+        owners = {}
+        for _, buffers, _ in per_tab:
+            for k in buffers:
+                owners[k] = owners.get(k, 0) + 1
+        rows = []
+        total = {}
+        for tab, buffers, sources in per_tab:
+            own = sum(size for k, (_, size) in buffers.items() if owners[k] == 1)
+            shared = sum(size for k, (_, size) in buffers.items() if owners[k] > 1)
+            # Источники остаются у освобождённой вкладки для пересчёта
+            gain = sum(size for k, (_, size) in buffers.items() if owners[k] == 1 and k not in sources)
+            rows.append((tab, own, shared, gain))
+            total.update(buffers)
+        return rows, sum(size for _, size in total.values())
+    def enforce_budget(self):
+        # Освобождаются давно не просматривавшиеся вкладки, у которых есть собственные данные
+        # Память считается один раз; после освобождения вкладки из итога вычитается её выигрыш
+        current = self.tab_widget.currentWidget()
+        rows, total = self.usage()
+        candidates = sorted((row for row in rows if row[0] is not current and row[0].loaded and row[3] > 0),
+                            key=lambda row: row[0].last_viewed)
+        for tab, _, _, gain in candidates:
+            if total <= self.max_bytes:
+                break
+            tab.release()
+            total -= gain
+        self.update_memory()
+    def update_memory(self):
+        rows, total = self.usage()
+        for tab, own, shared, _ in rows:
+            index = self.tab_widget.indexOf(tab)
+            state = "" if tab.loaded else " (released)"
+            self.tab_widget.setTabToolTip(index, f"{tab.title}{state}\nMemory: {own / 1048576:.1f} MB"
+                                                 f" + {shared / 1048576:.1f} MB shared")
+        self.memoryChanged.emit(total, self.max_bytes)
+    def set_budget(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.enforce_budget()
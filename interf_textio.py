@@ -0,0 +1,62 @@
+import numpy as np
+
+# ----- Потоковое чтение больших текстовых записей (.txt, столбцы через пробелы) -----
+# Файл разбирается блоками по chunk_rows строк C-парсером pandas прямо в заранее
+# выделенный массив (порядок Fortran: каждый канал — непрерывный столбец).
+# Пиковая память ≈ итоговый массив + один блок; невыбранные столбцы не создаются вовсе.
+
+DEFAULT_CHUNK_ROWS = 1 << 20
+_COUNT_BLOCK_BYTES = 1 << 24
+
+def count_lines(file_path):
+    # Верхняя оценка числа строк: переводы строк плюс последняя строка без '\n'
+    n_lines = 0
+    last = b"\n"
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(_COUNT_BLOCK_BYTES)
+            if not block:
+                break
+            n_lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        n_lines += 1
+    return n_lines
+
+def count_columns(file_path):
+    with open(file_path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                return len(fields)
+    return 0
+
+def read_text_columns(file_path, usecols=None, dtype=np.float64, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    # Возвращает (номера столбцов, массив формы (строки, столбцы))
+    dtype = np.dtype(dtype)
+    n_columns = count_columns(file_path)
+    if n_columns == 0:
+        raise ValueError("File is empty")
+    if usecols is None:
+        usecols = list(range(n_columns))
+    else:
+        usecols = sorted(set(int(c) for c in usecols))
+        if not usecols or usecols[0] < 0 or usecols[-1] >= n_columns:
+            raise ValueError(f"Column index out of range (file has {n_columns} columns)")
+    max_rows = count_lines(file_path)
+    values = np.empty((max_rows, len(usecols)), dtype=dtype, order='F')
+    import pandas as pd
+    reader = pd.read_csv(file_path, sep=r'\s+', header=None, usecols=usecols, dtype=dtype,
+                         chunksize=chunk_rows, engine='c')
+    n_rows = 0
+    with reader:
+        for chunk in reader:
+            block = chunk.to_numpy(dtype=dtype, copy=False)
+            values[n_rows:n_rows + len(block)] = block
+            n_rows += len(block)
+            if progress is not None:
+                progress(min(99, int(100 * n_rows / max(max_rows, 1))), "Parsing text")
+    if n_rows == 0:
+        raise ValueError("File is empty")
+    # Пустые строки учтены в оценке, но не прочитаны — отбрасываем хвост
+    return usecols, values[:n_rows]
@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+# ----- Встроенная трассировка: интервалы времени и пиковая память -----
+# tracer.span("имя", **args) и декоратор @traced() записывают интервалы с потоком,
+# длительностью и пиковым RSS процесса за время интервала. Память опрашивается
+# фоновым потоком каждые SAMPLE_INTERVAL секунд, пока открыт хотя бы один интервал.
+# Последние интервалы доступны через recent(); полный журнал (ограниченный
+# MAX_EVENTS) выгружается в формат Chrome trace-event (chrome://tracing, Perfetto).
+# Выключенная трассировка стоит одной проверки флага: span() возвращает общий
+# пустой контекст, а @traced() сразу вызывает исходную функцию.
+# Включение: INTERF_TRACE=1 или tracer.enable().
+
+MAX_EVENTS = 200_000
+MAX_RECENT = 500
+SAMPLE_INTERVAL = 0.005
+
+def _rss_reader():
+    # Возвращает функцию чтения текущего RSS (байт) или None, если источника нет
+    if sys.platform.startswith("linux"):
+        page = os.sysconf("SC_PAGE_SIZE")
+        def read():
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * page
+        try:
+            read()
+            return read
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    process = psutil.Process()
+    return lambda: process.memory_info().rss
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ("tracer", "name", "category", "args", "start", "tid", "rss_start", "rss_peak")
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+    def set(self, **args):
+        # Дополнительные сведения, известные только внутри интервала (размер, число пиков...)
+        self.args.update(args)
+    def __enter__(self):
+        self.tid = threading.get_ident()
+        self.rss_start = self.rss_peak = self.tracer._open(self)
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._close(self, end)
+        return False
+
+class Tracer:
+    def __init__(self, enabled=False, max_events=MAX_EVENTS, max_recent=MAX_RECENT):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.samples = deque(maxlen=max_events)
+        self._recent = deque(maxlen=max_recent)
+        self._open_spans = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler = None
+        self._read_rss = _rss_reader()
+        self._origin = time.perf_counter()
+        self._threads = {}
+    def enable(self):
+        self.enabled = True
+    def disable(self):
+        self.enabled = False
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.samples.clear()
+            self._recent.clear()
+    def span(self, name, category="app", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+    def thread_name(self, tid):
+        return self._threads.get(tid, str(tid))
+    def recent(self, n=None):
+        # Последние завершённые интервалы, новые в конце
+        with self._lock:
+            items = list(self._recent)
+        return items if n is None else items[-n:]
+    # ----- Память -----
+    def _rss(self):
+        if self._read_rss is None:
+            return None
+        try:
+            return self._read_rss()
+        except OSError:
+            return None
+    def _open(self, span):
+        rss = self._rss()
+        with self._lock:
+            self._open_spans.add(span)
+            self._threads.setdefault(span.tid, threading.current_thread().name)
+            if rss is not None and (self._sampler is None or not self._sampler.is_alive()):
+                self._sampler = threading.Thread(target=self._sample_loop, daemon=True, name="interf-trace")
+                self._sampler.start()
+        self._wake.set()
+        return rss
+    def _close(self, span, end):
+        rss = self._rss()
+        with self._lock:
+            self._open_spans.discard(span)
+            if rss is not None and span.rss_peak is not None:
+                span.rss_peak = max(span.rss_peak, rss)
+            event = {
+                "name": span.name,
+                "cat": span.category,
+                "ts": (span.start - self._origin) * 1e6,
+                "dur": (end - span.start) * 1e6,
+                "tid": span.tid,
+                "args": dict(span.args),
+            }
+            if span.rss_start is not None:
+                event["args"]["rss_start_mb"] = span.rss_start / 1048576
+                event["args"]["peak_rss_mb"] = span.rss_peak / 1048576
+                event["args"]["peak_delta_mb"] = (span.rss_peak - span.rss_start) / 1048576
+            self.events.append(event)
+            self._recent.append(event)
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                active = list(self._open_spans)
+            if not active:
+                self._wake.clear()
+                # Поток засыпает, пока не откроется новый интервал
+                if not self._wake.wait(1.0):
+                    with self._lock:
+                        if not self._open_spans:
+                            self._sampler = None
+                            return
+                continue
+            rss = self._rss()
+            if rss is not None:
+                now = time.perf_counter()
+                with self._lock:
+                    for span in self._open_spans:
+                        if span.rss_peak is None or rss > span.rss_peak:
+                            span.rss_peak = rss
+                    self.samples.append(((now - self._origin) * 1e6, rss))
+            time.sleep(SAMPLE_INTERVAL)
+    # ----- Экспорт -----
+    def chrome_trace(self):
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            samples = list(self.samples)
+            threads = dict(self._threads)
+        trace = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "Interf_garik"}}]
+        for tid, name in threads.items():
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        for event in events:
+            trace.append(dict(event, ph="X", pid=pid))
+        for ts, rss in samples:
+            trace.append({"name": "RSS", "ph": "C", "pid": pid, "tid": 0, "ts": ts, "args": {"MB": rss / 1048576}})
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+    def export(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return file_path
+
+tracer = Tracer(enabled=os.environ.get("INTERF_TRACE", "") not in ("", "0"))
+
+def span(name, category="app", **args):
+    return tracer.span(name, category, **args)
+
+def traced(name=None, category="app"):
+    # Декоратор: вызов функции записывается как интервал name (по умолчанию — её __qualname__)
+    def decorate(fn):
+        label = name or fn.__qualname__
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with Span(tracer, label, category, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate